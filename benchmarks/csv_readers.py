@@ -0,0 +1,49 @@
+"""
+Compara asignaciones y memoria pico de los lectores de CSV ('csv' y 'mmap') al
+mantener en memoria un bloque completo del archivo de empleados.
+
+Uso:
+    python -m benchmarks.csv_readers --rows 500000
+    python -m benchmarks.csv_readers --path src/data/hired_employees.csv
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.extras.utils import iter_csv
+from benchmarks.synthetic import write_employees_csv
+
+
+def measure(path: str, reader: str) -> None:
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    chunk = next(iter_csv(path, chunk_size=10 ** 9, reader=reader))
+    elapsed = time.perf_counter() - start
+    blocks = sys.getallocatedblocks() - blocks_before
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{reader:>5}: {len(chunk)} filas en {elapsed:.2f}s, "
+          f"{blocks:,} bloques asignados, pico {peak / 1024 / 1024:.1f} MB")
+    del chunk
+
+
+def run(path: str) -> None:
+    for reader in ('csv', 'mmap'):
+        measure(path, reader)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--path')
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+    if args.path:
+        run(args.path)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            run(write_employees_csv(
+                os.path.join(directory, 'hired_employees.csv'), args.rows))
@@ -0,0 +1,52 @@
+"""
+Compara los bytes transferidos, el tiempo de descarga y el tiempo de decodificacion de
+los listados en JSON frente a las exportaciones columnares (`format=arrow` y
+`format=parquet`).
+
+Uso:
+    uvicorn src.main:app --port 8000
+    python -m benchmarks.exports --url http://localhost:8000
+"""
+import argparse
+import io
+import json
+import time
+
+import httpx
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+PATHS = ['/employees/', '/jobs/', '/departments/', '/queries/quarters']
+
+DECODERS = {
+    'json': lambda content: len(json.loads(content)),
+    'arrow': lambda content: pa.ipc.open_stream(content).read_all().num_rows,
+    'parquet': lambda content: pq.read_table(io.BytesIO(content)).num_rows,
+}
+
+
+def run(url: str, repeat: int) -> None:
+    with httpx.Client(base_url=url, timeout=300) as http:
+        for path in PATHS:
+            for format, decode in DECODERS.items():
+                downloads, decodes = [], []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    response = http.get(path, params={'format': format})
+                    response.raise_for_status()
+                    downloads.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    rows = decode(response.content)
+                    decodes.append(time.perf_counter() - start)
+                print(f"{path:>18} {format:>8}: {rows} filas, {len(response.content):>12,} bytes, "
+                      f"descarga {min(downloads) * 1000:8.1f}ms, "
+                      f"decodificacion {min(decodes) * 1000:8.2f}ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.url, args.repeat)
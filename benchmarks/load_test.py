@@ -0,0 +1,59 @@
+"""
+Prueba de carga que mide latencias p50/p99 de los endpoints de lectura con N clientes
+concurrentes. Para comparar los modos, ejecutarla contra el servidor iniciado con
+`ASYNC_API=false` y luego con `ASYNC_API=true`.
+
+Uso:
+    uvicorn src.main:app --port 8000 --workers 1
+    python -m benchmarks.load_test --url http://localhost:8000 --clients 500 --requests 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+PATHS = ['/employees/', '/jobs/', '/departments/', '/queries/quarters', '/queries/avg_hired']
+
+
+async def client(http: httpx.AsyncClient, path: str, requests: int, latencies: list, errors: list) -> None:
+    for _ in range(requests):
+        start = time.perf_counter()
+        try:
+            response = await http.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError as e:
+            errors.append(e)
+
+
+async def run_path(url: str, path: str, clients: int, requests: int) -> None:
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            client(http, path, requests, latencies, errors) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    if not latencies:
+        print(f"{path:<20} sin respuestas exitosas ({len(errors)} errores)")
+        return
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"{path:<20} p50={percentiles[49] * 1000:8.1f}ms p99={percentiles[98] * 1000:8.1f}ms "
+          f"{len(latencies) / elapsed:8.1f} req/s errores={len(errors)}")
+
+
+async def main(url: str, clients: int, requests: int) -> None:
+    for path in PATHS:
+        await run_path(url, path, clients, requests)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.clients, args.requests))
@@ -0,0 +1,41 @@
+"""
+Mide el throughput de parseo y validacion de un `hired_employees.csv` sintetico con
+1, 2, 4 y 8 procesos (sin insertar en la base de datos).
+
+Uso:
+    python -m benchmarks.parallel_parse --rows 2000000 --chunk-mb 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from src.extras import models
+from src.extras.utils import get_schema
+from src.extras.parallel import iter_parallel_chunks
+from benchmarks.synthetic import write_employees_csv
+
+
+def run(rows: int, chunk_bytes: int, workers_list) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_employees_csv(
+            os.path.join(directory, 'hired_employees.csv'), rows)
+        schema = get_schema(path)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+
+        for workers in workers_list:
+            start = time.perf_counter()
+            total = sum(read for read, _, _ in iter_parallel_chunks(
+                path, schema, models.Employees, workers=workers, chunk_bytes=chunk_bytes))
+            elapsed = time.perf_counter() - start
+            print(f"{workers} procesos: {total} filas en {elapsed:.2f}s "
+                  f"({total / elapsed:,.0f} filas/s, {size_mb / elapsed:.1f} MB/s)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--chunk-mb', type=int, default=8)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    run(args.rows, args.chunk_mb * 1024 * 1024, args.workers)
@@ -0,0 +1,48 @@
+import csv
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterator
+
+
+def synthetic_employees(rows: int, start_id: int = 1, seed: int = 0) -> Iterator[Dict]:
+    """
+    Genera empleados sinteticos con la misma forma que `hired_employees.csv`.
+
+    Args:
+        rows (int): Numero de empleados a generar.
+        start_id (int, opcional): Primer ID a usar.
+        seed (int, opcional): Semilla del generador aleatorio.
+
+    Yields:
+        Dict: Fila con las columnas del modelo `Employees`.
+    """
+    rng = random.Random(seed)
+    base = datetime(2021, 1, 1)
+    for id in range(start_id, start_id + rows):
+        hired = base + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+        yield {
+            'id': id,
+            'name': f'Employee {id}',
+            'datetime': hired.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'department_id': rng.randint(1, 12),
+            'job_id': rng.randint(1, 183),
+        }
+
+
+def write_employees_csv(path: str, rows: int, seed: int = 0) -> str:
+    """
+    Escribe un `hired_employees.csv` sintetico en la ruta indicada.
+
+    Args:
+        path (str): Ruta del archivo a crear. Debe contener 'employees' para que `get_schema` lo reconozca.
+        rows (int): Numero de filas.
+        seed (int, opcional): Semilla del generador aleatorio.
+
+    Returns:
+        str: Ruta del archivo escrito.
+    """
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        for row in synthetic_employees(rows, seed=seed):
+            writer.writerow(row.values())
+    return path
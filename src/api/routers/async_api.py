@@ -0,0 +1,272 @@
+"""
+Versiones asincronas de los endpoints de jobs, employees, departments y queries.
+Se montan en lugar de los routers sincronos cuando `ASYNC_API=true`.
+"""
+from fastapi import Response, status, HTTPException, Depends, APIRouter, Query, Body
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Literal, Optional, Type
+
+from src.extras import models
+from src.extras.database import get_async_db
+from src.extras import schemas
+from src.extras.constants import BATCH_MAX_ITEMS, MAX_PAGE_SIZE
+from src.extras.crud import batch_create, batch_update, batch_delete, update_row
+from src.extras.reference import jobs_cache, departments_cache, invalidate_reference
+from src.extras.pagination import list_table
+from src.extras.responses import json_rows
+from src.extras.reporting import (
+    record_hires, quarters_report, above_average_report, hires_report,
+    QUARTERS_TABLES, AVG_HIRED_TABLES, HIRES_TABLES
+)
+from src.extras.http_cache import conditional_get
+
+jobs_router = APIRouter(prefix='/jobs')
+employees_router = APIRouter(prefix='/employees')
+departments_router = APIRouter(prefix='/departments')
+queries_router = APIRouter(prefix='/queries')
+
+
+def _add_batch_routes(router: APIRouter, model: Type, schema: Type) -> None:
+    """
+    Registra POST, PUT y DELETE `/batch` para el modelo. Se llama antes de declarar las
+    rutas `/{id}` para que "batch" no se interprete como un ID.
+    """
+    items_body = Body(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+    @router.post('/batch', response_model=schemas.BatchResponse)
+    async def create_batch(items: List[schema] = items_body, db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(batch_create, model, [item.model_dump() for item in items])
+
+    @router.put('/batch', response_model=schemas.BatchResponse)
+    async def update_batch(items: List[schema] = items_body, db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(batch_update, model, [item.model_dump() for item in items])
+
+    @router.delete('/batch', response_model=schemas.BatchResponse)
+    async def delete_batch(batch: schemas.BatchDelete, db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(batch_delete, model, batch.ids)
+
+
+_add_batch_routes(jobs_router, models.Jobs, schemas.BaseJobs)
+_add_batch_routes(employees_router, models.Employees, schemas.BaseEmployees)
+_add_batch_routes(departments_router, models.Departments, schemas.BaseDepartments)
+
+
+def _found_or_404(instance, id: int, label: str):
+    if not instance:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'{label} con el id: {id}, no se encontro'
+        )
+    return instance
+
+
+async def _get_or_404(db: AsyncSession, model: Type, id: int, label: str):
+    return _found_or_404(await db.get(model, id), id, label)
+
+
+async def _create(db: AsyncSession, model: Type, data: Dict):
+    instance = model(**data)
+    db.add(instance)
+    await db.commit()
+    await db.refresh(instance)
+    invalidate_reference(model, instance.id)
+    return instance
+
+
+async def _update(db: AsyncSession, model: Type, id: int, data: Dict, label: str):
+    updated = _found_or_404(await db.run_sync(update_row, model, id, data), id, label)
+    await db.commit()
+    invalidate_reference(model, id, data.get('id', id))
+    return updated
+
+
+async def _delete(db: AsyncSession, model: Type, id: int, label: str) -> Response:
+    result = await db.execute(delete(model).where(model.id == id))
+    if result.rowcount == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'{label} con el id: {id}, no se encontro'
+        )
+    await db.commit()
+    invalidate_reference(model, id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@jobs_router.get('/', response_model=List[schemas.JobsResponse],
+                 dependencies=[Depends(conditional_get(models.Jobs))])
+async def get_jobs(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    format: Literal['json', 'ndjson', 'arrow', 'parquet'] = 'json',
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Obtiene los trabajos de la base de datos, paginados o exportados como en el router sincrono.
+    """
+    return await db.run_sync(list_table, models.Jobs, schemas.JobsResponse, response, after_id, limit, format,
+                             jobs_cache.all)
+
+
+@jobs_router.post('/', status_code=status.HTTP_201_CREATED, response_model=schemas.JobsResponse)
+async def create_job(job: schemas.BaseJobs, db: AsyncSession = Depends(get_async_db)):
+    """
+    Crea un nuevo trabajo en la base de datos.
+    """
+    return await _create(db, models.Jobs, job.model_dump())
+
+
+@jobs_router.get('/{id}', response_model=schemas.JobsResponse,
+                 dependencies=[Depends(conditional_get(models.Jobs))])
+async def get_job(id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Obtiene un trabajo específico de la base de datos mediante su ID.
+    """
+    return _found_or_404(await db.run_sync(jobs_cache.get, id), id, 'job')
+
+
+@jobs_router.delete('/{id}', status_code=status.HTTP_204_NO_CONTENT)
+async def del_job(id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Elimina un trabajo específico de la base de datos mediante su ID.
+    """
+    return await _delete(db, models.Jobs, id, 'job')
+
+
+@jobs_router.put('/{id}', response_model=schemas.JobsResponse)
+async def update_job(id: int, job: schemas.BaseJobs, db: AsyncSession = Depends(get_async_db)):
+    """
+    Actualiza la información de un trabajo específico en la base de datos.
+    """
+    return await _update(db, models.Jobs, id, job.model_dump(), 'job')
+
+
+@employees_router.get('/', response_model=List[schemas.BaseEmployees],
+                      dependencies=[Depends(conditional_get(models.Employees))])
+async def get_employees(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    format: Literal['json', 'ndjson', 'arrow', 'parquet'] = 'json',
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Recupera los empleados de la base de datos, paginados o exportados como en el router sincrono.
+    """
+    return await db.run_sync(list_table, models.Employees, schemas.BaseEmployees, response, after_id, limit, format)
+
+
+@employees_router.post('/', status_code=status.HTTP_201_CREATED, response_model=schemas.EmployeesResponse)
+async def create_employees(employee: schemas.BaseEmployees, db: AsyncSession = Depends(get_async_db)):
+    """
+    Crea un nuevo registro de empleado en la base de datos.
+    """
+    await db.run_sync(record_hires, [employee.model_dump()])
+    return await _create(db, models.Employees, employee.model_dump())
+
+
+@employees_router.get('/{id}', response_model=schemas.EmployeesResponse,
+                      dependencies=[Depends(conditional_get(models.Employees))])
+async def get_employee(id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Recupera un empleado específico de la base de datos según su ID.
+    """
+    return await _get_or_404(db, models.Employees, id, 'Employee')
+
+
+@employees_router.put('/{id}', response_model=schemas.EmployeesResponse)
+async def update_employee(id: int, employee: schemas.BaseEmployees, db: AsyncSession = Depends(get_async_db)):
+    """
+    Actualiza la información de un empleado existente.
+    """
+    return await _update(db, models.Employees, id, employee.model_dump(), 'Employee')
+
+
+@departments_router.get('/', response_model=List[schemas.DepartementsResponse],
+                        dependencies=[Depends(conditional_get(models.Departments))])
+async def get_departments(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    format: Literal['json', 'ndjson', 'arrow', 'parquet'] = 'json',
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Obtiene los departamentos de la base de datos, paginados o exportados como en el router sincrono.
+    """
+    return await db.run_sync(list_table, models.Departments, schemas.DepartementsResponse, response, after_id, limit,
+                             format, departments_cache.all)
+
+
+@departments_router.get('/{id}', response_model=schemas.DepartementsResponse,
+                        dependencies=[Depends(conditional_get(models.Departments))])
+async def get_department(id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Obtiene un departamento específico de la base de datos mediante su ID.
+    """
+    return _found_or_404(await db.run_sync(departments_cache.get, id), id, 'Department')
+
+
+@departments_router.post('/', status_code=status.HTTP_201_CREATED, response_model=schemas.DepartementsResponse)
+async def create_department(department: schemas.BaseDepartments, db: AsyncSession = Depends(get_async_db)):
+    """
+    Crea un nuevo departamento en la base de datos.
+    """
+    return await _create(db, models.Departments, department.model_dump())
+
+
+@departments_router.delete('/{id}', status_code=status.HTTP_204_NO_CONTENT)
+async def delete_department(id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Elimina un departamento específico de la base de datos mediante su ID.
+    """
+    return await _delete(db, models.Departments, id, 'Department')
+
+
+@departments_router.put('/{id}', response_model=schemas.DepartementsResponse)
+async def update_department(id: int, department: schemas.BaseDepartments, db: AsyncSession = Depends(get_async_db)):
+    """
+    Actualiza la información de un departamento específico en la base de datos.
+    """
+    return await _update(db, models.Departments, id, department.model_dump(), 'Department')
+
+
+@queries_router.get('/quarters', response_model=List[schemas.QuartersResponse],
+                    dependencies=[Depends(conditional_get(*QUARTERS_TABLES))])
+async def get_quarters(db: AsyncSession = Depends(get_async_db)) -> List[Dict]:
+    """
+    Obtiene el número de empleados contratados por cuarto.
+    """
+    return json_rows(await db.run_sync(quarters_report, 2021), schemas.QuartersResponse)
+
+
+@queries_router.get('/avg_hired', response_model=List[schemas.AvgResponse],
+                    dependencies=[Depends(conditional_get(*AVG_HIRED_TABLES))])
+async def get_departments_above_average(db: AsyncSession = Depends(get_async_db)) -> List[Dict]:
+    """
+    Obtiene los departamentos que contrataron más empleados que la media en 2021.
+    """
+    return json_rows(await db.run_sync(above_average_report, 2021), schemas.AvgResponse)
+
+
+@queries_router.get('/hires', response_model=List[schemas.HiresResponse], response_model_exclude_none=True,
+                    dependencies=[Depends(conditional_get(*HIRES_TABLES))])
+async def get_hires(
+    start_year: int = Query(2021, ge=1),
+    end_year: Optional[int] = Query(None, ge=1),
+    granularity: Literal['month', 'quarter', 'year'] = 'quarter',
+    group_by: List[Literal['department', 'job']] = Query([]),
+    db: AsyncSession = Depends(get_async_db)
+) -> List[Dict]:
+    """
+    Obtiene el número de empleados contratados por periodo, con cache hasta que se modifica `Employees`.
+    """
+    try:
+        return json_rows(await db.run_sync(hires_report, start_year, end_year, granularity, group_by),
+                         schemas.HiresResponse, exclude_none=True)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+routers = [jobs_router, employees_router, departments_router, queries_router]
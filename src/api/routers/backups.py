@@ -1,67 +1,76 @@
-from fastapi import status, HTTPException, Depends, APIRouter
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from src.extras.database import get_db
-from src.extras.utils import get_existing_ids, validate_rows
-from src.extras.constants import MODELS, BACKUP_DIR
-from src.extras.backup import backup_table_to_avro, restore_table_from_avro
+from typing import Optional
+from fastapi import status, HTTPException, APIRouter
+from src.api.routers.jobs_queue import submit_job
+from src.extras.constants import BACKUP_PARQUET, MODELS
+from src.extras.job_queue import scheduler
 
 router = APIRouter()
 
+_TABLES = [entry['model'].__tablename__ for entry in MODELS]
 
-@router.post('/backups', status_code=status.HTTP_201_CREATED)
-def backup_avro(db: Session = Depends(get_db)) -> dict[str, str]:
+
+@router.post('/backups', status_code=status.HTTP_202_ACCEPTED)
+def backup_avro(full: bool = False, parquet: bool = BACKUP_PARQUET,
+                priority: Optional[int] = None) -> dict:
     """
-    Crea respaldos en formato Avro de todas las tablas definidas en `MODELS`.
+    Encola el respaldo en formato Avro de todas las tablas definidas en `MODELS`. Cada
+    tabla se respalda en paralelo con su propia conexion. El primer snapshot es completo
+    y los siguientes solo guardan las filas nuevas, modificadas o eliminadas desde el
+    anterior.
 
     Args:
-        db (Session): Sesión de la base de datos proporcionada por FastAPI.
+        full (bool, opcional): Fuerza un snapshot completo.
+        parquet (bool, opcional): Escribe tambien un archivo Parquet junto a cada archivo Avro.
+        priority (int, opcional): Prioridad en la cola. Por defecto la de `JOB_QUEUE_KINDS`.
 
     Returns:
-        dict[str, str]: Mensaje de éxito indicando que los respaldos se crearon con éxito.
+        dict: Mensaje y `id` del trabajo, cuyo avance se consulta en `GET /jobs-queue/{id}`.
+    """
+    job = submit_job('backup', {'tables': _TABLES, 'full': full, 'parquet': parquet}, priority)
+    return {"response": "Backup en curso", "id": job.id}
+
+
+@router.get('/backups/{id}')
+def get_backup_job(id: str) -> dict:
     """
-    try:
-        for model in MODELS:
-            backup_table_to_avro(model['model'], BACKUP_DIR, db=db)
+    Obtiene el estado de un trabajo de respaldo o restauracion. Equivale a
+    `GET /jobs-queue/{id}` restringido a esos tipos de trabajo.
+
+    Args:
+        id (str): ID devuelto por `POST /backups` o `POST /restore`.
 
-        return {"response": "Backup creado con exito"}
-    except HTTPException as e:
+    Returns:
+        dict: Estado del trabajo y, en su avance, por tabla, filas procesadas, bytes y velocidad.
+    """
+    job = scheduler.get(id)
+    if job is None or job['kind'] not in ('backup', 'restore'):
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Hubo un error en la creacion del backup: {e}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Backup con el id: {id}, no se encontro'
         )
+    return job
 
 
-@router.post("/restore", status_code=status.HTTP_201_CREATED)
-def restore_from_avro(db: Session = Depends(get_db)) -> dict[str, str]:
+@router.post("/restore", status_code=status.HTTP_202_ACCEPTED)
+def restore_from_avro(overwrite: bool = False, priority: Optional[int] = None) -> dict:
     """
-    Restaura registros desde archivos Avro a las tablas correspondientes.
+    Encola la restauracion de los registros desde la cadena de snapshots Avro de
+    `POST /backups`, hasta el ultimo. Si aun no hay snapshots, se restauran los respaldos
+    completos incluidos en `src/backups/`. Las tablas sin dependencias entre si se
+    restauran en paralelo.
+
+    Por defecto solo se insertan los registros cuyo ID no existe: las filas actuales,
+    incluidas las escritas despues del respaldo, no se modifican ni se eliminan. Con
+    `overwrite=true` las filas respaldadas vuelven a su version del ultimo snapshot: las
+    existentes se sobrescriben y se eliminan las que el respaldo marca como eliminadas.
+    Las filas con IDs que ningun snapshot contiene se conservan.
+
     Args:
-        db (Session): Sesión de la base de datos proporcionada por FastAPI.
+        overwrite (bool, opcional): Sobrescribe las filas respaldadas y aplica las eliminaciones.
+        priority (int, opcional): Prioridad en la cola. Por defecto la de `JOB_QUEUE_KINDS`.
 
     Returns:
-        dict[str, str]: Mensaje de éxito indicando que la base de datos fue restaurada.
+        dict: Mensaje y `id` del trabajo, cuyo avance se consulta en `GET /jobs-queue/{id}`.
     """
-    for model in MODELS:
-        records: list[dict] = restore_table_from_avro(
-            model['model'], model['backup_path'])
-        try:
-
-            deleted_records: list[dict] = get_existing_ids(
-                records, model['model'], db=db)
-            valid_records: list[dict] = validate_rows(
-                deleted_records, model['model'])
-            print(valid_records)
-
-            if len(valid_records) == 0 and len(deleted_records) == 0:
-                print(
-                    f"no hay datos por restaurar en la tabla {model['model'].__table__}")
-            else:
-                db.bulk_insert_mappings(model['model'], valid_records)
-                db.commit()
-        except IntegrityError as e:
-            print(
-                f"Error de integridad al restaurar registro: {valid_records}. Error: {e}")
-            db.rollback()
-        print(f"Se restauraron los registros desde {model['backup_path']}.")
-    return {'response': 'Base de datos restaurada con exito'}
+    job = submit_job('restore', {'tables': _TABLES, 'overwrite': overwrite}, priority)
+    return {'response': 'Restauracion en curso', 'id': job.id}
@@ -1,10 +1,15 @@
-from fastapi import Response, status, HTTPException, Depends, APIRouter
+from fastapi import Response, status, HTTPException, Depends, APIRouter, Query, Body
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import List, Dict, Literal, Optional
 
 from src.extras import models
 from src.extras.database import get_db
 from src.extras import schemas
+from src.extras.constants import MAX_PAGE_SIZE, BATCH_MAX_ITEMS
+from src.extras.crud import batch_create, batch_update, batch_delete, update_row, delete_row
+from src.extras.pagination import list_table
+from src.extras.http_cache import conditional_get
+from src.extras.reference import departments_cache
 
 
 router = APIRouter(
@@ -12,25 +17,92 @@ router = APIRouter(
 )
 
 
-@router.get('/', response_model=List[schemas.DepartementsResponse])
-def get_departments(db: Session = Depends(get_db)) -> List[Dict]:
+@router.get('/', response_model=List[schemas.DepartementsResponse],
+            dependencies=[Depends(conditional_get(models.Departments))])
+def get_departments(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    format: Literal['json', 'ndjson', 'arrow', 'parquet'] = 'json',
+    db: Session = Depends(get_db)
+) -> List[Dict]:
     """
-    Obtiene todos los departamentos de la base de datos.
+    Obtiene los departamentos de la base de datos.
 
     Args:
+        response (Response): Respuesta donde se agrega el cursor de la siguiente pagina.
+        after_id (int, opcional): Cursor de paginacion; devuelve los departamentos con `id` mayor a este valor.
+        limit (int, opcional): Tamaño de pagina. Si no se entrega ni `after_id` ni `limit` se devuelve la tabla completa.
+        format (str): 'json' devuelve una lista; 'ndjson' exporta la tabla en streaming, una fila por linea;
+            'arrow' (Arrow IPC) y 'parquet' la exportan en streaming en formato columnar.
         db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
 
     Returns:
         List[schemas.DepartementsResponse]: Lista de departamentos obtenidos de la base de datos.
+        En modo paginado el header `X-Next-After-Id` indica el cursor de la siguiente pagina.
+
+    """
+    return list_table(db, models.Departments, schemas.DepartementsResponse, response, after_id, limit, format,
+                      departments_cache.all)
+
+
+# Las rutas /batch se declaran antes de /{id} para que "batch" no se interprete como un ID
+@router.post('/batch', response_model=schemas.BatchResponse)
+def create_departments_batch(
+    departments: List[schemas.BaseDepartments] = Body(..., min_length=1, max_length=BATCH_MAX_ITEMS),
+    db: Session = Depends(get_db)
+) -> Dict:
+    """
+    Crea varios departamentos en una sola transaccion con un unico INSERT multi-fila.
+    Los IDs que ya existen no se modifican.
+
+    Args:
+        departments (List[schemas.BaseDepartments]): Departamentos a crear, como maximo `BATCH_MAX_ITEMS`.
+        db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
 
+    Returns:
+        schemas.BatchResponse: Estado de cada elemento ('created', 'exists' o 'duplicate') y conteo por estado.
     """
-    departments = db.query(models.Departments).all()
-    return departments
+    return batch_create(db, models.Departments, [department.model_dump() for department in departments])
+
+
+@router.put('/batch', response_model=schemas.BatchResponse)
+def update_departments_batch(
+    departments: List[schemas.BaseDepartments] = Body(..., min_length=1, max_length=BATCH_MAX_ITEMS),
+    db: Session = Depends(get_db)
+) -> Dict:
+    """
+    Actualiza varios departamentos, identificados por su ID, en una sola transaccion con un unico UPDATE.
+
+    Args:
+        departments (List[schemas.BaseDepartments]): Nuevos datos de cada elemento, como maximo `BATCH_MAX_ITEMS`.
+        db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
+
+    Returns:
+        schemas.BatchResponse: Estado de cada elemento ('updated', 'not_found' o 'duplicate') y conteo por estado.
+    """
+    return batch_update(db, models.Departments, [department.model_dump() for department in departments])
+
+
+@router.delete('/batch', response_model=schemas.BatchResponse)
+def delete_departments_batch(batch: schemas.BatchDelete, db: Session = Depends(get_db)) -> Dict:
+    """
+    Elimina varios departamentos en una sola transaccion con un unico DELETE.
+
+    Args:
+        batch (schemas.BatchDelete): IDs a eliminar, como maximo `BATCH_MAX_ITEMS`.
+        db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
+
+    Returns:
+        schemas.BatchResponse: Estado de cada elemento ('deleted', 'not_found' o 'duplicate') y conteo por estado.
+    """
+    return batch_delete(db, models.Departments, batch.ids)
 
 
 @router.get(
     '/{id}', status_code=status.HTTP_200_OK,
-    response_model=schemas.DepartementsResponse
+    response_model=schemas.DepartementsResponse,
+    dependencies=[Depends(conditional_get(models.Departments))]
 )
 def get_department(id: int, db: Session = Depends(get_db)) -> schemas.DepartementsResponse:
     """
@@ -43,9 +115,7 @@ def get_department(id: int, db: Session = Depends(get_db)) -> schemas.Departemen
     Returns:
         schemas.DepartementsResponse: Información del departamento.
     """
-    department = db.query(
-        models.Departments
-    ).filter(models.Departments.id == id).first()
+    department = departments_cache.get(db, id)
 
     if not department:
         raise HTTPException(
@@ -71,6 +141,7 @@ def create_department(department: schemas.BaseDepartments, db: Session = Depends
     new_department = models.Departments(**department.model_dump())
     db.add(new_department)
     db.commit()
+    departments_cache.invalidate(new_department.id)
     db.refresh(new_department)
     return new_department
 
@@ -87,16 +158,13 @@ def delete_department(id: int, db: Session = Depends(get_db)):
     Returns:
         Response: Respuesta con código de estado 204 (No Content) si la eliminación fue exitosa.
     """
-    department = db.query(models.Departments).filter(
-        models.Departments.id == id)
-
-    if not department.first():
+    if not delete_row(db, models.Departments, id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f'Department con el id {id}, no se encontro'
         )
-    department.delete(synchronize_session=False)
     db.commit()
+    departments_cache.invalidate(id)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -118,19 +186,15 @@ def update_department(
     Returns:
         schemas.DepartementsResponse: Información del departamento actualizado.
     """
-    department_query = db.query(models.Departments).filter(
-        models.Departments.id == id)
+    updated = update_row(db, models.Departments, id, department.model_dump())
 
-    if not department_query.first():
+    if updated is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f'Department con el id {id}, no se encontro'
         )
 
-    department_query.update(
-        department.model_dump(),
-        synchronize_session=False
-    )
     db.commit()
+    departments_cache.invalidate(id, department.id)
 
-    return department_query.first()
+    return updated
@@ -1,30 +1,100 @@
-from fastapi import Response, status, HTTPException, Depends, APIRouter
+from fastapi import Response, status, HTTPException, Depends, APIRouter, Query, Body
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import List, Dict, Literal, Optional
 
 from src.extras import models
 from src.extras.database import get_db
 from src.extras import schemas
+from src.extras.constants import MAX_PAGE_SIZE, BATCH_MAX_ITEMS
+from src.extras.crud import batch_create, batch_update, batch_delete, update_row
+from src.extras.pagination import list_table
+from src.extras.http_cache import conditional_get
+from src.extras.reporting import record_hires
 
 router = APIRouter(
     prefix='/employees'
 )
 
 
-@router.get('/')
-def get_employees(db: Session = Depends(get_db)):
+@router.get('/', response_model=List[schemas.BaseEmployees],
+            dependencies=[Depends(conditional_get(models.Employees))])
+def get_employees(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    format: Literal['json', 'ndjson', 'arrow', 'parquet'] = 'json',
+    db: Session = Depends(get_db)
+):
     """
-    Recupera la lista completa de empleados de la base de datos.
+    Recupera la lista de empleados de la base de datos.
 
     Args:
+        response (Response): Respuesta donde se agrega el cursor de la siguiente pagina.
+        after_id (int, opcional): Cursor de paginacion; devuelve los empleados con `id` mayor a este valor.
+        limit (int, opcional): Tamaño de pagina. Si no se entrega ni `after_id` ni `limit` se devuelve la tabla completa.
+        format (str): 'json' devuelve una lista; 'ndjson' exporta la tabla en streaming, una fila por linea;
+            'arrow' (Arrow IPC) y 'parquet' la exportan en streaming en formato columnar.
         db (Session): Sesión de la base de datos proporcionada mediante `Depends(get_db)`.
 
     Returns:
-        List[models.Employees]: Lista de todos los empleados almacenados en la base de datos.
+        List[schemas.BaseEmployees]: Lista de empleados. En modo paginado el header
+        `X-Next-After-Id` indica el cursor de la siguiente pagina.
+
+    """
+    return list_table(db, models.Employees, schemas.BaseEmployees, response, after_id, limit, format)
+
+
+# Las rutas /batch se declaran antes de /{id} para que "batch" no se interprete como un ID
+@router.post('/batch', response_model=schemas.BatchResponse)
+def create_employees_batch(
+    employees: List[schemas.BaseEmployees] = Body(..., min_length=1, max_length=BATCH_MAX_ITEMS),
+    db: Session = Depends(get_db)
+) -> Dict:
+    """
+    Crea varios empleados en una sola transaccion con un unico INSERT multi-fila.
+    Los IDs que ya existen no se modifican.
+
+    Args:
+        employees (List[schemas.BaseEmployees]): Empleados a crear, como maximo `BATCH_MAX_ITEMS`.
+        db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
+
+    Returns:
+        schemas.BatchResponse: Estado de cada elemento ('created', 'exists' o 'duplicate') y conteo por estado.
+    """
+    return batch_create(db, models.Employees, [employee.model_dump() for employee in employees])
+
+
+@router.put('/batch', response_model=schemas.BatchResponse)
+def update_employees_batch(
+    employees: List[schemas.BaseEmployees] = Body(..., min_length=1, max_length=BATCH_MAX_ITEMS),
+    db: Session = Depends(get_db)
+) -> Dict:
+    """
+    Actualiza varios empleados, identificados por su ID, en una sola transaccion con un unico UPDATE.
+
+    Args:
+        employees (List[schemas.BaseEmployees]): Nuevos datos de cada elemento, como maximo `BATCH_MAX_ITEMS`.
+        db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
+
+    Returns:
+        schemas.BatchResponse: Estado de cada elemento ('updated', 'not_found' o 'duplicate') y conteo por estado.
+    """
+    return batch_update(db, models.Employees, [employee.model_dump() for employee in employees])
 
+
+@router.delete('/batch', response_model=schemas.BatchResponse)
+def delete_employees_batch(batch: schemas.BatchDelete, db: Session = Depends(get_db)) -> Dict:
     """
-    employees = db.query(models.Employees).all()
-    return employees
+    Elimina varios empleados en una sola transaccion con un unico DELETE.
+
+    Args:
+        batch (schemas.BatchDelete): IDs a eliminar, como maximo `BATCH_MAX_ITEMS`.
+        db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
+
+    Returns:
+        schemas.BatchResponse: Estado de cada elemento ('deleted', 'not_found' o 'duplicate') y conteo por estado.
+    """
+    return batch_delete(db, models.Employees, batch.ids)
 
 
 @router.post(
@@ -50,6 +120,7 @@ def create_employees(
     """
     new_employee = models.Employees(**employee.model_dump())
     db.add(new_employee)
+    record_hires(db, [employee.model_dump()])
     db.commit()
     db.refresh(new_employee)
 
@@ -59,7 +130,8 @@ def create_employees(
 @router.get(
     '/{id}',
     status_code=status.HTTP_200_OK,
-    response_model=schemas.EmployeesResponse
+    response_model=schemas.EmployeesResponse,
+    dependencies=[Depends(conditional_get(models.Employees))]
 )
 def get_employee(id: int, db: Session = Depends(get_db)):
     """
@@ -101,15 +173,13 @@ def update_employee(id: int, employee: schemas.BaseEmployees, db: Session = Depe
     Returns:
         schemas.EmployeesResponse: Datos actualizados del empleado.
     """
-    employee_query = db.query(models.Employees).filter(
-        models.Employees.id == id)
+    updated = update_row(db, models.Employees, id, employee.model_dump())
 
-    if not employee_query.first():
+    if updated is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f'Employee con el id {id}, no se encontro'
         )
 
-    employee_query.update(employee.model_dump(), synchronize_session=False)
     db.commit()
 
-    return employee_query.first()
+    return updated
@@ -1,40 +1,88 @@
-from fastapi import status, HTTPException, Depends, APIRouter
+import csv
+from typing import Literal, Optional
+from fastapi import status, HTTPException, Depends, APIRouter, Query, Request
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Session
+from starlette.requests import ClientDisconnect
 from src.extras.database import get_db
-from src.extras.utils import parse_csv, get_existing_ids, validate_rows, validate_row_limit
-from src.extras.constants import MODELS
+from src.api.routers.jobs_queue import submit_job
+from src.extras.uploads import UploadAborted, UploadError, ingest_upload
+from src.extras.constants import (CSV_CHUNK_SIZE, CSV_ROW_QUOTA, CSV_WORKERS,
+                                  CSV_UPLOAD_TABLES)
 
 router = APIRouter()
 
 
-@router.post('/csv', status_code=status.HTTP_201_CREATED)
-def upload_csv(db: Session = Depends(get_db)):
+@router.post('/csv', status_code=status.HTTP_202_ACCEPTED)
+def upload_csv(
+    chunk_size: int = Query(CSV_CHUNK_SIZE, ge=1),
+    quota: Optional[int] = Query(CSV_ROW_QUOTA, ge=0),
+    on_conflict: Optional[Literal['nothing', 'update']] = None,
+    workers: int = Query(CSV_WORKERS, ge=1),
+    priority: Optional[int] = None
+):
     """
-    Endpoint para cargar datos desde archivos CSV a la base de datos.
+    Endpoint para cargar datos desde archivos CSV a la base de datos. La carga se encola
+    como un trabajo en segundo plano.
 
     Args:
+        chunk_size (int): Numero de filas que se procesan e insertan por bloque.
+        quota (int, opcional): Maximo de filas a insertar por tabla. Si no se entrega no hay limite.
+        on_conflict (str, opcional): 'nothing' ignora y 'update' sobrescribe los IDs existentes
+            directamente en la base de datos (upsert), sin consultar antes los IDs.
+        workers (int): Procesos para parsear y validar cada archivo en paralelo.
+        priority (int, opcional): Prioridad en la cola. Por defecto la de `JOB_QUEUE_KINDS`.
+
+    Returns:
+        dict: Mensaje y `id` del trabajo, cuyo avance y resumen por tabla se consultan en
+        `GET /jobs-queue/{id}`.
+    """
+    job = submit_job('load', {'chunk_size': chunk_size, 'quota': quota,
+                              'on_conflict': on_conflict, 'workers': workers}, priority)
+    return {"response": "Carga en curso", "id": job.id}
+
+
+@router.post('/csv/{table}', status_code=status.HTTP_201_CREATED)
+async def upload_csv_stream(
+    request: Request,
+    table: Literal['departments', 'jobs', 'employees'],
+    chunk_size: int = Query(CSV_CHUNK_SIZE, ge=1),
+    quota: Optional[int] = Query(CSV_ROW_QUOTA, ge=0),
+    on_conflict: Optional[Literal['nothing', 'update']] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Endpoint para cargar a una tabla un CSV enviado en el cuerpo de la peticion, como
+    cuerpo crudo (`text/csv`, admite `Transfer-Encoding: chunked`) o como archivo de un
+    formulario `multipart/form-data`. Las filas se insertan por bloques a medida que llegan.
+
+    Args:
+        request (Request): Peticion con el CSV (sin encabezado) en el cuerpo.
+        table (str): Tabla destino: 'departments', 'jobs' o 'employees'.
+        chunk_size (int): Numero de filas que se procesan e insertan por bloque.
+        quota (int, opcional): Maximo de filas a insertar. Si no se entrega no hay limite.
+        on_conflict (str, opcional): 'nothing' ignora y 'update' sobrescribe los IDs existentes.
         db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
 
     Returns:
-        dict: Respuesta indicando el éxito de la operación.
+        dict: Respuesta indicando el éxito de la operación y el resumen de la carga.
     """
+    model = CSV_UPLOAD_TABLES[table]
     try:
-        for model in MODELS:
-            if not model['path'].endswith('.csv'):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail='El archivo a cargar debe ser un CSV')
-
-            data = parse_csv(model['path'])
-            new_data = get_existing_ids(data, model['model'], db=db)
-            valid_rows = validate_rows(new_data, model['model'])
-            valid_rows = validate_row_limit(valid_rows)
-            db.bulk_insert_mappings(model['model'], valid_rows)
-            db.commit()
-
-        return {"response": "Carga exitosa"}
-    except HTTPException as e:
+        summary = await ingest_upload(request, model, db, chunk_size=chunk_size,
+                                      quota=quota, on_conflict=on_conflict)
+    except UploadAborted as e:
+        if isinstance(e.error, (UploadError, UnicodeDecodeError, csv.Error, ClientDisconnect)):
+            status_code = status.HTTP_400_BAD_REQUEST
+        elif isinstance(e.error, IntegrityError):
+            status_code = status.HTTP_409_CONFLICT
+        elif isinstance(e.error, SQLAlchemyError):
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        else:
+            raise e.error
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Hubo un error en la carga de los archivos CSV a la base de datos: {e}"
+            status_code=status_code,
+            detail=f"Hubo un error en la carga del archivo CSV a la base de datos: {e}. "
+                   f"Filas confirmadas antes del error: {e.summary.get('inserted', 0)}"
         )
+    return {"response": "Carga exitosa", "tables": {model.__tablename__: summary}}
@@ -0,0 +1,38 @@
+from fastapi import APIRouter
+
+from src.extras.database import engine, async_engine
+from src.extras.reference import REFERENCE_CACHES
+from src.extras.reporting import report_cache
+
+router = APIRouter(
+    prefix='/health'
+)
+
+
+@router.get('/pool')
+def get_pool_stats() -> dict:
+    """
+    Expone el estado del pool de conexiones: conexiones en uso, overflow y el
+    histograma de tiempos de espera por una conexion.
+
+    Returns:
+        dict: Estadisticas del pool sincrono y, si esta activo, las del pool async.
+    """
+    stats = {'sync': engine.pool.stats()}
+    if async_engine is not None:
+        stats['async'] = async_engine.sync_engine.pool.stats()
+    return stats
+
+
+@router.get('/cache')
+def get_cache_stats() -> dict:
+    """
+    Expone los contadores de las caches en memoria de este proceso: aciertos, fallos,
+    expulsiones por tamaño, expiraciones por TTL e invalidaciones.
+
+    Returns:
+        dict: Estadisticas de la cache de cada tabla de referencia y de la cache de reportes.
+    """
+    stats = {model.__tablename__: cache.stats() for model, cache in REFERENCE_CACHES.items()}
+    stats['reports'] = report_cache.stats()
+    return stats
@@ -1,29 +1,100 @@
-from fastapi import Response, status, HTTPException, Depends, APIRouter
+from fastapi import Response, status, HTTPException, Depends, APIRouter, Query, Body
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import List, Dict, Literal, Optional
 
 from src.extras import models
 from src.extras.database import get_db
 from src.extras import schemas
+from src.extras.constants import MAX_PAGE_SIZE, BATCH_MAX_ITEMS
+from src.extras.crud import batch_create, batch_update, batch_delete, update_row, delete_row
+from src.extras.pagination import list_table
+from src.extras.reference import jobs_cache
+from src.extras.http_cache import conditional_get
 
 router = APIRouter(
     prefix='/jobs'
 )
 
 
-@router.get('/', response_model=List[schemas.JobsResponse])
-def get_jobs(db: Session = Depends(get_db)) -> List[Dict]:
+@router.get('/', response_model=List[schemas.JobsResponse],
+            dependencies=[Depends(conditional_get(models.Jobs))])
+def get_jobs(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    format: Literal['json', 'ndjson', 'arrow', 'parquet'] = 'json',
+    db: Session = Depends(get_db)
+) -> List[Dict]:
     """
-    Obtiene todos los trabajos de la base de datos.
+    Obtiene los trabajos de la base de datos.
 
     Args:
+        response (Response): Respuesta donde se agrega el cursor de la siguiente pagina.
+        after_id (int, opcional): Cursor de paginacion; devuelve los trabajos con `id` mayor a este valor.
+        limit (int, opcional): Tamaño de pagina. Si no se entrega ni `after_id` ni `limit` se devuelve la tabla completa.
+        format (str): 'json' devuelve una lista; 'ndjson' exporta la tabla en streaming, una fila por linea;
+            'arrow' (Arrow IPC) y 'parquet' la exportan en streaming en formato columnar.
         db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
 
     Returns:
-        List[schemas.JobsResponse]: Lista de trabajos obtenidos de la base de datos.
+        List[schemas.JobsResponse]: Lista de trabajos obtenidos de la base de datos. En modo
+        paginado el header `X-Next-After-Id` indica el cursor de la siguiente pagina.
     """
-    jobs = db.query(models.Jobs).all()
-    return jobs
+    return list_table(db, models.Jobs, schemas.JobsResponse, response, after_id, limit, format,
+                      jobs_cache.all)
+
+
+# Las rutas /batch se declaran antes de /{id} para que "batch" no se interprete como un ID
+@router.post('/batch', response_model=schemas.BatchResponse)
+def create_jobs_batch(
+    jobs: List[schemas.BaseJobs] = Body(..., min_length=1, max_length=BATCH_MAX_ITEMS),
+    db: Session = Depends(get_db)
+) -> Dict:
+    """
+    Crea varios trabajos en una sola transaccion con un unico INSERT multi-fila.
+    Los IDs que ya existen no se modifican.
+
+    Args:
+        jobs (List[schemas.BaseJobs]): Trabajos a crear, como maximo `BATCH_MAX_ITEMS`.
+        db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
+
+    Returns:
+        schemas.BatchResponse: Estado de cada elemento ('created', 'exists' o 'duplicate') y conteo por estado.
+    """
+    return batch_create(db, models.Jobs, [job.model_dump() for job in jobs])
+
+
+@router.put('/batch', response_model=schemas.BatchResponse)
+def update_jobs_batch(
+    jobs: List[schemas.BaseJobs] = Body(..., min_length=1, max_length=BATCH_MAX_ITEMS),
+    db: Session = Depends(get_db)
+) -> Dict:
+    """
+    Actualiza varios trabajos, identificados por su ID, en una sola transaccion con un unico UPDATE.
+
+    Args:
+        jobs (List[schemas.BaseJobs]): Nuevos datos de cada elemento, como maximo `BATCH_MAX_ITEMS`.
+        db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
+
+    Returns:
+        schemas.BatchResponse: Estado de cada elemento ('updated', 'not_found' o 'duplicate') y conteo por estado.
+    """
+    return batch_update(db, models.Jobs, [job.model_dump() for job in jobs])
+
+
+@router.delete('/batch', response_model=schemas.BatchResponse)
+def delete_jobs_batch(batch: schemas.BatchDelete, db: Session = Depends(get_db)) -> Dict:
+    """
+    Elimina varios trabajos en una sola transaccion con un unico DELETE.
+
+    Args:
+        batch (schemas.BatchDelete): IDs a eliminar, como maximo `BATCH_MAX_ITEMS`.
+        db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
+
+    Returns:
+        schemas.BatchResponse: Estado de cada elemento ('deleted', 'not_found' o 'duplicate') y conteo por estado.
+    """
+    return batch_delete(db, models.Jobs, batch.ids)
 
 
 @router.post('/', status_code=status.HTTP_201_CREATED, response_model=schemas.JobsResponse)
@@ -41,11 +112,13 @@ def create_job(job: schemas.BaseJobs, db: Session = Depends(get_db)) -> schemas.
     new_job = models.Jobs(**job.model_dump())
     db.add(new_job)
     db.commit()
+    jobs_cache.invalidate(new_job.id)
     db.refresh(new_job)
     return new_job
 
 
-@router.get('/{id}', response_model=schemas.JobsResponse)
+@router.get('/{id}', response_model=schemas.JobsResponse,
+            dependencies=[Depends(conditional_get(models.Jobs))])
 def get_job(id: int, db: Session = Depends(get_db)) -> schemas.JobsResponse:
     """
     Obtiene un trabajo específico de la base de datos mediante su ID.
@@ -57,7 +130,7 @@ def get_job(id: int, db: Session = Depends(get_db)) -> schemas.JobsResponse:
     Returns:
         schemas.JobsResponse: Información del trabajo.
     """
-    job = db.query(models.Jobs).filter(models.Jobs.id == id).first()
+    job = jobs_cache.get(db, id)
 
     if not job:
         raise HTTPException(
@@ -78,15 +151,13 @@ def del_job(id: int, db: Session = Depends(get_db)):
     Returns:
         Response: Respuesta con código de estado 204 (No Content) si la eliminación fue exitosa.
     """
-    job = db.query(models.Jobs).filter(models.Jobs.id == id)
-
-    if not job.first():
+    if not delete_row(db, models.Jobs, id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f'job con el id: {id}, no se encontro'
         )
 
-    job.delete(synchronize_session=False)
     db.commit()
+    jobs_cache.invalidate(id)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -104,14 +175,14 @@ def update_job(id: int, job: schemas.BaseJobs, db: Session = Depends(get_db)) ->
     Returns:
         schemas.JobsResponse: Información del trabajo actualizado.
     """
-    job_query = db.query(models.Jobs).filter(models.Jobs.id == id)
+    updated = update_row(db, models.Jobs, id, job.model_dump())
 
-    if not job_query.first():
+    if updated is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f'job con el id: {id}, no se encontro'
         )
 
-    job_query.update(job.model_dump(), synchronize_session=False)
     db.commit()
+    jobs_cache.invalidate(id, job.id)
 
-    return job_query.first()
+    return updated
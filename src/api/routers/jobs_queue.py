@@ -0,0 +1,66 @@
+from typing import Dict, Optional
+from fastapi import status, HTTPException, APIRouter
+
+# Los modulos de cada tipo de trabajo registran su handler al importarse
+from src.extras import backup_jobs, ingest  # noqa: F401
+from src.extras.constants import JOB_QUEUE_HEARTBEAT
+from src.extras.job_queue import QueueFull, QueuedJob, scheduler
+
+router = APIRouter(
+    prefix='/jobs-queue'
+)
+
+
+def submit_job(kind: str, params: Dict, priority: Optional[int] = None) -> QueuedJob:
+    """
+    Encola un trabajo en segundo plano, respondiendo 503 si la cola esta llena.
+
+    Args:
+        kind (str): Tipo de trabajo: 'load', 'backup' o 'restore'.
+        params (Dict): Parametros del trabajo.
+        priority (int, opcional): Prioridad en la cola. Por defecto la de `JOB_QUEUE_KINDS`.
+
+    Returns:
+        QueuedJob: Trabajo encolado.
+    """
+    try:
+        return scheduler.submit(kind, params, priority=priority)
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"No se pudo encolar el trabajo: {e}",
+            headers={'Retry-After': str(JOB_QUEUE_HEARTBEAT)}
+        )
+
+
+@router.get('')
+def get_queue_stats() -> dict:
+    """
+    Expone el estado de la cola de trabajos de este worker: trabajos en espera y en
+    curso por tipo y sus limites de concurrencia.
+
+    Returns:
+        dict: Estadisticas de la cola.
+    """
+    return scheduler.stats()
+
+
+@router.get('/{id}')
+def get_queued_job(id: str) -> dict:
+    """
+    Obtiene el estado, el avance y el resultado o error de un trabajo en segundo plano.
+
+    Args:
+        id (str): ID devuelto por `POST /csv`, `POST /backups` o `POST /restore`.
+
+    Returns:
+        dict: Estado del trabajo (`queued`, `running`, `done` o `failed`), intentos,
+        avance, resultado y mensaje de error.
+    """
+    job = scheduler.get(id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Trabajo con el id: {id}, no se encontro'
+        )
+    return job
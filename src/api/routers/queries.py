@@ -1,66 +1,94 @@
-from fastapi import Response, status, HTTPException, Depends, APIRouter
+from fastapi import Response, status, HTTPException, Depends, APIRouter, Query
 from sqlalchemy.orm import Session
-from typing import List, Dict
-from sqlalchemy.sql import text
+from typing import List, Dict, Literal, Optional, Type
+from pydantic import BaseModel
 
 from src.extras import models
 from src.extras.database import get_db
 from src.extras import schemas
-from src.sql.queries import QUARTERS, AVG_HIRED
+from src.extras.reporting import (
+    quarters_report, above_average_report, hires_report,
+    QUARTERS_TABLES, AVG_HIRED_TABLES, HIRES_TABLES
+)
+from src.extras.http_cache import conditional_get
+from src.extras.columnar import records_response
+from src.extras.responses import json_rows
 
 router = APIRouter(
     prefix='/queries'
 )
 
 
-@router.get('/quarters', response_model=List[schemas.QuartersResponse])
-def get_quarters(db: Session = Depends(get_db)) -> List[Dict]:
+def _respond(rows: List[Dict], schema: Type[BaseModel], format: str, exclude_none: bool = False):
+    # Las respuestas pre-serializadas (JSON con orjson o columnares) omiten la validacion del response_model
+    return json_rows(rows, schema, exclude_none) if format == 'json' else records_response(rows, format)
+
+
+@router.get('/quarters', response_model=List[schemas.QuartersResponse],
+            dependencies=[Depends(conditional_get(*QUARTERS_TABLES))])
+def get_quarters(format: Literal['json', 'arrow', 'parquet'] = 'json',
+                 db: Session = Depends(get_db)) -> List[Dict]:
     """
-    Obtiene el número de empleados contratados por cuarto
+    Obtiene el número de empleados contratados por cuarto en 2021, a partir del
+    resumen precalculado `HiresSummary`.
 
     Args:
+        format (str): 'json', o 'arrow' (Arrow IPC) / 'parquet' para consumidores analiticos.
         db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
 
     Returns:
-        List[schemas.QuartersResponse]: Lista con los resultados de la query `QUARTERS`.
+        List[schemas.QuartersResponse]: Contrataciones por departamento y trabajo en cada cuarto.
 
     """
+    return _respond(quarters_report(db, year=2021), schemas.QuartersResponse, format)
 
-    quarters = db.execute(text(QUARTERS)).fetchall()
-    result = []
-    for row in quarters:
-        result.append({
-            'department': row[0],
-            'job': row[1],
-            'Q1': row[2],
-            'Q2': row[3],
-            'Q3': row[4],
-            'Q4': row[5],
-        })
 
-    return result
-
-
-@router.get('/avg_hired', response_model=List[schemas.AvgResponse])
-def get_departments_above_average(db: Session = Depends(get_db)) -> List[Dict]:
+@router.get('/avg_hired', response_model=List[schemas.AvgResponse],
+            dependencies=[Depends(conditional_get(*AVG_HIRED_TABLES))])
+def get_departments_above_average(format: Literal['json', 'arrow', 'parquet'] = 'json',
+                                  db: Session = Depends(get_db)) -> List[Dict]:
     """
-    Obtiene todos los departamentos que contrataron más empleados que la media de empleados contratados en 2021.
+    Obtiene todos los departamentos que contrataron más empleados que la media de empleados contratados en 2021,
+    a partir del resumen precalculado `HiresSummary`.
 
     Args:
+        format (str): 'json', o 'arrow' (Arrow IPC) / 'parquet' para consumidores analiticos.
         db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
 
     Returns:
         List[schemas.DepartmentResponse]: Lista con los departamentos que contrataron más empleados que la media en 2021.
     """
+    return _respond(above_average_report(db, year=2021), schemas.AvgResponse, format)
+
+
+@router.get('/hires', response_model=List[schemas.HiresResponse], response_model_exclude_none=True,
+            dependencies=[Depends(conditional_get(*HIRES_TABLES))])
+def get_hires(
+    start_year: int = Query(2021, ge=1),
+    end_year: Optional[int] = Query(None, ge=1),
+    granularity: Literal['month', 'quarter', 'year'] = 'quarter',
+    group_by: List[Literal['department', 'job']] = Query([]),
+    format: Literal['json', 'arrow', 'parquet'] = 'json',
+    db: Session = Depends(get_db)
+) -> List[Dict]:
+    """
+    Obtiene el número de empleados contratados por periodo entre dos años, opcionalmente
+    agrupado por departamento y/o trabajo. Las respuestas se guardan en cache hasta que
+    se modifica `Employees`.
 
-    departments = db.execute(text(AVG_HIRED)).fetchall()
-
-    result = []
-    for row in departments:
-        result.append({
-            'id': row[0],
-            'department': row[1],
-            'hired_count': row[2],
-        })
+    Args:
+        start_year (int): Primer año del reporte.
+        end_year (int, opcional): Último año del reporte (incluido). Por defecto `start_year`.
+        granularity (str): 'month', 'quarter' o 'year'.
+        group_by (List[str]): Dimensiones 'department' y/o 'job' (se puede repetir el parámetro).
+        format (str): 'json', o 'arrow' (Arrow IPC) / 'parquet' para consumidores analiticos.
+        db (Session): Sesión de la base de datos proporcionada mediante la dependencia `Depends(get_db)`.
 
-    return result
+    Returns:
+        List[schemas.HiresResponse]: Contrataciones por periodo y dimensión.
+    """
+    try:
+        return _respond(hires_report(db, start_year, end_year, granularity, group_by),
+                        schemas.HiresResponse, format, exclude_none=True)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -1,101 +1,379 @@
 import os
+from itertools import islice
+import avro.codecs
+import avro.errors
 import avro.schema
 import avro.datafile
 import avro.io
 from sqlalchemy.orm import Session
-from sqlalchemy import inspect
+from sqlalchemy import DateTime, inspect
+from sqlalchemy.exc import DataError, IntegrityError
 from fastapi import Depends
-from typing import Type
+from typing import AbstractSet, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+from src.extras import models
 from src.extras.database import get_db
+from src.extras.bulk import get_bulk_loader
+from src.extras.columnar import ParquetRows
+from src.extras.reporting import existing_employees, remove_hires, track_employee_load
+from src.extras.dedup import IdIndex
+from src.extras.utils import get_existing_ids, validate_rows
+from src.extras.validation import ValidationReport
+from src.extras.constants import BACKUP_CODEC, BACKUP_SYNC_INTERVAL, STREAM_BATCH_SIZE
+from .logger import custom_logger
 import json
+from datetime import datetime, timezone
 
+logger = custom_logger()
 
-def map_column_type(column_type) -> str:
+
+def map_column_type(column_type, nullable: bool = False):
     """
     Mapea el tipo de columna de SQLAlchemy a un tipo Avro compatible.
 
     Args:
         column_type: Tipo de columna de SQLAlchemy.
+        nullable (bool, opcional): Si la columna acepta nulos, el tipo se une con "null".
     Returns:
-        str: Tipo Avro correspondiente.
+        str | dict | list: Tipo Avro correspondiente.
     """
 
     if "INTEGER" == str(column_type):
-        return "int"
+        avro_type = "int"
     elif "VARCHAR" == str(column_type):
-        return "string"
+        avro_type = "string"
+    elif "DATETIME" == str(column_type) or "TIMESTAMP" in str(column_type):
+        avro_type = {"type": "long", "logicalType": "timestamp-micros"}
+    else:
+        avro_type = None
+
+    if nullable:
+        return ["null", avro_type]
+    return avro_type
 
 
-def backup_table_to_avro(model: Type, output_dir: str, db: Session = Depends(get_db)):
+def to_avro_value(value):
     """
-    Realiza un respaldo de una tabla en formato Avro.
+    Adapta un valor de la base de datos al tipo que espera el escritor Avro.
 
     Args:
-        table_model (Type): Modelo SQLAlchemy de la tabla.
-        output_dir (str): Directorio donde se guardará el archivo Avro.
-        db (Session): Sesión de la base de datos.
+        value: Valor leido de la base de datos.
+    Returns:
+        Valor compatible con Avro (las fechas sin zona horaria se asumen en UTC).
+    """
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class _BlockWriter(avro.datafile.DataFileWriter):
+    """
+    `DataFileWriter` con un intervalo de sincronizacion configurable: cierra y comprime un
+    bloque cuando el buffer sin comprimir supera `sync_interval` bytes, en lugar del
+    valor fijo del modulo `avro.datafile`. Registra la posicion, el tamaño y las filas de
+    cada bloque escrito en `blocks`.
     """
-    # Crear directorio si no existe
-    os.makedirs(output_dir, exist_ok=True)
 
-    # Obtener datos de la tabla
-    table_name = model.__tablename__
-    records = db.query(model).all()
+    def __init__(self, writer, datum_writer, writers_schema, codec: str, sync_interval: int):
+        super().__init__(writer, datum_writer, writers_schema, codec)
+        self.sync_interval = sync_interval
+        self.blocks: List[Dict[str, int]] = []
+
+    def append(self, datum: object) -> None:
+        self.datum_writer.write(datum, self.buffer_encoder)
+        self.block_count += 1
+        if self.buffer_writer.tell() >= self.sync_interval:
+            self._write_block()
+
+    def _write_block(self) -> None:
+        rows, offset = self.block_count, self.writer.tell()
+        super()._write_block()
+        if rows:
+            self.blocks.append(
+                {'offset': offset, 'bytes': self.writer.tell() - offset, 'rows': rows})
+
+
+def check_codec(codec: str) -> str:
+    """
+    Valida que el codec Avro exista y que sus dependencias esten instaladas.
+
+    Args:
+        codec (str): 'null', 'deflate' o 'snappy'.
+
+    Returns:
+        str: El mismo codec si esta disponible.
+    """
+    try:
+        avro.codecs.get_codec(codec)
+    except avro.errors.UnsupportedCodec as e:
+        raise ValueError(
+            f"Codec Avro no disponible: {codec} (snappy requiere python-snappy)") from e
+    return codec
 
-    # Crear el esquema Avro dinámicamente
-    # inspector = inspect(model)
-    # print("#"*100)
-    # print(inspector.type)
-    schema_fields = [
-        {"name": column.name, "type": map_column_type(column.type)}
-        for column in model.__table__.columns
-    ]
 
-    avro_schema = {
+def avro_schema_for(model: Type) -> dict:
+    """
+    Construye el esquema Avro de un modelo a partir de sus columnas.
+
+    Args:
+        model (Type): Modelo SQLAlchemy de la tabla.
+
+    Returns:
+        dict: Esquema Avro de tipo record.
+    """
+    return {
         "type": "record",
-        "name": f"{table_name}_backup",
-        "fields": schema_fields,
+        "name": f"{model.__tablename__}_backup",
+        "fields": [
+            {"name": column.name, "type": map_column_type(column.type, column.nullable)}
+            for column in model.__table__.columns
+        ],
     }
-    avro_schema_json = json.dumps(avro_schema)
-    # Escribir datos en archivo Avro
-    output_file = os.path.join(output_dir, f"{table_name}.avro")
-    with open(output_file, "wb") as avro_file:
-        writer = avro.datafile.DataFileWriter(
-            avro_file, avro.io.DatumWriter(), avro.schema.parse(avro_schema_json)
-        )
-        for record in records:
-            writer.append({column.name: getattr(record, column.name)
-                          for column in model.__table__.columns})
-        writer.close()
 
-    print(f"Backup de la tabla '{table_name}' guardado en {output_file}")
 
+def table_rows(db: Session, model: Type, batch_size: int = STREAM_BATCH_SIZE):
+    """
+    Lee las filas de la tabla como tuplas, ordenadas por llave primaria, desde un cursor
+    del servidor en lotes de `batch_size`.
+
+    Args:
+        db (Session): Sesión de la base de datos.
+        model (Type): Modelo SQLAlchemy de la tabla.
+        batch_size (int, opcional): Filas que se traen del cursor en cada viaje.
+
+    Returns:
+        Query: Consulta iterable con una tupla por fila, en el orden de las columnas del modelo.
+    """
+    return db.query(*model.__table__.columns) \
+        .order_by(*model.__table__.primary_key.columns) \
+        .execution_options(stream_results=True) \
+        .yield_per(batch_size)
+
+
+def write_avro_rows(model: Type, output_file: str, rows: Iterable[tuple],
+                    codec: str = BACKUP_CODEC, sync_interval: int = BACKUP_SYNC_INTERVAL,
+                    progress: Optional[Callable[[int, int], None]] = None,
+                    progress_every: int = STREAM_BATCH_SIZE,
+                    parquet_file: Optional[str] = None) -> Dict:
+    """
+    Escribe filas (tuplas en el orden de las columnas del modelo) en un archivo Avro con
+    bloques comprimidos y, opcionalmente, las mismas filas en un archivo Parquet.
+
+    Args:
+        model (Type): Modelo SQLAlchemy de la tabla.
+        output_file (str): Ruta del archivo Avro.
+        rows (Iterable[tuple]): Filas a escribir.
+        codec (str, opcional): Codec de compresion de los bloques ('null', 'deflate' o 'snappy').
+        sync_interval (int, opcional): Bytes sin comprimir por bloque.
+        progress (Callable[[int, int], None], opcional): Se llama cada `progress_every` filas
+            y al terminar con las filas y los bytes escritos hasta el momento.
+        progress_every (int, opcional): Filas entre llamadas a `progress`.
+        parquet_file (str, opcional): Ruta del archivo Parquet que se escribe en la misma pasada.
+
+    Returns:
+        Dict: `rows` escritas, `bytes` del archivo y `blocks` con `offset`, `bytes` y `rows`
+        de cada bloque; con `parquet_file`, tambien `parquet_bytes`.
+    """
+    check_codec(codec)
+    parquet = None
+    if parquet_file is not None:
+        parquet = ParquetRows(model, parquet_file, progress_every)
+        rows = parquet.tee(rows)
+    columns = list(model.__table__.columns)
+    names = [column.name for column in columns]
+    # Solo las columnas de fecha necesitan conversion antes de escribirse
+    datetime_indexes = [index for index, column in enumerate(columns)
+                        if isinstance(column.type, DateTime)]
+
+    count = 0
+    try:
+        with open(output_file, "wb") as avro_file:
+            writer = _BlockWriter(
+                avro_file, avro.io.DatumWriter(),
+                avro.schema.parse(json.dumps(avro_schema_for(model))),
+                codec, sync_interval)
+            for row in rows:
+                if datetime_indexes:
+                    row = list(row)
+                    for index in datetime_indexes:
+                        row[index] = to_avro_value(row[index])
+                writer.append(dict(zip(names, row)))
+                count += 1
+                if progress is not None and count % progress_every == 0:
+                    progress(count, avro_file.tell())
+            writer.close()
+    finally:
+        if parquet is not None:
+            parquet.close()
+
+    size = os.path.getsize(output_file)
+    if progress is not None:
+        progress(count, size)
+    result = {'rows': count, 'bytes': size, 'blocks': writer.blocks}
+    if parquet_file is not None:
+        result['parquet_bytes'] = os.path.getsize(parquet_file)
+    return result
 
-def restore_table_from_avro(model, avro_file_path) -> list[dict]:
+
+def check_avro_schema(model: Type, schema: avro.schema.Schema) -> None:
     """
-    Restaura datos de un archivo Avro a una tabla de la base de datos.
+    Valida el esquema del encabezado de un archivo Avro contra las columnas del modelo:
+    todos los campos deben existir en la tabla y las columnas obligatorias deben estar
+    en el archivo.
 
     Args:
-        model: Modelo SQLAlchemy de la tabla.
+        model (Type): Modelo SQLAlchemy de la tabla.
+        schema (avro.schema.Schema): Esquema del escritor, leido del encabezado.
+    """
+    fields = {field.name for field in getattr(schema, 'fields', [])}
+    columns = inspect(model).columns
+    unknown = fields - {column.name for column in columns}
+    missing = {column.name for column in columns
+               if not column.nullable and column.name not in fields}
+    if unknown or missing:
+        raise ValueError(
+            "Los campos del archivo Avro no coinciden con los de la tabla "
+            f"{model.__tablename__}. Sobrantes: {sorted(unknown)}; faltantes: {sorted(missing)}")
+
+
+def iter_avro_records(model: Type, avro_file_path: str,
+                      batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Tuple[List[Dict], int]]:
+    """
+    Lee un archivo Avro por lotes. El lector descomprime un bloque a la vez y el esquema
+    se valida una sola vez desde el encabezado, por lo que un archivo vacio es valido.
+
+    Args:
+        model (Type): Modelo SQLAlchemy de la tabla.
         avro_file_path (str): Ruta al archivo Avro.
-        db: Sesión de la base de datos.
+        batch_size (int, opcional): Registros por lote.
+
+    Yields:
+        Tuple[List[Dict], int]: Lote de registros y bytes del archivo leidos hasta el momento.
     """
-    # Verificar que el archivo existe
     if not os.path.exists(avro_file_path):
         raise FileNotFoundError(f"El archivo Avro no existe: {avro_file_path}")
 
-    # Leer los datos del archivo Avro
     with open(avro_file_path, "rb") as avro_file:
         reader = avro.datafile.DataFileReader(avro_file, avro.io.DatumReader())
-        records = list(reader)
-        reader.close()
+        try:
+            check_avro_schema(model, reader.datum_reader.writers_schema)
+            while True:
+                batch = list(islice(reader, batch_size))
+                if not batch:
+                    return
+                yield batch, avro_file.tell()
+        finally:
+            reader.close()
 
-    # Obtener nombres de columnas de la tabla
-    inspector = inspect(model)
-    table_columns = {column.name for column in inspector.columns}
 
-    # Validar que los campos del archivo Avro coincidan con los de la tabla
-    if not all(field in table_columns for field in records[0].keys()):
-        raise ValueError(
-            "Los campos del archivo Avro no coinciden con los de la tabla.")
-    return records
+def _load_isolated(db: Session, loader, model: Type, rows: List[Dict],
+                   on_conflict: Optional[str]) -> Tuple[int, List[Dict]]:
+    # Carga el lote en un savepoint; si falla se divide en mitades hasta aislar las filas
+    # que la base de datos rechaza, sin perder el resto del lote. Solo se aislan los
+    # rechazos por datos; una conexion caida o un bloqueo no es culpa de las filas
+    try:
+        with db.begin_nested():
+            if model is models.Employees:
+                track_employee_load(db, rows, on_conflict)
+            loader.load(model, rows, on_conflict=on_conflict)
+        return len(rows), []
+    except (IntegrityError, DataError) as e:
+        if len(rows) == 1:
+            logger.error(f"Fila rechazada en la tabla {model.__tablename__} "
+                         f"(id {rows[0].get('id')}): {e.orig}")
+            return 0, rows
+    middle = len(rows) // 2
+    loaded, failed = _load_isolated(db, loader, model, rows[:middle], on_conflict)
+    loaded_rest, failed_rest = _load_isolated(db, loader, model, rows[middle:], on_conflict)
+    return loaded + loaded_rest, failed + failed_rest
+
+
+def restore_table(model: Type, avro_file_path: str, db: Session = Depends(get_db),
+                  progress: Optional[Callable[[int, int], None]] = None,
+                  on_conflict: Optional[str] = None,
+                  batch_size: int = STREAM_BATCH_SIZE,
+                  exclude: Optional[AbstractSet[int]] = None) -> Dict[str, int]:
+    """
+    Restaura una tabla desde su archivo Avro por lotes de `batch_size`: cada lote se lee,
+    se valida, se inserta con el backend de carga masiva y se confirma antes de leer el
+    siguiente. Las filas que la base de datos rechaza se aislan y se omiten sin deshacer
+    el resto. Sin `on_conflict` se omiten los IDs que ya existen; con 'update' se
+    sobrescriben, como al reproducir un respaldo incremental.
+
+    Args:
+        model (Type): Modelo SQLAlchemy de la tabla.
+        avro_file_path (str): Ruta al archivo Avro.
+        db (Session): Sesión de la base de datos.
+        progress (Callable[[int, int], None], opcional): Se llama despues de cada lote con las
+            filas leidas y los bytes del archivo leidos hasta el momento.
+        on_conflict (str, opcional): `None` o 'update'.
+        batch_size (int, opcional): Registros por lote y por transaccion.
+        exclude (AbstractSet[int], opcional): IDs que no se restauran, por ejemplo los
+            eliminados en un snapshot posterior.
+
+    Returns:
+        Dict[str, int]: `rows` leidas, `inserted` (filas escritas), `existing`, `excluded`,
+        `invalid`, `failed` (rechazadas por la base de datos) y `bytes` del archivo.
+    """
+    loader = get_bulk_loader(db)
+    index = IdIndex.for_table(model, db) if on_conflict is None else None
+    report = ValidationReport()
+    size = os.path.getsize(avro_file_path) if os.path.exists(avro_file_path) else 0
+    summary = {'rows': 0, 'inserted': 0, 'existing': 0, 'excluded': 0, 'invalid': 0,
+               'failed': 0, 'bytes': size}
+
+    for batch, position in iter_avro_records(model, avro_file_path, batch_size):
+        summary['rows'] += len(batch)
+        if exclude:
+            kept = [row for row in batch if int(row['id']) not in exclude]
+            summary['excluded'] += len(batch) - len(kept)
+            batch = kept
+        valid_rows = validate_rows(batch, model, report=report)
+        summary['invalid'] += len(batch) - len(valid_rows)
+        rows = valid_rows if index is None \
+            else get_existing_ids(valid_rows, model, db=db, index=index)
+        summary['existing'] += len(valid_rows) - len(rows)
+
+        if rows:
+            loaded, failed = _load_isolated(db, loader, model, rows, on_conflict)
+            db.commit()
+            if index is not None:
+                failed_ids = {row['id'] for row in failed}
+                index.add(int(row['id']) for row in rows if row['id'] not in failed_ids)
+            summary['inserted'] += loaded
+            summary['failed'] += len(failed)
+        if progress is not None:
+            progress(summary['rows'], position)
+
+    if report.invalid:
+        logger.error(
+            f"{report.invalid} filas invalidas en {avro_file_path}. Errores: {report.errors}")
+    if progress is not None:
+        progress(summary['rows'], size)
+    return summary
+
+
+def delete_table_rows(model: Type, ids: Iterable[int], db: Session = Depends(get_db),
+                      batch_size: int = STREAM_BATCH_SIZE) -> int:
+    """
+    Elimina filas por `id` en lotes, descontando del resumen de contrataciones los
+    empleados eliminados. No confirma la transaccion.
+
+    Args:
+        model (Type): Modelo SQLAlchemy de la tabla.
+        ids (Iterable[int]): IDs a eliminar.
+        db (Session): Sesión de la base de datos.
+        batch_size (int, opcional): IDs por sentencia `DELETE`.
+
+    Returns:
+        int: Numero de filas eliminadas.
+    """
+    table = model.__table__
+    deleted = 0
+    ids = iter(ids)
+    while True:
+        batch = list(islice(ids, batch_size))
+        if not batch:
+            return deleted
+        if model is models.Employees:
+            remove_hires(db, existing_employees(db, batch).values())
+        deleted += db.execute(table.delete().where(table.c.id.in_(batch))).rowcount
@@ -0,0 +1,329 @@
+"""
+Respaldo y restauracion como trabajos de la cola en segundo plano (`src.extras.job_queue`).
+Cada tabla se procesa en un hilo de `BACKUP_WORKERS` con su propia sesion (y conexion); el
+avance de cada tabla se consulta mientras el trabajo avanza, sin mantener abierta la
+peticion HTTP.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Type
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.extras.backup import delete_table_rows, restore_table
+from src.extras.database import local_session
+from src.extras.snapshots import Snapshot, read_tombstones, snapshot_chain, verify_table_file
+from src.extras.job_queue import QueuedJob, scheduler
+from src.extras.constants import (
+    BACKUP_DIR, BACKUP_PARQUET, BACKUP_SNAPSHOTS_DIR, BACKUP_WORKERS, MODELS
+)
+from .logger import custom_logger
+
+logger = custom_logger()
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+_executor = ThreadPoolExecutor(max_workers=BACKUP_WORKERS, thread_name_prefix='backup')
+_entries = {entry['model'].__tablename__: entry for entry in MODELS}
+
+
+class TableProgress:
+    """
+    Estado y avance de una tabla dentro de un trabajo.
+    """
+
+    def __init__(self, table: str):
+        self.table = table
+        self.status = PENDING
+        self.rows = 0
+        self.bytes = 0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.error: Optional[str] = None
+        self.result: Dict = {}
+
+    def update(self, rows: int, bytes: int) -> None:
+        self.rows, self.bytes = rows, bytes
+
+    def as_dict(self) -> Dict:
+        elapsed = None
+        if self.started is not None:
+            elapsed = (self.finished or time.monotonic()) - self.started
+        return {
+            'status': self.status,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'elapsed_seconds': elapsed,
+            'rows_per_second': self.rows / elapsed if elapsed else None,
+            'bytes_per_second': self.bytes / elapsed if elapsed else None,
+            'error': self.error,
+            **self.result,
+        }
+
+
+class BackupJob:
+    """
+    Trabajo de respaldo o restauracion de varias tablas.
+    """
+
+    def __init__(self, kind: str, tables: List[str], id: Optional[str] = None):
+        self.id = id or uuid.uuid4().hex
+        self.kind = kind
+        self.created_at = time.time()
+        self.tables = {table: TableProgress(table) for table in tables}
+        self.snapshot: Optional[str] = None
+        self.lock = threading.Lock()
+
+    @property
+    def status(self) -> str:
+        statuses = {progress.status for progress in self.tables.values()}
+        if statuses <= {PENDING}:
+            return PENDING
+        if statuses & {PENDING, RUNNING}:
+            return RUNNING
+        return FAILED if statuses & {FAILED, SKIPPED} else DONE
+
+    def as_dict(self) -> Dict:
+        with self.lock:
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'created_at': self.created_at,
+                'snapshot': self.snapshot,
+                'tables': {table: progress.as_dict() for table, progress in self.tables.items()},
+            }
+
+
+def dependency_levels(models: List[Type]) -> List[List[Type]]:
+    """
+    Agrupa los modelos por nivel de dependencia segun sus llaves foraneas: el nivel 0 no
+    referencia a ninguna otra tabla del grupo y cada nivel solo referencia a niveles
+    anteriores. Las tablas de un mismo nivel se pueden restaurar en paralelo.
+
+    Args:
+        models (List[Type]): Modelos SQLAlchemy.
+
+    Returns:
+        List[List[Type]]: Modelos por nivel, en orden de restauracion.
+    """
+    by_table = {model.__table__: model for model in models}
+    levels: Dict = {}
+    for table in models[0].metadata.sorted_tables if models else []:
+        if table in by_table:
+            parents = [levels[fk.column.table] for fk in table.foreign_keys
+                       if fk.column.table in levels and fk.column.table is not table]
+            levels[table] = max(parents, default=-1) + 1
+
+    grouped: List[List[Type]] = [[] for _ in range(max(levels.values(), default=-1) + 1)]
+    for table, level in levels.items():
+        grouped[level].append(by_table[table])
+    return grouped
+
+
+def _run_table(job: BackupJob, model: Type, task: Callable[[Session, Type, Callable], Dict],
+               setup: Optional[Callable[[Session], None]]) -> bool:
+    progress = job.tables[model.__tablename__]
+    with job.lock:
+        progress.status, progress.started = RUNNING, time.monotonic()
+
+    def report(rows: int, bytes: int) -> None:
+        with job.lock:
+            progress.update(rows, bytes)
+
+    db = local_session()
+    try:
+        if setup is not None:
+            setup(db)
+        result = task(db, model, report)
+        with job.lock:
+            progress.status, progress.result = DONE, result
+        return True
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error en el trabajo {job.id} ({job.kind}) sobre {model.__tablename__}: {e}")
+        with job.lock:
+            progress.status, progress.error = FAILED, str(e)
+        return False
+    finally:
+        with job.lock:
+            progress.finished = time.monotonic()
+        db.close()
+
+
+def _run_levels(job: BackupJob, levels: List[List[Type]], task, setup=None) -> None:
+    for index, level in enumerate(levels):
+        futures = [_executor.submit(_run_table, job, model, task, setup) for model in level]
+        wait(futures)
+        if not all(future.result() for future in futures):
+            # Las tablas que dependen de una tabla fallida no se restauran
+            with job.lock:
+                for later in levels[index + 1:]:
+                    for model in later:
+                        job.tables[model.__tablename__].status = SKIPPED
+            return
+
+
+def _backup(job: BackupJob, models: List[Type], root: str, full: bool, parquet: bool) -> None:
+    snapshot = Snapshot(root, full, parquet)
+    with job.lock:
+        job.snapshot = snapshot.id
+
+    def task(db: Session, model: Type, report: Callable) -> Dict:
+        return snapshot.table(db, model, progress=report)
+
+    coordinator = local_session()
+    try:
+        setup = None
+        if coordinator.get_bind().dialect.name == 'postgresql':
+            # Todas las tablas se leen desde la misma foto de la base de datos (como pg_dump -j)
+            coordinator.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+            exported = coordinator.execute(text("SELECT pg_export_snapshot()")).scalar()
+
+            def setup(db: Session) -> None:
+                db.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+                db.execute(text("SET TRANSACTION SNAPSHOT :snapshot"), {'snapshot': exported})
+
+        _run_levels(job, [models], task, setup)
+    finally:
+        coordinator.close()
+
+    # Un snapshot incompleto no puede servir de base al siguiente
+    if job.status == DONE:
+        snapshot.commit()
+    else:
+        snapshot.abort()
+
+
+def _restore_chain(db: Session, model: Type, chain: List, report: Callable,
+                   overwrite: bool = False) -> Dict:
+    name = model.__tablename__
+    totals = {'rows': 0, 'inserted': 0, 'failed': 0, 'deleted': 0, 'bytes': 0, 'snapshots': 0}
+    entries = [(snapshot_dir, manifest['tables'][name])
+               for snapshot_dir, manifest in chain if name in manifest['tables']]
+    # Con `overwrite` se reproduce la cadena en orden, sobrescribiendo y aplicando las
+    # eliminaciones. Sin el, solo se insertan los IDs que faltan: la cadena se recorre del
+    # snapshot mas reciente al mas antiguo, omitiendo los IDs que ya existen y los que un
+    # snapshot posterior elimino, sin tocar las filas actuales.
+    deleted_later = set()
+    for snapshot_dir, table in (entries if overwrite else reversed(entries)):
+        path = verify_table_file(snapshot_dir, table)
+        tombstones = os.path.join(snapshot_dir, f'{name}.tombstones')
+        if overwrite:
+            result = restore_table(model, path, db=db, on_conflict='update')
+            totals['deleted'] += delete_table_rows(model, read_tombstones(tombstones), db=db)
+            db.commit()
+        else:
+            result = restore_table(model, path, db=db, exclude=deleted_later)
+            deleted_later.update(read_tombstones(tombstones))
+        totals['rows'] += result['rows']
+        totals['inserted'] += result['inserted']
+        totals['failed'] += result['failed']
+        totals['bytes'] += result['bytes']
+        totals['snapshots'] += 1
+        report(totals['rows'], totals['bytes'])
+    return totals
+
+
+def _restore_base(db: Session, model: Type, report: Callable, overwrite: bool = False) -> Dict:
+    # Los archivos de `backup_path` equivalen a un snapshot completo sin incrementales
+    path = _entries[model.__tablename__]['backup_path']
+    if not os.path.exists(path):
+        raise ValueError(f"No hay snapshots ni respaldo base para {model.__tablename__} en {path}")
+    result = restore_table(model, path, db=db, progress=report,
+                           on_conflict='update' if overwrite else None)
+    return {'rows': result['rows'], 'inserted': result['inserted'], 'failed': result['failed'],
+            'deleted': 0, 'bytes': result['bytes'], 'snapshots': 1}
+
+
+def _restore(job: BackupJob, models: List[Type], root: str, overwrite: bool) -> None:
+    chain = snapshot_chain(root)
+    if chain:
+        with job.lock:
+            job.snapshot = chain[-1][1]['id']
+
+        def task(db: Session, model: Type, report: Callable) -> Dict:
+            return _restore_chain(db, model, chain, report, overwrite)
+    else:
+        # Sin snapshots se parte de los respaldos completos de `BACKUP_DIR`
+        with job.lock:
+            job.snapshot = BACKUP_DIR
+
+        def task(db: Session, model: Type, report: Callable) -> Dict:
+            return _restore_base(db, model, report, overwrite)
+
+    _run_levels(job, dependency_levels(models), task)
+
+
+def _run(job: BackupJob, target: Callable, *args) -> Dict:
+    try:
+        target(job, *args)
+    except Exception as e:
+        with job.lock:
+            for progress in job.tables.values():
+                if progress.status in (PENDING, RUNNING):
+                    progress.status, progress.error = FAILED, str(e)
+        raise
+    result = job.as_dict()
+    if result['status'] != DONE:
+        failed = {table: progress['error'] or progress['status']
+                  for table, progress in result['tables'].items() if progress['status'] != DONE}
+        raise RuntimeError(f"Tablas sin completar: {failed}")
+    return result
+
+
+def run_backup(params: Dict, queued: QueuedJob) -> Dict:
+    """
+    Handler de los trabajos 'backup': toma un snapshot de las tablas, escritas en
+    paralelo. Es completo si no hay snapshots previos, si `full` es verdadero o si la
+    cadena ya tiene `BACKUP_FULL_EVERY` snapshots; si no, solo guarda los cambios desde
+    el anterior.
+
+    Args:
+        params (Dict): `tables` (nombres de tablas de `MODELS`), `full`, `parquet` y
+            opcionalmente `root` (directorio de los snapshots).
+        queued (QueuedJob): Trabajo de la cola; su avance es el estado de cada tabla.
+
+    Returns:
+        Dict: Estado final del respaldo, con el ID del snapshot y el resumen por tabla.
+    """
+    models = [_entries[table]['model'] for table in params['tables']]
+    job = BackupJob('backup', list(params['tables']), id=queued.id)
+    queued.track(job.as_dict)
+    return _run(job, _backup, models, params.get('root', BACKUP_SNAPSHOTS_DIR),
+                params.get('full', False), params.get('parquet', BACKUP_PARQUET))
+
+
+def run_restore(params: Dict, queued: QueuedJob) -> Dict:
+    """
+    Handler de los trabajos 'restore': restaura las tablas en paralelo dentro de cada
+    nivel de dependencia (`dependency_levels`), reproduciendo la cadena de snapshots
+    (verificando sus checksums). Si aun no hay ningun snapshot, se restauran los
+    respaldos completos de `backup_path` (`BACKUP_DIR`). Por defecto solo se insertan los
+    IDs que faltan; con `overwrite` las filas existentes se sobrescriben y se eliminan
+    las que los snapshots marcan como eliminadas.
+
+    Args:
+        params (Dict): `tables` (nombres de tablas de `MODELS`) y opcionalmente `root` y
+            `overwrite`.
+        queued (QueuedJob): Trabajo de la cola; su avance es el estado de cada tabla.
+
+    Returns:
+        Dict: Estado final de la restauracion con el resumen por tabla.
+    """
+    models = [_entries[table]['model'] for table in params['tables']]
+    job = BackupJob('restore', list(params['tables']), id=queued.id)
+    queued.track(job.as_dict)
+    return _run(job, _restore, models, params.get('root', BACKUP_SNAPSHOTS_DIR),
+                params.get('overwrite', False))
+
+
+scheduler.register('backup', run_backup)
+scheduler.register('restore', run_restore)
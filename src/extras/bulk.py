@@ -0,0 +1,278 @@
+import csv
+import io
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, Optional, Type
+from fastapi import Depends
+from sqlalchemy import Table, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from src.extras.database import get_db
+from src.extras.events import touch
+from src.extras.models import column_values
+from src.extras.constants import BULK_LOAD_BACKEND, CSV_CHUNK_SIZE
+
+
+class _CsvStream(io.TextIOBase):
+    """
+    Archivo de solo lectura que serializa filas a CSV a medida que `COPY` las pide,
+    sin construir el contenido completo en memoria.
+    """
+
+    def __init__(self, rows: Iterable[Dict], columns: List[str]):
+        self._rows = iter(rows)
+        self._columns = columns
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator='\n')
+        self._pending = ''
+        self.count = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def _next_line(self) -> str:
+        row = next(self._rows)
+        self._writer.writerow([
+            '\\N' if row.get(column) is None else row.get(column)
+            for column in self._columns
+        ])
+        line = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self.count += 1
+        return line
+
+    def read(self, size: int = -1) -> str:
+        parts = [self._pending]
+        length = len(self._pending)
+        while size < 0 or length < size:
+            try:
+                line = self._next_line()
+            except StopIteration:
+                break
+            parts.append(line)
+            length += len(line)
+        data = ''.join(parts)
+        if size < 0:
+            self._pending = ''
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+
+class BulkLoader(ABC):
+    """
+    Interfaz de los backends de carga masiva. Cada backend inserta filas ya validadas
+    en la tabla del modelo dentro de la transaccion de la sesion entregada.
+    """
+
+    name = 'base'
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def columns(model: Type) -> List[str]:
+        return [column.name for column in model.__table__.columns]
+
+    @abstractmethod
+    def load(self, model: Type, rows: Iterable[Dict], on_conflict: Optional[str] = None) -> int:
+        """
+        Inserta las filas en la tabla del modelo.
+
+        Args:
+            model (Type): Modelo SQLAlchemy de la tabla destino.
+            rows (Iterable[Dict]): Filas a insertar.
+            on_conflict (str, opcional): `None` falla ante llaves duplicadas, 'nothing' las
+                ignora y 'update' sobrescribe la fila existente (upsert).
+
+        Returns:
+            int: Numero de filas enviadas a la base de datos.
+        """
+
+
+class ExecutemanyLoader(BulkLoader):
+    """
+    Inserta las filas con `executemany` en lotes de tamaño fijo. Funciona en cualquier
+    motor soportado por SQLAlchemy.
+    """
+
+    name = 'executemany'
+
+    def __init__(self, db: Session, batch_size: int = CSV_CHUNK_SIZE):
+        super().__init__(db)
+        self.batch_size = batch_size
+
+    def _batches(self, model: Type, rows: Iterable[Dict]) -> Iterator[List[Dict]]:
+        batch = []
+        for row in rows:
+            batch.append(column_values(model, row))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _insert_statement(self, model: Type, on_conflict: Optional[str]):
+        table = model.__table__
+        if on_conflict is None:
+            return table.insert()
+
+        statement = dialect_insert(self.db, table)
+        keys = [column.name for column in table.primary_key]
+        if on_conflict == 'nothing':
+            return statement.on_conflict_do_nothing(index_elements=keys)
+        return statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={column.name: statement.excluded[column.name]
+                  for column in table.columns if not column.primary_key}
+        )
+
+    def load(self, model: Type, rows: Iterable[Dict], on_conflict: Optional[str] = None) -> int:
+        statement = self._insert_statement(model, check_on_conflict(on_conflict))
+        count = 0
+        for batch in self._batches(model, rows):
+            self.db.execute(statement, batch)
+            count += len(batch)
+        return count
+
+
+class CopyLoader(BulkLoader):
+    """
+    Inserta las filas con `COPY ... FROM STDIN` usando `copy_expert` sobre la conexion
+    psycopg2 de la sesion. Las filas se serializan a CSV a medida que PostgreSQL las lee.
+    """
+
+    name = 'copy'
+
+    def _copy(self, table: str, columns: List[str], rows: Iterable[Dict]) -> int:
+        dialect = self.db.get_bind().dialect
+        quoted_columns = ', '.join(
+            dialect.identifier_preparer.quote(column) for column in columns)
+        sql = (
+            f"COPY {table} ({quoted_columns}) "
+            "FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        )
+        stream = _CsvStream(rows, columns)
+        raw_connection = self.db.connection().connection
+        try:
+            with raw_connection.cursor() as cursor:
+                cursor.copy_expert(sql, stream)
+        except dialect.dbapi.Error as e:
+            # Traduce el error de psycopg2 a la excepcion equivalente de SQLAlchemy (IntegrityError, ...)
+            raise DBAPIError.instance(sql, None, e, dialect.dbapi.Error) from e
+        return stream.count
+
+    def load(self, model: Type, rows: Iterable[Dict], on_conflict: Optional[str] = None) -> int:
+        on_conflict = check_on_conflict(on_conflict)
+        columns = self.columns(model)
+        preparer = self.db.get_bind().dialect.identifier_preparer
+        target = preparer.format_table(model.__table__)
+        rows = (column_values(model, row) for row in rows)
+        # COPY va directo a la conexion psycopg2 y no pasa por los eventos de la sesion
+        touch(self.db, model.__tablename__)
+        if on_conflict is None:
+            return self._copy(target, columns, rows)
+
+        # COPY no soporta ON CONFLICT: se copia a una tabla temporal y desde ahi se
+        # hace un unico INSERT ... SELECT ... ON CONFLICT
+        staging = preparer.quote(f"staging_{uuid.uuid4().hex}")
+        self.db.execute(text(
+            f"CREATE TEMP TABLE {staging} (LIKE {target} INCLUDING DEFAULTS)"))
+        count = self._copy(staging, columns, rows)
+
+        quoted_columns = ', '.join(preparer.quote(column) for column in columns)
+        keys = ', '.join(preparer.quote(column.name)
+                         for column in model.__table__.primary_key)
+        if on_conflict == 'nothing':
+            action = 'DO NOTHING'
+        else:
+            action = 'DO UPDATE SET ' + ', '.join(
+                f"{preparer.quote(column.name)} = EXCLUDED.{preparer.quote(column.name)}"
+                for column in model.__table__.columns if not column.primary_key)
+        self.db.execute(text(
+            f"INSERT INTO {target} ({quoted_columns}) "
+            f"SELECT {quoted_columns} FROM {staging} "
+            f"ON CONFLICT ({keys}) {action}"))
+        self.db.execute(text(f"DROP TABLE {staging}"))
+        return count
+
+
+ON_CONFLICT_MODES = ('nothing', 'update')
+
+
+def dialect_insert(db: Session, table: Table):
+    """
+    Crea un `INSERT` del dialecto de la sesion, que soporta `ON CONFLICT`.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        table (Table): Tabla destino.
+
+    Returns:
+        Insert: Sentencia con `on_conflict_do_nothing` / `on_conflict_do_update`.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(table)
+    if dialect == 'sqlite':
+        return sqlite.insert(table)
+    raise ValueError(f"El motor {dialect} no soporta ON CONFLICT")
+
+
+def check_on_conflict(on_conflict: Optional[str]) -> Optional[str]:
+    """
+    Valida el modo de resolucion de conflictos de llave primaria.
+
+    Args:
+        on_conflict (str, opcional): `None`, 'nothing' o 'update'.
+
+    Returns:
+        str, opcional: El mismo modo si es valido.
+    """
+    if on_conflict is not None and on_conflict not in ON_CONFLICT_MODES:
+        raise ValueError(f"Modo ON CONFLICT desconocido: {on_conflict}")
+    return on_conflict
+
+
+BULK_LOADERS = {
+    ExecutemanyLoader.name: ExecutemanyLoader,
+    CopyLoader.name: CopyLoader,
+}
+
+
+def supports_copy(db: Session) -> bool:
+    """
+    Indica si la sesion esta conectada a PostgreSQL mediante psycopg2 y puede usar `COPY`.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+
+    Returns:
+        bool: `True` si el backend `copy` esta disponible.
+    """
+    dialect = db.get_bind().dialect
+    return dialect.name == 'postgresql' and dialect.driver == 'psycopg2'
+
+
+def get_bulk_loader(db: Session = Depends(get_db), backend: Optional[str] = None) -> BulkLoader:
+    """
+    Devuelve el backend de carga masiva configurado para la sesion.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        backend (str, opcional): 'auto', 'copy' o 'executemany'. Por defecto `BULK_LOAD_BACKEND`.
+
+    Returns:
+        BulkLoader: Instancia del backend. Con 'auto' o 'copy' se usa `COPY` si la sesion
+        esta en PostgreSQL con psycopg2 y `executemany` en cualquier otro caso.
+    """
+    backend = backend or BULK_LOAD_BACKEND
+    if backend not in ('auto', *BULK_LOADERS):
+        raise ValueError(f"Backend de carga masiva desconocido: {backend}")
+
+    if backend in ('auto', CopyLoader.name) and supports_copy(db):
+        return CopyLoader(db)
+    return ExecutemanyLoader(db)
@@ -0,0 +1,274 @@
+"""
+Bus de invalidacion entre workers. Cada transaccion confirmada publica las tablas que
+modifico (hook `after_commit` de `src.extras.events`) y los demas workers, al recibir el
+mensaje, incrementan la version de esas tablas y expulsan las entradas afectadas de sus
+caches en memoria.
+
+En PostgreSQL se usa `NOTIFY` sobre `INVALIDATION_CHANNEL` y un hilo por worker que hace
+`LISTEN`, sin servicios externos. Antes de avisar, el worker que escribio incrementa las
+versiones de las tablas en `TableVersions` y las envia en el mensaje, de modo que todos
+los workers derivan los mismos `ETag` (`src.extras.http_cache`). El commit solo deja las
+tablas en una cola; un hilo del bus las agrupa y publica, sin que el commit espere. `LocalBus` es el
+reemplazo en memoria para pruebas y para motores sin LISTEN/NOTIFY.
+"""
+import json
+import os
+import select
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.engine import Engine
+
+from src.extras import events, models
+from src.extras.constants import INVALIDATION_CHANNEL
+from .logger import custom_logger
+
+logger = custom_logger()
+
+# Segundos entre revisiones del socket de LISTEN y antes de reintentar una conexion caida
+_POLL_INTERVAL = 1.0
+_RECONNECT_DELAY = 2.0
+
+_VERSIONS_TABLE = models.TableVersions.__tablename__
+_BUMP_VERSIONS = (
+    f'INSERT INTO "{_VERSIONS_TABLE}" (name, version, modified_at) '
+    'SELECT name, 1, %s FROM unnest(%s::text[]) AS name ORDER BY name '
+    f'ON CONFLICT (name) DO UPDATE SET version = "{_VERSIONS_TABLE}".version + 1, '
+    'modified_at = excluded.modified_at '
+    'RETURNING name, version, modified_at'
+)
+_READ_VERSIONS = f'SELECT name, version, modified_at FROM "{_VERSIONS_TABLE}"'
+
+
+class InvalidationBus(ABC):
+    """
+    Interfaz del bus. `start` engancha la publicacion a los commits del proceso y
+    `stop` la desengancha. Los mensajes recibidos se entregan a `on_message`.
+    """
+
+    def __init__(self, on_message: Callable[[Set[str]], None] = events.notify):
+        self.on_message = on_message
+        # Identifica al worker para ignorar los mensajes que el mismo publico
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    @abstractmethod
+    def publish(self, tables: Iterable[str]) -> None:
+        """
+        Publica la invalidacion de las tablas a los demas workers. Se invoca desde
+        `after_commit`, por lo que no debe hacer I/O sincrono.
+
+        Args:
+            tables (Iterable[str]): Nombres de las tablas modificadas.
+        """
+
+    def start(self) -> 'InvalidationBus':
+        events.add_publisher(self.publish)
+        return self
+
+    def stop(self) -> None:
+        events.remove_publisher(self.publish)
+
+    def encode(self, tables: Iterable[str],
+               versions: Optional[Dict[str, Tuple[int, float]]] = None) -> str:
+        message = {'origin': self.origin, 'tables': sorted(tables)}
+        if versions:
+            message['versions'] = versions
+        return json.dumps(message)
+
+    def deliver(self, payload: str) -> None:
+        """
+        Procesa un mensaje recibido, descartando los propios y los mal formados.
+        """
+        try:
+            message = json.loads(payload)
+            origin, tables = message['origin'], set(message['tables'])
+            versions = [(name, version, modified)
+                        for name, (version, modified) in message.get('versions', {}).items()]
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Mensaje de invalidacion invalido: {payload!r}")
+            return
+        if origin != self.origin and tables:
+            if versions:
+                events.set_shared_versions(versions)
+            self.on_message(tables)
+
+
+class LocalBus(InvalidationBus):
+    """
+    Bus en memoria: los mensajes se entregan de forma sincrona a las demas instancias
+    de `LocalBus` iniciadas en el proceso, que hacen el papel de otros workers.
+    """
+
+    _members: List['LocalBus'] = []
+    _lock = threading.Lock()
+
+    def publish(self, tables: Iterable[str]) -> None:
+        payload = self.encode(tables)
+        with self._lock:
+            members = list(self._members)
+        for member in members:
+            member.deliver(payload)
+
+    def start(self) -> 'LocalBus':
+        with self._lock:
+            self._members.append(self)
+        return super().start()
+
+    def stop(self) -> None:
+        super().stop()
+        with self._lock:
+            if self in self._members:
+                self._members.remove(self)
+
+
+class PostgresBus(InvalidationBus):
+    """
+    Bus sobre LISTEN/NOTIFY de PostgreSQL (psycopg2). Usa dos conexiones propias, fuera
+    del pool, cada una en su hilo de fondo: una publica con `pg_notify` y otra escucha.
+    """
+
+    def __init__(self, engine: Engine, channel: str = INVALIDATION_CHANNEL,
+                 on_message: Callable[[Set[str]], None] = events.notify):
+        super().__init__(on_message)
+        self.engine = engine
+        self.channel = channel
+        self._publisher = None
+        # Commits por tabla aun sin publicar; los de varios commits se publican juntos
+        self._outbox: Counter = Counter()
+        self._outbox_ready = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sender: Optional[threading.Thread] = None
+
+    def _connect(self):
+        dialect = self.engine.dialect
+        args, kwargs = dialect.create_connect_args(self.engine.url)
+        connection = dialect.connect(*args, **kwargs)
+        connection.autocommit = True
+        return connection
+
+    def publish(self, tables: Iterable[str]) -> None:
+        # Se llama desde el commit (incluso en el event loop): solo encola, sin I/O
+        tables = list(tables)
+        events.add_pending(tables)
+        with self._outbox_ready:
+            self._outbox.update(tables)
+            self._outbox_ready.notify()
+
+    def _send(self, counts: Counter) -> None:
+        tables = sorted(counts)
+        if self._publisher is None or self._publisher.closed:
+            self._publisher = self._connect()
+        with self._publisher.cursor() as cursor:
+            # Las filas se incrementan en orden de nombre para no bloquearse con otro worker
+            cursor.execute(_BUMP_VERSIONS, (time.time(), tables))
+            versions = {name: (version, modified) for name, version, modified in cursor.fetchall()}
+            if events.shared_versions(()) is None:
+                cursor.execute(_READ_VERSIONS)
+                events.set_shared_versions(cursor.fetchall(), reset=True)
+            events.set_shared_versions(
+                (name, version, modified) for name, (version, modified) in versions.items())
+            events.release_pending(counts)
+            cursor.execute("SELECT pg_notify(%s, %s)",
+                           (self.channel, self.encode(tables, versions)))
+
+    def _drain(self) -> None:
+        while True:
+            with self._outbox_ready:
+                while not self._outbox and not self._stopped.is_set():
+                    self._outbox_ready.wait()
+                if not self._outbox:
+                    return
+                counts, self._outbox = self._outbox, Counter()
+            try:
+                self._send(counts)
+            except Exception as e:
+                # El commit ya ocurrio: el error solo se registra y las tablas se reintentan
+                logger.error(f"No se pudo publicar la invalidacion de {sorted(counts)}: {e}")
+                # Sin el incremento, el ETag compartido seguiria coincidiendo con datos viejos
+                events.clear_shared_versions()
+                self._close_publisher()
+                with self._outbox_ready:
+                    self._outbox.update(counts)
+                if self._stopped.wait(_RECONNECT_DELAY):
+                    return
+
+    def _close_publisher(self) -> None:
+        if self._publisher is not None:
+            try:
+                self._publisher.close()
+            except Exception:
+                pass
+            self._publisher = None
+
+    def _listen(self) -> None:
+        connected_before = False
+        while not self._stopped.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                    # Despues de LISTEN, para no perder incrementos entre la lectura y el primer aviso
+                    cursor.execute(_READ_VERSIONS)
+                    events.set_shared_versions(cursor.fetchall(), reset=True)
+                if connected_before:
+                    # Mientras la conexion estuvo caida se pudieron perder avisos
+                    self.on_message(set(models.Base.metadata.tables))
+                connected_before = True
+
+                while not self._stopped.is_set():
+                    if select.select([connection], [], [], _POLL_INTERVAL) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self.deliver(connection.notifies.pop(0).payload)
+            except Exception as e:
+                logger.error(f"Conexion LISTEN del bus de invalidacion perdida: {e}")
+                self._stopped.wait(_RECONNECT_DELAY)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def start(self) -> 'PostgresBus':
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._listen, name='invalidation-bus', daemon=True)
+        self._thread.start()
+        self._sender = threading.Thread(
+            target=self._drain, name='invalidation-bus-publish', daemon=True)
+        self._sender.start()
+        return super().start()
+
+    def stop(self) -> None:
+        super().stop()
+        self._stopped.set()
+        with self._outbox_ready:
+            self._outbox_ready.notify()
+        # El hilo de publicacion envia lo que quede en la cola antes de terminar
+        if self._sender is not None:
+            self._sender.join(_RECONNECT_DELAY * 2)
+        if self._thread is not None:
+            self._thread.join(_POLL_INTERVAL * 2)
+        self._close_publisher()
+
+
+def start_invalidation_bus(engine: Engine) -> InvalidationBus:
+    """
+    Inicia el bus adecuado para el motor: `PostgresBus` con psycopg2 y `LocalBus` en otro caso.
+
+    Args:
+        engine (Engine): Motor de la base de datos de la aplicacion.
+
+    Returns:
+        InvalidationBus: Bus iniciado; se detiene con `stop()`.
+    """
+    if engine.dialect.name == 'postgresql' and engine.dialect.driver == 'psycopg2':
+        return PostgresBus(engine).start()
+    return LocalBus().start()
@@ -0,0 +1,254 @@
+"""
+Exportacion en formatos columnares (Arrow IPC y Parquet) para consumidores analiticos.
+Las filas se leen como tuplas desde un cursor del servidor y se agrupan en record
+batches de `STREAM_BATCH_SIZE` filas, que se serializan y se envian uno a uno.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Type
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+from fastapi.responses import StreamingResponse
+from sqlalchemy import BigInteger, DateTime, Integer
+
+from src.extras.database import local_session
+from src.extras.constants import (EXPORT_ARROW_COMPRESSION, EXPORT_PARQUET_COMPRESSION,
+                                  STREAM_BATCH_SIZE)
+
+FORMATS = ('arrow', 'parquet')
+
+MEDIA_TYPES = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def arrow_type(column) -> pa.DataType:
+    """
+    Mapea el tipo de una columna de SQLAlchemy a un tipo de Arrow.
+
+    Args:
+        column: Columna de SQLAlchemy.
+
+    Returns:
+        pa.DataType: Tipo Arrow correspondiente (las fechas con zona horaria se exportan en UTC).
+    """
+    if isinstance(column.type, BigInteger):
+        return pa.int64()
+    if isinstance(column.type, Integer):
+        return pa.int32()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp('us', tz='UTC' if column.type.timezone else None)
+    return pa.string()
+
+
+def arrow_schema(model: Type) -> pa.Schema:
+    """
+    Construye el esquema Arrow de un modelo a partir de sus columnas.
+
+    Args:
+        model (Type): Modelo SQLAlchemy de la tabla.
+
+    Returns:
+        pa.Schema: Esquema con un campo por columna, en el orden del modelo.
+    """
+    return pa.schema([
+        pa.field(column.name, arrow_type(column), nullable=column.nullable)
+        for column in model.__table__.columns
+    ])
+
+
+def iter_record_batches(schema: pa.Schema, rows: Iterable[tuple],
+                        batch_size: int = STREAM_BATCH_SIZE) -> Iterator[pa.RecordBatch]:
+    """
+    Agrupa filas (tuplas en el orden del esquema) en record batches.
+
+    Args:
+        schema (pa.Schema): Esquema de las filas.
+        rows (Iterable[tuple]): Filas a convertir.
+        batch_size (int, opcional): Filas por record batch.
+
+    Yields:
+        pa.RecordBatch: Un batch por cada `batch_size` filas.
+    """
+    batch: List[tuple] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield _record_batch(schema, batch)
+            batch = []
+    if batch:
+        yield _record_batch(schema, batch)
+
+
+def _record_batch(schema: pa.Schema, rows: List[tuple]) -> pa.RecordBatch:
+    columns = zip(*rows)
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema)
+
+
+class _Chunks:
+    """
+    Destino de escritura en memoria que se vacia despues de cada batch, para enviar los
+    bytes serializados sin acumular el archivo completo.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+def _writer(format: str, sink, schema: pa.Schema):
+    if format == 'parquet':
+        return pq.ParquetWriter(sink, schema, compression=EXPORT_PARQUET_COMPRESSION)
+    options = pa.ipc.IpcWriteOptions(compression=EXPORT_ARROW_COMPRESSION)
+    return pa.ipc.new_stream(sink, schema, options=options)
+
+
+def serialize_batches(schema: pa.Schema, batches: Iterable[pa.RecordBatch],
+                      format: str) -> Iterator[bytes]:
+    """
+    Serializa record batches como un stream Arrow IPC o un archivo Parquet (un row group
+    por batch), entregando los bytes a medida que se escribe cada batch.
+
+    Args:
+        schema (pa.Schema): Esquema de los batches.
+        batches (Iterable[pa.RecordBatch]): Batches a serializar.
+        format (str): 'arrow' o 'parquet'.
+
+    Yields:
+        bytes: Fragmentos del stream o archivo.
+    """
+    sink = _Chunks()
+    writer = _writer(format, sink, schema)
+    for batch in batches:
+        if format == 'parquet':
+            writer.write_batch(batch, row_group_size=batch.num_rows)
+        else:
+            writer.write_batch(batch)
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+def iter_table(model: Type, format: str, after_id: Optional[int] = None,
+               batch_size: int = STREAM_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Exporta la tabla en formato columnar leyendola con un cursor del lado del servidor.
+    Usa su propia sesion, ya que la de `get_db` se cierra antes de que termine de
+    enviarse la respuesta.
+
+    Args:
+        model (Type): Modelo SQLAlchemy de la tabla.
+        format (str): 'arrow' o 'parquet'.
+        after_id (int, opcional): Exportar solo las filas con `id` mayor a este valor.
+        batch_size (int, opcional): Filas por viaje al servidor y por record batch.
+
+    Yields:
+        bytes: Fragmentos del stream o archivo.
+    """
+    schema = arrow_schema(model)
+    db = local_session()
+    try:
+        query = db.query(*model.__table__.columns).order_by(model.id)
+        if after_id is not None:
+            query = query.filter(model.id > after_id)
+        rows = query.execution_options(stream_results=True).yield_per(batch_size)
+        yield from serialize_batches(schema, iter_record_batches(schema, rows, batch_size), format)
+    finally:
+        db.close()
+
+
+def columnar_response(model: Type, format: str, after_id: Optional[int] = None) -> StreamingResponse:
+    """
+    Crea una respuesta en streaming con todas las filas de la tabla en Arrow IPC o Parquet.
+
+    Args:
+        model (Type): Modelo SQLAlchemy de la tabla.
+        format (str): 'arrow' o 'parquet'.
+        after_id (int, opcional): Exportar solo las filas con `id` mayor a este valor.
+
+    Returns:
+        StreamingResponse: Respuesta con el tipo de contenido del formato.
+    """
+    return StreamingResponse(iter_table(model, format, after_id=after_id),
+                             media_type=MEDIA_TYPES[format])
+
+
+def records_response(rows: List[Dict], format: str) -> StreamingResponse:
+    """
+    Crea una respuesta en Arrow IPC o Parquet a partir de filas ya calculadas, como los
+    resultados de `/queries/*`. El esquema se infiere de los valores y se omiten las
+    columnas sin ningun valor, como hace `response_model_exclude_none` en JSON.
+
+    Args:
+        rows (List[Dict]): Filas del resultado.
+        format (str): 'arrow' o 'parquet'.
+
+    Returns:
+        StreamingResponse: Respuesta con el tipo de contenido del formato.
+    """
+    table = pa.Table.from_pylist(rows)
+    table = table.select([field.name for field in table.schema if not pa.types.is_null(field.type)])
+    batches = table.to_batches(max_chunksize=STREAM_BATCH_SIZE)
+    return StreamingResponse(serialize_batches(table.schema, batches, format),
+                             media_type=MEDIA_TYPES[format])
+
+
+class ParquetRows:
+    """
+    Escribe en un archivo Parquet las filas (tuplas en el orden de las columnas del
+    modelo) que se le agregan con `append`, un row group cada `batch_size` filas.
+    """
+
+    def __init__(self, model: Type, path: str, batch_size: int = STREAM_BATCH_SIZE):
+        self.schema = arrow_schema(model)
+        self.batch_size = batch_size
+        self.rows: List[tuple] = []
+        self.count = 0
+        self.writer = pq.ParquetWriter(path, self.schema, compression=EXPORT_PARQUET_COMPRESSION)
+
+    def append(self, row: tuple) -> None:
+        self.rows.append(row)
+        self.count += 1
+        if len(self.rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self.rows:
+            self.writer.write_batch(_record_batch(self.schema, self.rows))
+            self.rows = []
+
+    def close(self) -> None:
+        self._flush()
+        self.writer.close()
+
+    def tee(self, rows: Iterable[tuple]) -> Iterator[tuple]:
+        """
+        Entrega las mismas filas que recibe, escribiendo cada una en el archivo Parquet.
+        """
+        for row in rows:
+            self.append(row)
+            yield row
@@ -5,9 +5,97 @@ MODELS = [
     {'path': "./src/data/departments.csv", 'model': models.Departments,
         'backup_path': 'src/backups/Departments.avro'},
     {'path': "./src/data/jobs.csv", 'model': models.Jobs,
-        'backup_path': 'src/backups/jobs.avro'},
+        'backup_path': 'src/backups/Jobs.avro'},
     {'path': "./src/data/hired_employees.csv", 'model': models.Employees,
         'backup_path': 'src/backups/Employees.avro'}
 ]
 
+# Respaldos completos de `backup_path`; sirven de snapshot base mientras no haya snapshots
 BACKUP_DIR = "src/backups/"
+
+# Numero de filas que se parsean, validan e insertan en cada bloque
+CSV_CHUNK_SIZE = 5000
+# Maximo de filas a insertar por tabla en cada peticion (None = sin limite)
+CSV_ROW_QUOTA = None
+# Backend de carga masiva: 'auto' usa COPY en PostgreSQL y executemany en otros motores
+BULK_LOAD_BACKEND = 'auto'
+# Tablas con hasta este numero de filas se deduplican con un indice de IDs en memoria;
+# por encima se consulta en el servidor solo por los IDs candidatos
+DEDUP_PRELOAD_MAX_ROWS = 100000
+# Lector de CSV: 'csv' (modulo csv) o 'mmap' (archivo mapeado en memoria, campos perezosos)
+CSV_READER = 'csv'
+# Numero de ejemplos de errores que se conservan en el reporte de validacion
+VALIDATION_MAX_SAMPLES = 20
+# Procesos para parsear y validar CSV grandes en paralelo (1 = en el mismo proceso)
+CSV_WORKERS = 1
+# Tamaño en bytes de cada rango del archivo que procesa un worker
+CSV_PARALLEL_CHUNK_BYTES = 16 * 1024 * 1024
+# Tamaño maximo de pagina en los listados paginados por keyset
+MAX_PAGE_SIZE = 1000
+# Filas que se traen por viaje desde el cursor del servidor al exportar en streaming
+STREAM_BATCH_SIZE = 1000
+# Filas por lote al completar la columna Employees.hired_at
+MIGRATION_BATCH_SIZE = 5000
+# Llave del advisory lock de PostgreSQL que serializa `python -m src.extras.migrations`
+MIGRATION_LOCK_ID = 7302101
+# Llave del advisory lock de PostgreSQL que serializa la reconstruccion de HiresSummary
+HIRES_SUMMARY_LOCK_ID = 7302100
+# Entradas y segundos de vida de la cache de reportes de contrataciones
+REPORT_CACHE_SIZE = 256
+REPORT_CACHE_TTL = 300
+# Entradas y segundos de vida de la cache de las tablas de referencia (Jobs, Departments)
+REFERENCE_CACHE_SIZE = 1024
+REFERENCE_CACHE_TTL = 600
+# Canal de PostgreSQL (LISTEN/NOTIFY) por el que los workers se avisan las tablas modificadas
+INVALIDATION_CHANNEL = 'cache_invalidation'
+# Maximo de elementos por peticion en los endpoints /batch
+BATCH_MAX_ITEMS = 1000
+# Codec de compresion de los respaldos Avro: 'null', 'deflate' o 'snappy' (requiere python-snappy)
+BACKUP_CODEC = 'deflate'
+# Bytes sin comprimir que se acumulan antes de cerrar un bloque Avro (marca de sincronizacion)
+BACKUP_SYNC_INTERVAL = 256 * 1024
+# Hilos que respaldan o restauran tablas en paralelo, cada uno con su propia conexion
+BACKUP_WORKERS = 4
+# Directorio de los respaldos incrementales: una carpeta con manifiesto por snapshot
+BACKUP_SNAPSHOTS_DIR = "src/backups/snapshots/"
+# Snapshots incrementales que se encadenan antes de tomar un nuevo respaldo completo
+BACKUP_FULL_EVERY = 7
+# Compresion de las exportaciones columnares: Arrow IPC ('lz4', 'zstd' o None) y Parquet
+EXPORT_ARROW_COMPRESSION = 'zstd'
+EXPORT_PARQUET_COMPRESSION = 'zstd'
+# Escribir tambien un archivo Parquet junto a cada archivo Avro de los respaldos
+BACKUP_PARQUET = False
+# Serializar los listados y reportes con orjson desde filas planas, sin construir un modelo
+# Pydantic por fila (False usa la validacion de `response_model` de FastAPI)
+FAST_JSON_RESPONSES = True
+# Header Cache-Control de los GET con ETag: 'no-cache' permite guardar la respuesta pero
+# obliga a revalidarla, lo que con If-None-Match cuesta un 304 sin consultar la base de datos
+HTTP_CACHE_CONTROL = 'private, no-cache'
+# Tablas que acepta `POST /csv/{table}`
+CSV_UPLOAD_TABLES = {
+    'departments': models.Departments,
+    'jobs': models.Jobs,
+    'employees': models.Employees,
+}
+# Fragmentos del cuerpo de la peticion que se reciben por adelantado mientras se insertan
+# los bloques anteriores; al llenarse se deja de leer del socket
+CSV_UPLOAD_BUFFER_CHUNKS = 64
+# Hilos que ejecutan los trabajos en segundo plano (cargas, respaldos y restauraciones).
+# Son aparte del threadpool de las peticiones y limitan las conexiones que ocupa el trabajo pesado
+JOB_QUEUE_WORKERS = 2
+# Trabajos en espera que acepta cada worker; con la cola llena se responde 503
+JOB_QUEUE_MAX_PENDING = 100
+# Trabajos de cada tipo que pueden correr a la vez y su prioridad por defecto (mayor corre antes)
+JOB_QUEUE_KINDS = {
+    'restore': {'concurrency': 1, 'priority': 20},
+    'backup': {'concurrency': 1, 'priority': 10},
+    'load': {'concurrency': 1, 'priority': 0},
+}
+# Segundos entre latidos de los trabajos de un worker (guardan tambien el avance); un trabajo
+# sin latido por JOB_QUEUE_STALE_AFTER segundos se considera abandonado y otro worker lo retoma
+JOB_QUEUE_HEARTBEAT = 5
+JOB_QUEUE_STALE_AFTER = 30
+# Veces que se inicia un trabajo (incluyendo reintentos tras un reinicio) antes de marcarlo fallido
+JOB_QUEUE_MAX_ATTEMPTS = 3
+# Segundos que se conservan los trabajos terminados
+JOB_QUEUE_RETENTION = 7 * 24 * 3600
@@ -0,0 +1,266 @@
+"""
+Escrituras por lotes para los endpoints `/batch`. Cada lote se ejecuta en una sola
+transaccion con una sentencia multi-fila (`INSERT ... ON CONFLICT DO NOTHING RETURNING`,
+`UPDATE ... FROM (VALUES ...) RETURNING`, `DELETE ... RETURNING`) y devuelve el
+resultado de cada elemento. En motores sin `RETURNING` (SQLite) se consultan antes
+los IDs existentes en una sola consulta.
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Type
+from sqlalchemy import bindparam, cast, column, delete, select, update, values
+from sqlalchemy.orm import Session
+
+from src.extras import models
+from src.extras.bulk import dialect_insert
+from src.extras.reference import invalidate_reference
+from src.extras.reporting import HIRES_COLUMNS, existing_employees, record_hires, remove_hires
+from src.extras.constants import BATCH_MAX_ITEMS
+
+CREATED = 'created'
+EXISTS = 'exists'
+UPDATED = 'updated'
+DELETED = 'deleted'
+NOT_FOUND = 'not_found'
+DUPLICATE = 'duplicate'
+
+
+def supports_returning(db: Session) -> bool:
+    """
+    Indica si el motor de la sesion soporta `RETURNING` en INSERT, UPDATE y DELETE.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+
+    Returns:
+        bool: `True` en PostgreSQL.
+    """
+    return getattr(db.get_bind().dialect, 'full_returning', False)
+
+
+def update_row(db: Session, model: Type, id: int, data: Dict) -> Optional[Dict]:
+    """
+    Actualiza una fila con un unico `UPDATE ... RETURNING`, sin leerla antes ni despues.
+    En `Employees` la misma sentencia devuelve tambien los valores anteriores para
+    actualizar el resumen de contrataciones. No confirma la transaccion.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        model (Type): Modelo SQLAlchemy de la tabla.
+        id (int): ID de la fila a actualizar.
+        data (Dict): Valores nuevos de la fila.
+
+    Returns:
+        Dict, opcional: Fila actualizada, o `None` si no existe ninguna fila con ese `id`.
+    """
+    table = model.__table__
+    data = models.column_values(model, data)
+    statement = update(table).where(table.c.id == id).values(data)
+    returning = supports_returning(db)
+
+    if model is not models.Employees:
+        if returning:
+            row = db.execute(statement.returning(*table.c)).first()
+            return None if row is None else dict(row._mapping)
+        # Sin RETURNING la fila resultante es la que se acaba de escribir
+        return data if db.execute(statement).rowcount else None
+
+    if returning:
+        previous = select(*(table.c[name] for name in HIRES_COLUMNS)) \
+            .where(table.c.id == id).with_for_update().subquery('previous')
+        statement = update(table).where(table.c.id == previous.c.id).values(data) \
+            .returning(*(previous.c[name] for name in HIRES_COLUMNS), *table.c)
+        row = db.execute(statement).first()
+        if row is None:
+            return None
+        previous_row = dict(zip(HIRES_COLUMNS, row[:len(HIRES_COLUMNS)]))
+        data = dict(zip(table.columns.keys(), row[len(HIRES_COLUMNS):]))
+    else:
+        previous_row = existing_employees(db, [id]).get(id)
+        if previous_row is None:
+            return None
+        db.execute(statement)
+
+    remove_hires(db, [previous_row])
+    record_hires(db, [data])
+    return data
+
+
+def delete_row(db: Session, model: Type, id: int) -> bool:
+    """
+    Elimina una fila con un unico `DELETE` y decide si existia por el numero de filas
+    afectadas. No confirma la transaccion. Para `Employees` se usa `batch_delete`, que
+    ademas actualiza el resumen de contrataciones.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        model (Type): Modelo SQLAlchemy de la tabla.
+        id (int): ID de la fila a eliminar.
+
+    Returns:
+        bool: `True` si se elimino la fila.
+    """
+    table = model.__table__
+    return db.execute(delete(table).where(table.c.id == id)).rowcount > 0
+
+
+def check_batch_size(items: Sequence) -> None:
+    """
+    Valida que el lote no este vacio ni supere `BATCH_MAX_ITEMS` elementos.
+
+    Args:
+        items (Sequence): Elementos del lote.
+    """
+    if not items:
+        raise ValueError("El lote no tiene elementos")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValueError(
+            f"El lote tiene {len(items)} elementos; el maximo es {BATCH_MAX_ITEMS}")
+
+
+def _split_duplicates(ids: Iterable[int]) -> Tuple[List[int], Set[int]]:
+    # Si un ID se repite en el lote se procesa solo su primera aparicion
+    seen, positions = set(), set()
+    for position, id in enumerate(ids):
+        if id in seen:
+            positions.add(position)
+        seen.add(id)
+    return list(seen), positions
+
+
+def _existing_ids(db: Session, model: Type, ids: Iterable[int]) -> Set[int]:
+    return {row[0] for row in db.query(model.id).filter(model.id.in_(list(ids)))}
+
+
+def _results(ids: List[int], duplicates: Set[int], done: Set[int], status: str, missing: str) -> Dict:
+    results = [
+        {'id': id, 'status': DUPLICATE if position in duplicates else status if id in done else missing}
+        for position, id in enumerate(ids)
+    ]
+    return {'summary': dict(Counter(result['status'] for result in results)), 'results': results}
+
+
+def _first_occurrences(rows: List[Dict], duplicates: Set[int]) -> List[Dict]:
+    return [row for position, row in enumerate(rows) if position not in duplicates]
+
+
+def batch_create(db: Session, model: Type, rows: List[Dict]) -> Dict:
+    """
+    Inserta un lote de filas con un unico `INSERT` multi-fila. Las filas cuyo `id` ya existe
+    no se modifican y se reportan como 'exists'.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        model (Type): Modelo SQLAlchemy de la tabla destino.
+        rows (List[Dict]): Filas a insertar.
+
+    Returns:
+        Dict: `summary` con el conteo por estado y `results` con `id` y `status`
+        ('created', 'exists' o 'duplicate') de cada elemento, en el orden recibido.
+    """
+    check_batch_size(rows)
+    ids = [row['id'] for row in rows]
+    _, duplicates = _split_duplicates(ids)
+    table = model.__table__
+    rows = [models.column_values(model, row) for row in _first_occurrences(rows, duplicates)]
+
+    if supports_returning(db):
+        statement = dialect_insert(db, table).values(rows) \
+            .on_conflict_do_nothing(index_elements=[table.c.id.name]) \
+            .returning(table.c.id)
+        created = {row[0] for row in db.execute(statement)}
+    else:
+        existing = _existing_ids(db, model, (row['id'] for row in rows))
+        new_rows = [row for row in rows if row['id'] not in existing]
+        if new_rows:
+            db.execute(table.insert().values(new_rows))
+        created = {row['id'] for row in new_rows}
+
+    if model is models.Employees:
+        record_hires(db, (row for row in rows if row['id'] in created))
+    db.commit()
+    invalidate_reference(model, *created)
+    return _results(ids, duplicates, created, CREATED, EXISTS)
+
+
+def batch_update(db: Session, model: Type, rows: List[Dict]) -> Dict:
+    """
+    Actualiza un lote de filas, identificadas por `id`, con un unico `UPDATE` multi-fila.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        model (Type): Modelo SQLAlchemy de la tabla destino.
+        rows (List[Dict]): Valores nuevos de cada fila, incluido su `id`.
+
+    Returns:
+        Dict: `summary` con el conteo por estado y `results` con `id` y `status`
+        ('updated', 'not_found' o 'duplicate') de cada elemento, en el orden recibido.
+    """
+    check_batch_size(rows)
+    ids = [row['id'] for row in rows]
+    unique_ids, duplicates = _split_duplicates(ids)
+    table = model.__table__
+    rows = [models.column_values(model, row) for row in _first_occurrences(rows, duplicates)]
+
+    previous = existing_employees(db, unique_ids) if model is models.Employees else None
+    if supports_returning(db):
+        names = [column_.name for column_ in table.columns]
+        source = values(*(column(name, table.c[name].type) for name in names), name='batch') \
+            .data([tuple(row[name] for name in names) for row in rows])
+        statement = update(table) \
+            .where(table.c.id == source.c.id) \
+            .values({name: cast(source.c[name], table.c[name].type)
+                     for name in names if name != table.c.id.name}) \
+            .returning(table.c.id)
+        updated = {row[0] for row in db.execute(statement)}
+    else:
+        updated = set(previous) if previous is not None \
+            else _existing_ids(db, model, unique_ids)
+        params = [{**row, '_id': row['id']} for row in rows if row['id'] in updated]
+        if params:
+            statement = update(table).where(table.c.id == bindparam('_id')).values({
+                name: bindparam(name) for name in table.columns.keys() if name != table.c.id.name})
+            db.execute(statement, params)
+
+    if previous is not None:
+        remove_hires(db, (row for id, row in previous.items() if id in updated))
+        record_hires(db, (row for row in rows if row['id'] in updated))
+    db.commit()
+    invalidate_reference(model, *updated)
+    return _results(ids, duplicates, updated, UPDATED, NOT_FOUND)
+
+
+def batch_delete(db: Session, model: Type, ids: List[int]) -> Dict:
+    """
+    Elimina un lote de filas por `id` con un unico `DELETE`.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        model (Type): Modelo SQLAlchemy de la tabla destino.
+        ids (List[int]): IDs a eliminar.
+
+    Returns:
+        Dict: `summary` con el conteo por estado y `results` con `id` y `status`
+        ('deleted', 'not_found' o 'duplicate') de cada elemento, en el orden recibido.
+    """
+    check_batch_size(ids)
+    unique_ids, duplicates = _split_duplicates(ids)
+    table = model.__table__
+    statement = delete(table).where(table.c.id.in_(unique_ids))
+    is_employees = model is models.Employees
+
+    if supports_returning(db):
+        columns = HIRES_COLUMNS if is_employees else (table.c.id.name,)
+        removed = [dict(zip(columns, row)) for row in
+                   db.execute(statement.returning(*(table.c[name] for name in columns)))]
+    else:
+        removed = list(existing_employees(db, unique_ids).values()) if is_employees \
+            else [{'id': id} for id in _existing_ids(db, model, unique_ids)]
+        if removed:
+            db.execute(statement)
+
+    if is_employees:
+        remove_hires(db, removed)
+    db.commit()
+    deleted = {row['id'] for row in removed}
+    invalidate_reference(model, *deleted)
+    return _results(ids, duplicates, deleted, DELETED, NOT_FOUND)
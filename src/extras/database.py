@@ -1,8 +1,10 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from dotenv import load_dotenv, find_dotenv
+from src.extras.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
 
 load_dotenv(dotenv_path=find_dotenv(), override=True)
 DATABASE_USER = os.getenv("DATABASE_USER")
@@ -11,11 +13,41 @@ DATABASE_HOST = os.getenv("DATABASE_HOST")
 DATABASE_PORT = os.getenv("DATABASE_PORT")
 
 
+# Configuracion del pool de conexiones
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", 5))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", 10))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", 30))
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", -1))
+DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true"
+DATABASE_POOL_USE_LIFO = os.getenv("DATABASE_POOL_USE_LIFO", "false").lower() == "true"
+POOL_OPTIONS = {
+    'pool_size': DATABASE_POOL_SIZE,
+    'max_overflow': DATABASE_MAX_OVERFLOW,
+    'pool_timeout': DATABASE_POOL_TIMEOUT,
+    'pool_recycle': DATABASE_POOL_RECYCLE,
+    'pool_pre_ping': DATABASE_POOL_PRE_PING,
+    'pool_use_lifo': DATABASE_POOL_USE_LIFO,
+}
+
+
 DATABASE_URL = f'postgresql://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/company_db'
-engine = create_engine(DATABASE_URL)
+engine = create_engine(
+    DATABASE_URL, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
 local_session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Modo asincrono opcional: ASYNC_API=true monta los routers async sobre un AsyncEngine (asyncpg)
+ASYNC_API = os.getenv("ASYNC_API", "false").lower() == "true"
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    DATABASE_URL.replace('postgresql://', 'postgresql+asyncpg://', 1)
+)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS) if ASYNC_API else None
+async_local_session = sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 
 def get_db():
     db = local_session()
@@ -23,3 +55,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with async_local_session() as db:
+        yield db
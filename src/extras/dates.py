@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Optional
+
+
+def parse_iso_datetime(value) -> Optional[datetime]:
+    """
+    Convierte una fecha ISO-8601 (`2021-11-07T02:48:42Z`) en un `datetime` con zona horaria.
+
+    Args:
+        value: Fecha como texto o `datetime`.
+
+    Returns:
+        datetime, opcional: Fecha convertida, o `None` si el valor no es una fecha ISO-8601 valida.
+    """
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str) or len(value) < 10:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
@@ -0,0 +1,142 @@
+from typing import Iterable, List, Set, Type
+from fastapi import Depends
+from sqlalchemy import Integer, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from src.extras.database import get_db
+from src.extras.constants import DEDUP_PRELOAD_MAX_ROWS
+from .logger import custom_logger
+
+logger = custom_logger()
+
+# Maximo de parametros por consulta `IN (...)` en motores sin arreglos (SQLite)
+_IN_BATCH_SIZE = 500
+
+
+def load_existing_ids(model: Type, db: Session = Depends(get_db)) -> Set[int]:
+    """
+    Obtiene los IDs que ya existen en la tabla del modelo.
+
+    Args:
+        model (Type): Modelo SQLAlchemy correspondiente a la tabla de la base de datos.
+        db (Session): Sesión activa de la base de datos.
+
+    Returns:
+        Set[int]: Conjunto con los IDs presentes en la tabla.
+    """
+    return {int(table.id) for table in db.query(model.id)}
+
+
+def find_missing_ids(ids: Iterable[int], model: Type, db: Session = Depends(get_db)) -> Set[int]:
+    """
+    Consulta en el servidor cuales de los IDs candidatos no existen en la tabla, sin
+    traer la columna completa de llaves primarias.
+
+    En PostgreSQL los candidatos se envian como un arreglo (`unnest`) y se devuelven solo
+    los faltantes; en otros motores se consultan los existentes por lotes con `IN (...)`.
+
+    Args:
+        ids (Iterable[int]): IDs candidatos.
+        model (Type): Modelo SQLAlchemy de la tabla.
+        db (Session): Sesión activa de la base de datos.
+
+    Returns:
+        Set[int]: IDs candidatos que no estan en la tabla.
+    """
+    candidates = set(ids)
+    if not candidates:
+        return set()
+
+    dialect = db.get_bind().dialect
+    if dialect.name == 'postgresql':
+        table = dialect.identifier_preparer.format_table(model.__table__)
+        statement = text(
+            f"SELECT c.id FROM unnest(:ids) AS c(id) "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.id = c.id)"
+        ).bindparams(bindparam('ids', type_=ARRAY(Integer)))
+        return {row[0] for row in db.execute(statement, {'ids': list(candidates)})}
+
+    ordered: List[int] = sorted(candidates)
+    for start in range(0, len(ordered), _IN_BATCH_SIZE):
+        batch = ordered[start:start + _IN_BATCH_SIZE]
+        candidates.difference_update(
+            row[0] for row in db.query(model.id).filter(model.id.in_(batch)))
+    return candidates
+
+
+class IdIndex:
+    """
+    Indice de pertenencia de IDs usado para descartar registros que ya existen.
+
+    Para tablas pequeñas los IDs se precargan una sola vez en un conjunto y cada consulta
+    es O(1); para tablas grandes solo se consultan en el servidor los IDs de cada bloque.
+    Si durante la carga el conjunto supera `max_rows`, se descarta y se pasa a consultar
+    en el servidor.
+    """
+
+    def __init__(
+            self,
+            model: Type,
+            db: Session,
+            preload: bool,
+            max_rows: int = DEDUP_PRELOAD_MAX_ROWS
+    ):
+        self.model = model
+        self.db = db
+        self.max_rows = max_rows
+        self.ids = load_existing_ids(model, db=db) if preload else None
+
+    @classmethod
+    def for_table(
+            cls,
+            model: Type,
+            db: Session,
+            preload_max_rows: int = DEDUP_PRELOAD_MAX_ROWS
+    ) -> 'IdIndex':
+        """
+        Crea el indice eligiendo la estrategia segun el tamaño de la tabla.
+
+        Args:
+            model (Type): Modelo SQLAlchemy de la tabla.
+            db (Session): Sesión activa de la base de datos.
+            preload_max_rows (int, opcional): Maximo de filas para precargar los IDs en memoria.
+
+        Returns:
+            IdIndex: Indice en memoria o consultado en el servidor.
+        """
+        is_large = db.query(model.id).offset(
+            preload_max_rows).limit(1).first() is not None
+        return cls(model, db, preload=not is_large, max_rows=preload_max_rows)
+
+    def missing(self, ids: Iterable[int]) -> Set[int]:
+        """
+        Devuelve los IDs que no estan en la tabla.
+
+        Args:
+            ids (Iterable[int]): IDs candidatos.
+
+        Returns:
+            Set[int]: IDs candidatos que no existen.
+        """
+        if self.ids is None:
+            return find_missing_ids(ids, self.model, db=self.db)
+        return set(ids) - self.ids
+
+    def add(self, ids: Iterable[int]) -> None:
+        """
+        Registra IDs recien insertados. Con la estrategia en el servidor no es necesario,
+        ya que las siguientes consultas los encuentran en la tabla. Si el conjunto en
+        memoria supera `max_rows`, se libera y se cambia a la estrategia en el servidor.
+
+        Args:
+            ids (Iterable[int]): IDs insertados.
+        """
+        if self.ids is None:
+            return
+        self.ids.update(ids)
+        if len(self.ids) > self.max_rows:
+            logger.info(
+                f"La tabla {self.model.__tablename__} supero {self.max_rows} IDs en memoria;"
+                f" se consultan en el servidor.")
+            self.ids = None
@@ -0,0 +1,235 @@
+"""
+Seguimiento de escrituras por tabla. Cada sesion acumula las tablas que modifica y,
+al confirmar la transaccion, se incrementa la version de cada tabla, se avisa a los
+suscriptores (por ejemplo, las caches de consultas) y se entregan las tablas a los
+publicadores, que las reenvian a los demas workers (`src.extras.bus`).
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_TOUCHED_KEY = 'touched_tables'
+
+_lock = threading.Lock()
+_versions: Dict[str, int] = defaultdict(int)
+_modified: Dict[str, float] = {}
+_started = time.time()
+_subscribers: List[Callable[[Set[str]], None]] = []
+# Versiones compartidas entre workers (`TableVersions`): `None` mientras no haya un bus que las mantenga
+_shared: Optional[Dict[str, Tuple[int, float]]] = None
+# Commits locales por tabla cuya version compartida aun no se incrementa
+_pending: Counter = Counter()
+_publishers: List[Callable[[Set[str]], None]] = []
+
+
+def touch(db: Session, *tables: str) -> None:
+    """
+    Marca tablas como modificadas en la transaccion actual de la sesion. Solo es necesario
+    para escrituras que no pasan por el ORM ni por `Session.execute` (por ejemplo `COPY`
+    o `bulk_update_mappings`); el resto se detecta automaticamente.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        *tables (str): Nombres de las tablas modificadas.
+    """
+    db.info.setdefault(_TOUCHED_KEY, set()).update(tables)
+
+
+def table_version(name: str) -> int:
+    """
+    Devuelve el numero de transacciones confirmadas que han modificado la tabla en este proceso.
+
+    Args:
+        name (str): Nombre de la tabla.
+
+    Returns:
+        int: Version actual de la tabla.
+    """
+    return _versions[name]
+
+
+def table_versions(names: Iterable[str]) -> Tuple[int, ...]:
+    """
+    Devuelve las versiones de varias tablas, utiles como parte de una llave de cache.
+
+    Args:
+        names (Iterable[str]): Nombres de las tablas.
+
+    Returns:
+        Tuple[int, ...]: Versiones en el mismo orden.
+    """
+    return tuple(_versions[name] for name in names)
+
+
+def last_modified(names: Iterable[str]) -> float:
+    """
+    Devuelve el momento del ultimo cambio confirmado (o recibido de otro worker) en
+    alguna de las tablas. Si no han cambiado desde que inicio el proceso, devuelve el
+    momento de inicio.
+
+    Args:
+        names (Iterable[str]): Nombres de las tablas.
+
+    Returns:
+        float: Marca de tiempo Unix.
+    """
+    return max((_modified.get(name, _started) for name in names), default=_started)
+
+
+def set_shared_versions(versions: Iterable[Tuple[str, int, float]], reset: bool = False) -> None:
+    """
+    Registra versiones de `TableVersions` leidas de la base de datos o recibidas por el
+    bus. Se conserva siempre la version mas alta de cada tabla, ya que los avisos de
+    distintos workers pueden llegar en desorden.
+
+    Args:
+        versions (Iterable[Tuple[str, int, float]]): Nombre, version y momento del cambio de cada tabla.
+        reset (bool, opcional): Reemplaza todas las versiones (carga completa de la tabla).
+    """
+    global _shared
+    with _lock:
+        if _shared is None or reset:
+            _shared = {}
+        for name, version, modified in versions:
+            current = _shared.get(name)
+            if current is None or version > current[0]:
+                _shared[name] = (int(version), float(modified))
+
+
+def clear_shared_versions() -> None:
+    """
+    Descarta las versiones compartidas, por ejemplo cuando no se pudieron incrementar en
+    la base de datos: hasta volver a cargarlas se usan los contadores del proceso.
+    """
+    global _shared
+    with _lock:
+        _shared = None
+
+
+def add_pending(tables: Iterable[str]) -> None:
+    """
+    Registra commits de este proceso sobre las tablas cuya version compartida aun no se
+    incrementa. Mientras queden pendientes, `shared_versions` no entrega esas tablas.
+
+    Args:
+        tables (Iterable[str]): Nombres de las tablas modificadas.
+    """
+    with _lock:
+        _pending.update(tables)
+
+
+def release_pending(counts: Counter) -> None:
+    """
+    Descuenta los commits cuya version compartida ya se incremento.
+
+    Args:
+        counts (Counter): Commits publicados por tabla.
+    """
+    with _lock:
+        _pending.subtract(counts)
+        for name in [name for name, count in _pending.items() if count <= 0]:
+            del _pending[name]
+
+
+def shared_versions(names: Iterable[str]) -> Optional[Tuple[Tuple[int, float], ...]]:
+    """
+    Devuelve la version compartida y el momento del ultimo cambio de varias tablas.
+
+    Args:
+        names (Iterable[str]): Nombres de las tablas.
+
+    Returns:
+        Tuple[Tuple[int, float], ...], opcional: `(version, modified_at)` en el mismo orden
+        (`(0, 0.0)` para tablas sin cambios registrados), o `None` si el proceso no tiene
+        versiones compartidas o alguna tabla tiene commits aun sin publicar.
+    """
+    names = list(names)
+    with _lock:
+        shared = _shared
+        if shared is None or any(name in _pending for name in names):
+            return None
+        return tuple(shared.get(name, (0, 0.0)) for name in names)
+
+
+def subscribe(callback: Callable[[Set[str]], None]) -> None:
+    """
+    Registra una funcion que se llama con el conjunto de tablas modificadas cada vez
+    que se confirma una transaccion que escribio en ellas.
+
+    Args:
+        callback (Callable[[Set[str]], None]): Funcion a notificar.
+    """
+    _subscribers.append(callback)
+
+
+def add_publisher(callback: Callable[[Set[str]], None]) -> None:
+    """
+    Registra una funcion que recibe las tablas modificadas por las transacciones confirmadas
+    en este proceso. A diferencia de `subscribe`, no se llama para cambios recibidos de otros
+    workers, por lo que sirve para reenviarlos sin generar ciclos.
+
+    Args:
+        callback (Callable[[Set[str]], None]): Funcion a notificar.
+    """
+    _publishers.append(callback)
+
+
+def remove_publisher(callback: Callable[[Set[str]], None]) -> None:
+    if callback in _publishers:
+        _publishers.remove(callback)
+
+
+def notify(tables: Iterable[str]) -> None:
+    """
+    Incrementa la version de las tablas y avisa a los suscriptores.
+
+    Args:
+        tables (Iterable[str]): Nombres de las tablas modificadas.
+    """
+    tables = set(tables)
+    if not tables:
+        return
+    now = time.time()
+    with _lock:
+        for name in tables:
+            _versions[name] += 1
+            _modified[name] = now
+    for callback in list(_subscribers):
+        callback(tables)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flush(session, flush_context):
+    tables = {
+        instance.__table__.name
+        for instance in (*session.new, *session.dirty, *session.deleted)
+        if hasattr(instance, '__table__')
+    }
+    if tables:
+        touch(session, *tables)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            touch(orm_execute_state.session, table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish(session):
+    tables = session.info.pop(_TOUCHED_KEY, None)
+    if not tables:
+        return
+    notify(tables)
+    for callback in list(_publishers):
+        callback(set(tables))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard(session):
+    session.info.pop(_TOUCHED_KEY, None)
@@ -0,0 +1,145 @@
+"""
+Cache HTTP de los endpoints de lectura. El ETag y el `Last-Modified` de una respuesta se
+derivan de las versiones de las tablas que consulta. Un `If-None-Match` vigente se
+responde con 304 antes de abrir la sesion de la base de datos.
+
+Con el bus de PostgreSQL (`src.extras.bus`) las versiones son las de `TableVersions`:
+cada commit las incrementa en la base de datos y las envia a los demas workers, por lo
+que todos los workers (y los reinicios) emiten los mismos validadores. Un worker que aun
+no recibe el aviso de una escritura hecha en otro puede responder 304 durante ese
+instante, igual que sus caches en memoria.
+
+Sin estado compartido (`LocalBus`, otros motores) se usan los contadores del proceso, y
+el ETag incluye un identificador del worker: un ETag de otro worker o de antes de un
+reinicio no coincide y se responde con el contenido completo. En ese modo la cache HTTP
+solo es efectiva con un unico worker.
+"""
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Dict, Type
+from fastapi import HTTPException, Request, status
+
+from src.extras import events
+from src.extras.constants import HTTP_CACHE_CONTROL
+
+_STATE_KEY = 'cache_headers'
+
+BOOT_ID = uuid.uuid4().hex[:12]
+
+
+def etag_for(*models: Type) -> str:
+    """
+    Calcula el ETag fuerte de una respuesta que depende de las tablas de los modelos.
+
+    Args:
+        *models (Type): Modelos SQLAlchemy consultados por el endpoint.
+
+    Returns:
+        str: ETag entre comillas.
+    """
+    names = [model.__tablename__ for model in models]
+    shared = events.shared_versions(names)
+    if shared is not None:
+        return '"{}"'.format('.'.join(str(version) for version, _ in shared))
+    versions = events.table_versions(names)
+    return '"{}-{}"'.format(BOOT_ID, '.'.join(str(version) for version in versions))
+
+
+def modified_for(*models: Type) -> float:
+    """
+    Calcula el momento del ultimo cambio en las tablas de los modelos.
+
+    Args:
+        *models (Type): Modelos SQLAlchemy consultados por el endpoint.
+
+    Returns:
+        float: Marca de tiempo Unix.
+    """
+    names = [model.__tablename__ for model in models]
+    shared = events.shared_versions(names)
+    if shared is not None:
+        return max(modified for _, modified in shared)
+    return events.last_modified(names)
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match usa comparacion debil: se ignora el prefijo W/
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return '*' in candidates or etag in (
+        candidate[2:] if candidate.startswith('W/') else candidate for candidate in candidates)
+
+
+def _not_modified_since(if_modified_since: str, modified: float) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # Last-Modified tiene resolucion de segundos
+    return int(modified) <= since
+
+
+def conditional_get(*models: Type) -> Callable[[Request], None]:
+    """
+    Crea una dependencia para un endpoint de lectura que consulta las tablas de los
+    modelos: calcula `ETag` y `Last-Modified`, responde 304 si el cliente ya tiene la
+    version vigente y deja los headers para que `CacheHeadersMiddleware` los agregue a
+    la respuesta completa. Se declara en `dependencies=[...]` para que se resuelva
+    antes que `get_db`.
+
+    Args:
+        *models (Type): Modelos SQLAlchemy consultados por el endpoint.
+
+    Returns:
+        Callable[[Request], None]: Dependencia de FastAPI.
+    """
+    def dependency(request: Request) -> None:
+        # Las versiones se leen antes de consultar la base de datos: si una escritura se
+        # confirma mientras tanto, el ETag queda atrasado y la siguiente peticion no coincide
+        etag = etag_for(*models)
+        modified = modified_for(*models)
+        headers = {
+            'ETag': etag,
+            'Last-Modified': formatdate(modified, usegmt=True),
+            'Cache-Control': HTTP_CACHE_CONTROL,
+        }
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match is not None:
+            not_modified = _matches(if_none_match, etag)
+        else:
+            if_modified_since = request.headers.get('if-modified-since')
+            not_modified = if_modified_since is not None \
+                and _not_modified_since(if_modified_since, modified)
+        if not_modified:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        setattr(request.state, _STATE_KEY, headers)
+
+    return dependency
+
+
+class CacheHeadersMiddleware:
+    """
+    Middleware ASGI que agrega a las respuestas 200 los headers calculados por
+    `conditional_get`. Funciona igual con respuestas validadas por FastAPI,
+    pre-serializadas o en streaming.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Dict) -> None:
+            if message['type'] == 'http.response.start' and message['status'] == 200:
+                headers = scope.get('state', {}).get(_STATE_KEY)
+                if headers:
+                    message['headers'] = [
+                        *message.get('headers', []),
+                        *((name.lower().encode('latin-1'), value.encode('latin-1'))
+                          for name, value in headers.items()),
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,250 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Type
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from src.extras import models
+from src.extras.database import get_db, local_session
+from src.extras.constants import (
+    MODELS, CSV_CHUNK_SIZE, CSV_READER, CSV_WORKERS, CSV_PARALLEL_CHUNK_BYTES
+)
+from src.extras.bulk import BulkLoader, get_bulk_loader, check_on_conflict
+from src.extras.dedup import IdIndex
+from src.extras.validation import ValidationReport
+from src.extras.parallel import iter_parallel_chunks
+from src.extras.reporting import track_employee_load
+from src.extras.job_queue import QueuedJob, scheduler
+from src.extras.utils import (
+    get_schema, iter_csv, iter_csv_file, schema_for, get_existing_ids, validate_rows,
+    apply_row_quota
+)
+from .logger import custom_logger
+
+logger = custom_logger()
+
+
+def iter_validated_chunks(
+        path: str,
+        model: Type,
+        report: ValidationReport,
+        chunk_size: int = CSV_CHUNK_SIZE,
+        workers: int = CSV_WORKERS,
+        chunk_bytes: int = CSV_PARALLEL_CHUNK_BYTES,
+        reader: str = CSV_READER
+) -> Iterator[Tuple[int, List[Dict]]]:
+    """
+    Parsea y valida un CSV por bloques, en el mismo proceso o en paralelo segun `workers`.
+
+    Args:
+        path (str): Ruta al archivo CSV.
+        model (Type): Modelo SQLAlchemy de la tabla destino.
+        report (ValidationReport): Reporte donde se acumulan los errores de validacion.
+        chunk_size (int, opcional): Filas por bloque cuando se procesa en el mismo proceso.
+        workers (int, opcional): Numero de procesos; con 1 no se crea un pool.
+        chunk_bytes (int, opcional): Bytes por bloque cuando se procesa en paralelo.
+        reader (str, opcional): Lector de CSV usado en el mismo proceso ('csv' o 'mmap').
+
+    Yields:
+        Tuple[int, List[Dict]]: Filas leidas del bloque y filas validas.
+    """
+    if workers > 1:
+        for read, valid_rows, chunk_report in iter_parallel_chunks(
+                path, get_schema(path), model, workers=workers, chunk_bytes=chunk_bytes):
+            report.merge(chunk_report)
+            yield read, valid_rows
+    else:
+        for chunk in iter_csv(path, chunk_size=chunk_size, reader=reader):
+            yield len(chunk), validate_rows(chunk, model, report=report)
+
+
+def ingest_csv(
+        path: str,
+        model: Type,
+        db: Session = Depends(get_db),
+        chunk_size: int = CSV_CHUNK_SIZE,
+        quota: Optional[int] = None,
+        loader: Optional[BulkLoader] = None,
+        on_conflict: Optional[str] = None,
+        workers: int = CSV_WORKERS,
+        chunk_bytes: int = CSV_PARALLEL_CHUNK_BYTES,
+        reader: str = CSV_READER,
+        progress: Optional[Callable[[Dict], None]] = None
+) -> dict:
+    """
+    Carga un archivo CSV a la tabla del modelo por bloques: cada bloque se parsea,
+    se valida, se depura de IDs existentes y se inserta antes de leer el siguiente,
+    por lo que la memoria usada no depende del tamaño del archivo.
+
+    Args:
+        path (str): Ruta al archivo CSV.
+        model (Type): Modelo SQLAlchemy de la tabla destino.
+        db (Session): Sesión activa de la base de datos.
+        chunk_size (int, opcional): Numero de filas por bloque.
+        quota (int, opcional): Maximo de filas a insertar. `None` indica que no hay limite.
+        loader (BulkLoader, opcional): Backend de carga masiva. Por defecto el configurado en `get_bulk_loader`.
+        on_conflict (str, opcional): Si es 'nothing' o 'update' no se consultan los IDs existentes
+            y los conflictos se resuelven en la base de datos con `ON CONFLICT`.
+        workers (int, opcional): Procesos para parsear y validar en paralelo.
+        chunk_bytes (int, opcional): Bytes por bloque cuando `workers` es mayor que 1.
+        reader (str, opcional): Lector de CSV cuando `workers` es 1 ('csv' o 'mmap').
+        progress (Callable[[Dict], None], opcional): Se llama con el resumen parcial despues de cada bloque.
+
+    Returns:
+        dict: Resumen de la carga con filas leidas, insertadas, existentes, invalidas,
+        si la carga se detuvo por alcanzar la cuota y los errores de validacion por columna.
+        En modo `on_conflict` las filas insertadas incluyen las que resolvio el `ON CONFLICT`.
+    """
+    report = ValidationReport()
+    chunks = iter_validated_chunks(
+        path, model, report, chunk_size=chunk_size,
+        workers=workers, chunk_bytes=chunk_bytes, reader=reader)
+    return ingest_chunks(chunks, model, report, path, db=db, quota=quota,
+                         loader=loader, on_conflict=on_conflict, progress=progress)
+
+
+def ingest_csv_stream(
+        file: TextIO,
+        model: Type,
+        db: Session = Depends(get_db),
+        chunk_size: int = CSV_CHUNK_SIZE,
+        quota: Optional[int] = None,
+        loader: Optional[BulkLoader] = None,
+        on_conflict: Optional[str] = None,
+        source: str = 'stream',
+        progress: Optional[Callable[[Dict], None]] = None
+) -> dict:
+    """
+    Carga un CSV leido desde un flujo de texto (por ejemplo el cuerpo de una peticion)
+    a la tabla del modelo. Cada bloque se inserta en cuanto se termina de leer, por lo
+    que la carga avanza mientras el resto del flujo aun se esta recibiendo.
+
+    Args:
+        file (TextIO): Flujo de texto con el CSV, sin encabezado y con las columnas de `schema_for(model)`.
+        model (Type): Modelo SQLAlchemy de la tabla destino.
+        db (Session): Sesión activa de la base de datos.
+        chunk_size (int, opcional): Numero de filas por bloque.
+        quota (int, opcional): Maximo de filas a insertar. `None` indica que no hay limite.
+        loader (BulkLoader, opcional): Backend de carga masiva.
+        on_conflict (str, opcional): 'nothing' o 'update' para resolver los IDs existentes con `ON CONFLICT`.
+        source (str, opcional): Nombre del origen para los mensajes del log.
+        progress (Callable[[Dict], None], opcional): Se llama con el resumen parcial despues de cada bloque.
+
+    Returns:
+        dict: Resumen de la carga, igual que `ingest_csv`.
+    """
+    report = ValidationReport()
+    chunks = (
+        (len(chunk), validate_rows(chunk, model, report=report))
+        for chunk in iter_csv_file(file, schema_for(model), chunk_size)
+    )
+    return ingest_chunks(chunks, model, report, source, db=db, quota=quota,
+                         loader=loader, on_conflict=on_conflict, progress=progress)
+
+
+def ingest_chunks(
+        chunks: Iterable[Tuple[int, List[Dict]]],
+        model: Type,
+        report: ValidationReport,
+        source: str,
+        db: Session = Depends(get_db),
+        quota: Optional[int] = None,
+        loader: Optional[BulkLoader] = None,
+        on_conflict: Optional[str] = None,
+        progress: Optional[Callable[[Dict], None]] = None
+) -> dict:
+    """
+    Depura de IDs existentes e inserta bloques ya validados, confirmando la transaccion
+    despues de cada bloque.
+
+    Args:
+        chunks (Iterable[Tuple[int, List[Dict]]]): Filas leidas y filas validas de cada bloque.
+        model (Type): Modelo SQLAlchemy de la tabla destino.
+        report (ValidationReport): Reporte donde se acumularon los errores de validacion.
+        source (str): Nombre del origen para los mensajes del log.
+        db (Session): Sesión activa de la base de datos.
+        quota (int, opcional): Maximo de filas a insertar. `None` indica que no hay limite.
+        loader (BulkLoader, opcional): Backend de carga masiva.
+        on_conflict (str, opcional): 'nothing' o 'update' para resolver los IDs existentes con `ON CONFLICT`.
+        progress (Callable[[Dict], None], opcional): Se llama con el resumen parcial despues de cada bloque.
+
+    Returns:
+        dict: Resumen de la carga, igual que `ingest_csv`.
+    """
+    on_conflict = check_on_conflict(on_conflict)
+    loader = loader or get_bulk_loader(db)
+    index = None if on_conflict else IdIndex.for_table(model, db)
+    summary = {'read': 0, 'inserted': 0, 'existing': 0,
+               'invalid': 0, 'truncated': False}
+
+    for read, valid_rows in chunks:
+        summary['read'] += read
+        if index is None:
+            new_rows = valid_rows
+        else:
+            new_rows = get_existing_ids(valid_rows, model, db=db, index=index)
+        summary['invalid'] += read - len(valid_rows)
+        summary['existing'] += len(valid_rows) - len(new_rows)
+
+        remaining = None if quota is None else quota - summary['inserted']
+        rows = apply_row_quota(new_rows, remaining)
+        if rows:
+            if model is models.Employees:
+                track_employee_load(db, rows, on_conflict=on_conflict)
+            loader.load(model, rows, on_conflict=on_conflict)
+            db.commit()
+            if index is not None:
+                index.add(int(row['id']) for row in rows)
+            summary['inserted'] += len(rows)
+        if progress is not None:
+            progress(dict(summary))
+
+        if len(rows) < len(new_rows):
+            summary['truncated'] = True
+            logger.warning(
+                f"Se alcanzo la cuota de {quota} filas para la tabla {model.__tablename__};"
+                f" se detiene la carga de {source}.")
+            break
+
+    if report.invalid:
+        logger.error(
+            f"{report.invalid} filas invalidas en {source}. Errores: {report.errors}")
+    summary['errors'] = report.errors
+    summary['samples'] = report.samples
+    return summary
+
+
+def run_load(params: Dict, job: QueuedJob) -> Dict:
+    """
+    Handler de los trabajos 'load': carga los archivos CSV de `MODELS` en orden, cada
+    uno con su propia sesion. Volver a ejecutarlo tras una interrupcion es seguro, ya
+    que los IDs existentes se omiten o se resuelven con `ON CONFLICT`.
+
+    Args:
+        params (Dict): `chunk_size`, `quota`, `on_conflict` y `workers`, como en `ingest_csv`.
+        job (QueuedJob): Trabajo de la cola; su avance es el resumen parcial de cada tabla.
+
+    Returns:
+        Dict: Resumen de la carga por tabla.
+    """
+    tables: Dict[str, Dict] = {}
+    job.track(lambda: {table: dict(summary) for table, summary in list(tables.items())})
+    for entry in MODELS:
+        if not entry['path'].endswith('.csv'):
+            raise ValueError(f"El archivo a cargar debe ser un CSV: {entry['path']}")
+        name = entry['model'].__tablename__
+
+        def progress(summary: Dict, name: str = name) -> None:
+            tables[name] = summary
+
+        db = local_session()
+        try:
+            tables[name] = ingest_csv(
+                entry['path'], entry['model'], db=db,
+                chunk_size=params.get('chunk_size', CSV_CHUNK_SIZE), quota=params.get('quota'),
+                on_conflict=params.get('on_conflict'), workers=params.get('workers', CSV_WORKERS),
+                progress=progress)
+        finally:
+            db.close()
+    return {'tables': tables}
+
+
+scheduler.register('load', run_load)
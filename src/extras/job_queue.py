@@ -0,0 +1,382 @@
+"""
+Cola de trabajos en segundo plano para las cargas, respaldos y restauraciones. Los
+endpoints encolan el trabajo y responden de inmediato con su ID; un grupo fijo de
+`JOB_QUEUE_WORKERS` hilos (aparte del threadpool que atiende las peticiones) los ejecuta
+por prioridad, respetando el limite de trabajos simultaneos de cada tipo
+(`JOB_QUEUE_KINDS`). Asi el trabajo pesado nunca ocupa mas que unas pocas conexiones
+del pool y la latencia del resto de la API no depende de el.
+
+Cada trabajo se guarda en la tabla `JobsQueue`. El worker que lo tiene registra un latido
+cada `JOB_QUEUE_HEARTBEAT` segundos junto con el avance; si el proceso se reinicia o
+muere, el latido se detiene y pasados `JOB_QUEUE_STALE_AFTER` segundos cualquier worker
+lo reclama y lo vuelve a ejecutar desde el principio. Los trabajos son idempotentes: la
+carga omite los IDs existentes, la restauracion sobrescribe por ID y un snapshot
+interrumpido nunca llega a ser `LATEST`.
+"""
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import and_, or_, select
+from sqlalchemy.engine import Engine
+
+from src.extras import models
+from src.extras.database import engine
+from src.extras.constants import (
+    JOB_QUEUE_HEARTBEAT, JOB_QUEUE_KINDS, JOB_QUEUE_MAX_ATTEMPTS, JOB_QUEUE_MAX_PENDING,
+    JOB_QUEUE_RETENTION, JOB_QUEUE_STALE_AFTER, JOB_QUEUE_WORKERS
+)
+from .logger import custom_logger
+
+logger = custom_logger()
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_table = models.QueuedJobs.__table__
+
+
+class QueueFull(Exception):
+    """
+    La cola del worker ya tiene `JOB_QUEUE_MAX_PENDING` trabajos en espera.
+    """
+
+
+class QueuedJob:
+    """
+    Trabajo de la cola en este proceso. El avance lo entrega el handler con `track`
+    (una funcion que devuelve el avance actual) y se consulta con `current_progress`.
+    """
+
+    def __init__(self, id: str, kind: str, params: Dict, priority: int, created_at: float,
+                 attempts: int = 0, progress: Optional[Dict] = None):
+        self.id = id
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.created_at = created_at
+        self.attempts = attempts
+        self.status = QUEUED
+        self.progress = progress
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._provider: Optional[Callable[[], Dict]] = None
+
+    def track(self, provider: Callable[[], Dict]) -> None:
+        """
+        Registra la funcion que devuelve el avance del trabajo.
+        """
+        self._provider = provider
+
+    def current_progress(self) -> Optional[Dict]:
+        provider = self._provider
+        return provider() if provider is not None else self.progress
+
+    def as_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'priority': self.priority,
+            'params': self.params,
+            'attempts': self.attempts,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'progress': self.current_progress(),
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+def _row_dict(row) -> Dict:
+    return {
+        'id': row.id,
+        'kind': row.kind,
+        'status': row.status,
+        'priority': row.priority,
+        'params': row.params,
+        'attempts': row.attempts,
+        'created_at': row.created_at,
+        'started_at': row.started_at,
+        'finished_at': row.finished_at,
+        'progress': row.progress,
+        'result': row.result,
+        'error': row.error,
+    }
+
+
+class JobQueue:
+    """
+    Planificador de trabajos del proceso. Los tipos de trabajo se registran con
+    `register`, los trabajos se encolan con `submit` y los hilos se inician con `start`.
+    """
+
+    def __init__(self, engine: Engine, workers: int = JOB_QUEUE_WORKERS,
+                 max_pending: int = JOB_QUEUE_MAX_PENDING, kinds: Dict = JOB_QUEUE_KINDS):
+        self.engine = engine
+        self.workers = workers
+        self.max_pending = max_pending
+        self.kinds = kinds
+        # Identifica a este worker en la columna `owner`
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, Callable[[Dict, QueuedJob], Dict]] = {}
+        self._pending: List[QueuedJob] = []
+        # Cupos apartados por `submit` mientras guarda el trabajo, fuera del candado
+        self._reserved = 0
+        self._order: Dict[str, int] = {}
+        self._jobs: Dict[str, QueuedJob] = {}
+        self._running: Counter = Counter()
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def register(self, kind: str, handler: Callable[[Dict, QueuedJob], Dict]) -> None:
+        """
+        Registra la funcion que ejecuta un tipo de trabajo. Recibe los parametros (JSON)
+        y el trabajo, y devuelve el resultado; si lanza una excepcion el trabajo falla.
+
+        Args:
+            kind (str): Tipo de trabajo, una llave de `JOB_QUEUE_KINDS`.
+            handler (Callable[[Dict, QueuedJob], Dict]): Funcion del trabajo.
+        """
+        if kind not in self.kinds:
+            raise ValueError(f"Tipo de trabajo desconocido: {kind}")
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, params: Dict, priority: Optional[int] = None) -> QueuedJob:
+        """
+        Encola un trabajo y lo guarda en `JobsQueue`.
+
+        Args:
+            kind (str): Tipo de trabajo registrado.
+            params (Dict): Parametros del trabajo (serializables en JSON).
+            priority (int, opcional): Prioridad; por defecto la del tipo en `JOB_QUEUE_KINDS`.
+
+        Returns:
+            QueuedJob: Trabajo encolado; su estado se consulta con `get`.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Tipo de trabajo desconocido: {kind}")
+        if priority is None:
+            priority = self.kinds[kind]['priority']
+        job = QueuedJob(uuid.uuid4().hex, kind, params, priority, time.time())
+        with self._condition:
+            if len(self._pending) + self._reserved >= self.max_pending:
+                raise QueueFull(f"La cola ya tiene {self.max_pending} trabajos en espera")
+            self._reserved += 1
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(_table.insert().values(
+                    id=job.id, kind=kind, status=QUEUED, priority=priority, params=params,
+                    attempts=0, owner=self.owner, heartbeat=job.created_at,
+                    created_at=job.created_at))
+        except Exception:
+            with self._condition:
+                self._reserved -= 1
+            raise
+        with self._condition:
+            self._reserved -= 1
+            self._enqueue(job)
+        logger.info(f"Trabajo {job.id} ({kind}) encolado con prioridad {priority}")
+        return job
+
+    def _enqueue(self, job: QueuedJob) -> None:
+        self._order[job.id] = next(self._sequence)
+        self._pending.append(job)
+        self._jobs[job.id] = job
+        self._condition.notify_all()
+
+    def _take(self) -> Optional[QueuedJob]:
+        with self._condition:
+            while not self._stopping.is_set():
+                # El de mayor prioridad entre los tipos que aun tienen cupo; a igual prioridad, el mas antiguo
+                ready = [job for job in self._pending
+                         if self._running[job.kind] < self.kinds[job.kind]['concurrency']]
+                if ready:
+                    job = max(ready, key=lambda job: (job.priority, -self._order[job.id]))
+                    self._pending.remove(job)
+                    self._running[job.kind] += 1
+                    return job
+                self._condition.wait()
+            return None
+
+    def _work(self) -> None:
+        while True:
+            job = self._take()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                with self._condition:
+                    self._running[job.kind] -= 1
+                    self._jobs.pop(job.id, None)
+                    self._order.pop(job.id, None)
+                    self._condition.notify_all()
+
+    def _run(self, job: QueuedJob) -> None:
+        job.attempts += 1
+        job.started_at = time.time()
+        if job.attempts > JOB_QUEUE_MAX_ATTEMPTS:
+            job.status = FAILED
+            job.error = f"Se interrumpio {job.attempts - 1} veces sin terminar"
+        else:
+            job.status = RUNNING
+            self._save(job, status=RUNNING, attempts=job.attempts, started_at=job.started_at)
+            try:
+                job.result = self._handlers[job.kind](job.params, job)
+                job.status = DONE
+            except Exception as e:
+                logger.error(f"Error en el trabajo {job.id} ({job.kind}): {e}")
+                job.status, job.error = FAILED, str(e)
+        job.finished_at = time.time()
+        self._save(job, status=job.status, attempts=job.attempts, progress=job.current_progress(),
+                   result=job.result, error=job.error, finished_at=job.finished_at)
+        logger.info(f"Trabajo {job.id} ({job.kind}) terminado: {job.status}")
+
+    def _save(self, job: QueuedJob, **values) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(_table.update()
+                               .where(and_(_table.c.id == job.id, _table.c.owner == self.owner))
+                               .values(heartbeat=time.time(), **values))
+
+    def _beat(self) -> None:
+        with self._condition:
+            jobs = list(self._jobs.values())
+        now = time.time()
+        with self.engine.begin() as connection:
+            for job in jobs:
+                values = {'heartbeat': now}
+                if job.status == RUNNING:
+                    values['progress'] = job.current_progress()
+                connection.execute(_table.update()
+                                   .where(and_(_table.c.id == job.id, _table.c.owner == self.owner))
+                                   .values(**values))
+
+    def _adopt(self) -> int:
+        # Reclama los trabajos sin latido reciente: en espera o en curso en un worker que ya no existe
+        cutoff = time.time() - JOB_QUEUE_STALE_AFTER
+        with self._condition:
+            capacity = self.max_pending - len(self._pending) - self._reserved
+        if capacity <= 0:
+            return 0
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                select(_table)
+                .where(and_(_table.c.status.in_((QUEUED, RUNNING)),
+                            _table.c.kind.in_(list(self._handlers)),
+                            or_(_table.c.heartbeat.is_(None), _table.c.heartbeat < cutoff)))
+                .order_by(_table.c.priority.desc(), _table.c.created_at)
+                .limit(capacity)
+            ).fetchall()
+
+        adopted = 0
+        for row in rows:
+            now = time.time()
+            # Compare-and-set sobre el duenio y el latido: si otro worker lo reclamo primero, no se toca
+            with self.engine.begin() as connection:
+                claimed = connection.execute(
+                    _table.update()
+                    .where(and_(_table.c.id == row.id, _table.c.status == row.status,
+                                _table.c.owner == row.owner if row.owner is not None
+                                else _table.c.owner.is_(None),
+                                _table.c.heartbeat == row.heartbeat if row.heartbeat is not None
+                                else _table.c.heartbeat.is_(None)))
+                    .values(owner=self.owner, heartbeat=now, status=QUEUED)
+                ).rowcount
+            if not claimed:
+                continue
+            job = QueuedJob(row.id, row.kind, row.params, row.priority, row.created_at,
+                            attempts=row.attempts, progress=row.progress)
+            with self._condition:
+                self._enqueue(job)
+            adopted += 1
+            logger.warning(f"Trabajo {row.id} ({row.kind}) retomado de {row.owner} "
+                           f"(intento {row.attempts + 1})")
+        return adopted
+
+    def _purge(self) -> None:
+        cutoff = time.time() - JOB_QUEUE_RETENTION
+        with self.engine.begin() as connection:
+            connection.execute(_table.delete().where(and_(
+                _table.c.status.in_((DONE, FAILED)), _table.c.finished_at < cutoff)))
+
+    def _maintain(self) -> None:
+        while not self._stopping.wait(JOB_QUEUE_HEARTBEAT):
+            for task in (self._beat, self._adopt, self._purge):
+                try:
+                    task()
+                except Exception as e:
+                    logger.error(f"Error en el mantenimiento de la cola de trabajos: {e}")
+
+    def start(self) -> 'JobQueue':
+        """
+        Retoma los trabajos abandonados e inicia los hilos de trabajo y de latido.
+        """
+        self._stopping.clear()
+        try:
+            self._adopt()
+        except Exception as e:
+            logger.error(f"No se pudieron retomar los trabajos pendientes: {e}")
+        self._threads = [
+            threading.Thread(target=self._work, name=f'jobs-{index}', daemon=True)
+            for index in range(self.workers)
+        ]
+        self._threads.append(threading.Thread(target=self._maintain, name='jobs-heartbeat', daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Detiene los hilos. Los trabajos en curso terminan; los que quedan en espera los
+        retoma este u otro worker cuando su latido expira.
+        """
+        self._stopping.set()
+        with self._condition:
+            self._condition.notify_all()
+
+    def get(self, id: str) -> Optional[Dict]:
+        """
+        Obtiene el estado de un trabajo: desde memoria si lo ejecuta este worker (con el
+        avance al momento) o desde `JobsQueue` si lo ejecuta otro.
+
+        Args:
+            id (str): ID del trabajo.
+
+        Returns:
+            Optional[Dict]: Estado del trabajo, o `None` si no existe.
+        """
+        with self._condition:
+            job = self._jobs.get(id)
+        if job is not None:
+            return job.as_dict()
+        with self.engine.connect() as connection:
+            row = connection.execute(select(_table).where(_table.c.id == id)).first()
+        return _row_dict(row) if row is not None else None
+
+    def stats(self) -> Dict:
+        """
+        Trabajos en espera y en curso de este worker, por tipo, con sus limites.
+        """
+        with self._condition:
+            pending = Counter(job.kind for job in self._pending)
+            return {
+                'owner': self.owner,
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'kinds': {kind: {'pending': pending[kind], 'running': self._running[kind], **limits}
+                          for kind, limits in self.kinds.items()},
+            }
+
+
+scheduler = JobQueue(engine)
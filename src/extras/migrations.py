@@ -0,0 +1,185 @@
+"""
+Migracion de `Employees.datetime` (texto) a la columna tipada `Employees.hired_at`.
+
+Uso:
+    python -m src.extras.migrations            # agrega columna e indices, completa hired_at y construye HiresSummary
+    python -m src.extras.migrations --rebuild-summary  # ademas recalcula HiresSummary desde Employees
+    python -m src.extras.migrations --explain  # verifica con EXPLAIN que QUARTERS y AVG_HIRED usan los indices
+"""
+import argparse
+from typing import Dict, List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from src.extras import models
+from src.extras.dates import parse_iso_datetime
+from src.extras.events import touch
+from src.extras.reporting import ensure_hires_summary, rebuild_hires_summary
+from src.extras.constants import MIGRATION_BATCH_SIZE, MIGRATION_LOCK_ID
+from src.sql.queries import QUARTERS, AVG_HIRED
+from .logger import custom_logger
+
+logger = custom_logger()
+
+
+def ensure_schema(engine: Engine) -> None:
+    """
+    Agrega la columna `hired_at` y los indices de `Employees` si la tabla ya existia sin
+    ellos. Agregar una columna nula sin valor por defecto no reescribe la tabla, y en
+    PostgreSQL los indices se crean con `CONCURRENTLY` para no bloquear escrituras. En
+    PostgreSQL todo se hace bajo un advisory lock, por lo que varios procesos pueden
+    ejecutar la migracion a la vez: el primero la aplica y los demas no encuentran nada
+    pendiente.
+
+    Args:
+        engine (Engine): Motor de la base de datos.
+    """
+    table = models.Employees.__table__
+    preparer = engine.dialect.identifier_preparer
+    quoted_table = preparer.format_table(table)
+    postgres = engine.dialect.name == 'postgresql'
+
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if postgres:
+            # Lock de sesion: CREATE INDEX CONCURRENTLY no puede correr dentro de una transaccion
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {'key': MIGRATION_LOCK_ID})
+        try:
+            inspector = inspect(connection)
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+
+            if 'hired_at' not in columns:
+                column_type = table.c.hired_at.type.compile(dialect=engine.dialect)
+                if_not_exists = 'IF NOT EXISTS ' if postgres else ''
+                connection.execute(text(
+                    f"ALTER TABLE {quoted_table} ADD COLUMN {if_not_exists}hired_at {column_type}"))
+                logger.info(f"Columna hired_at agregada a {table.name}")
+
+            for index in table.indexes:
+                if index.name in indexes:
+                    continue
+                index_columns = ', '.join(preparer.quote(column.name) for column in index.columns)
+                concurrently = 'CONCURRENTLY ' if postgres else ''
+                connection.execute(text(
+                    f"CREATE INDEX {concurrently}IF NOT EXISTS {preparer.quote(index.name)} "
+                    f"ON {quoted_table} ({index_columns})"))
+                logger.info(f"Indice {index.name} creado")
+        finally:
+            if postgres:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': MIGRATION_LOCK_ID})
+
+
+def backfill_hired_at(db: Session, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    Completa `hired_at` a partir de `datetime` en lotes ordenados por `id`, haciendo commit
+    en cada lote para no mantener bloqueos largos sobre la tabla. Las fechas invalidas
+    quedan en nulo.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        batch_size (int, opcional): Filas por lote.
+
+    Returns:
+        int: Numero de filas actualizadas.
+    """
+    employees = models.Employees
+    last_id = None
+    updated = 0
+    while True:
+        query = db.query(employees.id, employees.datetime) \
+            .filter(employees.hired_at.is_(None)) \
+            .order_by(employees.id)
+        if last_id is not None:
+            query = query.filter(employees.id > last_id)
+        rows = query.limit(batch_size).all()
+        if not rows:
+            break
+
+        values = [
+            {'id': id, 'hired_at': parse_iso_datetime(datetime)}
+            for id, datetime in rows
+        ]
+        values = [value for value in values if value['hired_at'] is not None]
+        if values:
+            db.bulk_update_mappings(employees, values)
+            touch(db, employees.__tablename__)
+        db.commit()
+        updated += len(values)
+        last_id = rows[-1][0]
+    return updated
+
+
+def _plan_indexes(plan: Dict) -> List[str]:
+    found = [plan['Index Name']] if 'Index Name' in plan else []
+    for child in plan.get('Plans', []):
+        found.extend(_plan_indexes(child))
+    return found
+
+
+def explain_index_usage(db: Session, sql: str, disable_seqscan: bool = True) -> List[str]:
+    """
+    Ejecuta `EXPLAIN` sobre una consulta y devuelve los indices que usa el plan.
+    Solo aplica a PostgreSQL.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        sql (str): Consulta a analizar.
+        disable_seqscan (bool, opcional): Desactiva los seq scans en la transaccion, para
+            comprobar que el indice es utilizable aun con tablas pequeñas.
+
+    Returns:
+        List[str]: Nombres de los indices presentes en el plan.
+    """
+    if disable_seqscan:
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    db.rollback()
+    return _plan_indexes(plan[0]['Plan'])
+
+
+def migrate(engine: Engine, batch_size: int = MIGRATION_BATCH_SIZE,
+            rebuild_summary: bool = False) -> int:
+    """
+    Ejecuta la migracion completa: tablas faltantes, columna, indices, backfill y el resumen de
+    contrataciones (se construye si esta vacio, o siempre con `rebuild_summary`).
+
+    Args:
+        engine (Engine): Motor de la base de datos.
+        batch_size (int, opcional): Filas por lote del backfill.
+        rebuild_summary (bool, opcional): Recalcula `HiresSummary` aunque ya tenga datos.
+
+    Returns:
+        int: Numero de filas completadas.
+    """
+    models.Base.metadata.create_all(bind=engine)
+    ensure_schema(engine)
+    with Session(bind=engine) as db:
+        updated = backfill_hired_at(db, batch_size=batch_size)
+        if rebuild_summary:
+            rebuild_hires_summary(db)
+            logger.info("HiresSummary reconstruido")
+        elif ensure_hires_summary(db):
+            logger.info("HiresSummary construido")
+    logger.info(f"hired_at completado en {updated} filas")
+    return updated
+
+
+if __name__ == '__main__':
+    from src.extras.database import engine
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--batch-size', type=int, default=MIGRATION_BATCH_SIZE)
+    parser.add_argument('--explain', action='store_true')
+    parser.add_argument('--rebuild-summary', action='store_true')
+    args = parser.parse_args()
+
+    if args.explain:
+        with Session(bind=engine) as db:
+            for name, sql in (('QUARTERS', QUARTERS), ('AVG_HIRED', AVG_HIRED)):
+                indexes = explain_index_usage(db, sql)
+                print(f"{name}: {', '.join(indexes) if indexes else 'sin indices'}")
+    else:
+        updated = migrate(engine, batch_size=args.batch_size, rebuild_summary=args.rebuild_summary)
+        print(f"Filas actualizadas: {updated}")
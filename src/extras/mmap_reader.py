@@ -0,0 +1,156 @@
+import csv
+import io
+import mmap
+from collections.abc import Mapping
+from itertools import accumulate, islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_BOM = b'\xef\xbb\xbf'
+_OFFSET_SIZE = 8
+
+
+class LazyRow(Mapping):
+    """
+    Fila de un CSV respaldada por el `memoryview` compartido del archivo mapeado en memoria.
+    La fila solo guarda su posicion y los limites de sus campos; cada campo se entrega como
+    un `memoryview` o se decodifica cuando se accede a su columna, sin conservar el valor.
+    Los registros con comillas o las lineas muy largas se parsean con `csv` y guardan sus valores.
+    """
+
+    __slots__ = ('_index', '_view', '_layout', '_values')
+
+    def __init__(
+            self,
+            index: Dict[str, int],
+            view: memoryview,
+            layout: Optional[bytes] = None,
+            values: Optional[List[str]] = None
+    ):
+        self._index = index
+        self._view = view
+        # Posicion de la linea en el archivo (8 bytes) seguida de los limites de sus campos
+        self._layout = layout
+        self._values = values
+
+    def field(self, key: str) -> memoryview:
+        """
+        Devuelve el campo sin decodificar como un `memoryview` (sin copiar bytes).
+
+        Args:
+            key (str): Nombre de la columna.
+
+        Returns:
+            memoryview: Bytes del campo.
+        """
+        position = self._index[key]
+        if position >= len(self):
+            raise KeyError(key)
+        if self._values is not None:
+            return memoryview(self._values[position].encode('utf-8'))
+        start = int.from_bytes(self._layout[:_OFFSET_SIZE], 'little')
+        bounds = self._layout
+        return self._view[start + bounds[_OFFSET_SIZE + position]:
+                          start + bounds[_OFFSET_SIZE + position + 1] - 1]
+
+    def __getitem__(self, key: str) -> str:
+        if self._values is not None:
+            position = self._index[key]
+            if position >= len(self._values):
+                raise KeyError(key)
+            return self._values[position]
+        return str(self.field(key), 'utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        return islice(iter(self._index), len(self))
+
+    def __len__(self) -> int:
+        if self._values is not None:
+            return len(self._values)
+        return len(self._layout) - _OFFSET_SIZE - 1
+
+
+def _line_layout(buffer: mmap.mmap, start: int, end: int) -> Optional[bytes]:
+    """
+    Codifica en un solo objeto `bytes` la posicion de una linea sin comillas y los
+    limites de sus campos, para que cada fila ocupe una sola asignacion extra. Las comas
+    se buscan directamente en el archivo mapeado, sin copiar la linea ni sus campos.
+
+    Returns:
+        bytes, opcional: `start` en 8 bytes seguido del inicio relativo de cada campo y,
+        al final, la longitud de la linea mas uno. El campo `i` va de `bounds[i]` a
+        `bounds[i + 1] - 1`. `None` si la linea es demasiado larga para codificarse en bytes.
+    """
+    if end - start > 254:
+        return None
+    layout = bytearray(start.to_bytes(_OFFSET_SIZE, 'little'))
+    layout.append(0)
+    comma = buffer.find(b',', start, end)
+    while comma != -1:
+        layout.append(comma + 1 - start)
+        comma = buffer.find(b',', comma + 1, end)
+    layout.append(end - start + 1)
+    return bytes(layout)
+
+
+def _quoted_record(buffer: mmap.mmap, start: int, next_start: int) -> Tuple[List[str], int]:
+    """
+    Parsea con `csv` el registro con comillas que empieza en `start`. Mientras las comillas
+    queden abiertas, el registro continua en las lineas siguientes (saltos de linea dentro
+    de un campo entre comillas).
+
+    Returns:
+        Tuple[List[str], int]: Valores del registro y posicion donde empieza el siguiente.
+    """
+    size = len(buffer)
+    record = buffer[start:next_start]
+    while record.count(b'"') % 2 and next_start < size:
+        newline = buffer.find(b'\n', next_start)
+        next_start = size if newline == -1 else newline + 1
+        record = buffer[start:next_start]
+    return next(csv.reader(io.StringIO(record.decode('utf-8'), newline='')), []), next_start
+
+
+def iter_mmap_rows(path: str, schema: List[str]) -> Iterator[LazyRow]:
+    """
+    Recorre un CSV mapeado en memoria entregando filas perezosas. Los limites de filas y
+    campos se ubican sobre los bytes crudos; los registros con comillas se delegan a `csv`,
+    incluidos los que tienen saltos de linea dentro de un campo entre comillas.
+
+    Args:
+        path (str): Ruta al archivo CSV.
+        schema (List[str]): Nombres de las columnas.
+
+    Yields:
+        LazyRow: Fila cuyos campos se decodifican al accederlos.
+    """
+    index = {key: position for position, key in enumerate(schema)}
+    with Path(path).open(mode='rb') as file:
+        if file.seek(0, 2) == 0:
+            return
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # Las filas comparten este memoryview; el mmap se cierra cuando se libera la ultima fila
+    view = memoryview(buffer)
+    size = len(buffer)
+    start = len(_BOM) if buffer[:len(_BOM)] == _BOM else 0
+    while start < size:
+        newline = buffer.find(b'\n', start)
+        next_start = size if newline == -1 else newline + 1
+        end = next_start if newline == -1 else newline
+        if end > start and buffer[end - 1] == ord('\r'):
+            end -= 1
+
+        if end == start:
+            yield LazyRow(index, view, values=[])
+        elif buffer.find(b'"', start, end) != -1:
+            values, next_start = _quoted_record(buffer, start, next_start)
+            yield LazyRow(index, view, values=values)
+        else:
+            layout = _line_layout(buffer, start, end)
+            if layout is None:
+                values = next(csv.reader([str(view[start:end], 'utf-8')]))
+                yield LazyRow(index, view, values=values)
+            else:
+                yield LazyRow(index, view, layout)
+        start = next_start
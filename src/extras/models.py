@@ -1,5 +1,8 @@
-from sqlalchemy import Column, Integer, String
+from typing import Dict, Mapping, Type
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Float, Index, Integer, String, Text
+from sqlalchemy.orm import validates
 from .database import Base
+from .dates import parse_iso_datetime
 
 
 class Jobs(Base):
@@ -9,13 +12,96 @@ class Jobs(Base):
 
 class Employees(Base):
     __tablename__ = 'Employees'
+    __table_args__ = (
+        Index('ix_Employees_department_id_job_id', 'department_id', 'job_id'),
+        Index('ix_Employees_department_id', 'department_id'),
+        Index('ix_Employees_hired_at', 'hired_at'),
+    )
     id = Column(Integer, primary_key=True, nullable=False)
     name = Column(String, nullable=False)
-    datetime = Column(String, nullable=False)
+    datetime = Column(String, nullable=False, info={'format': 'iso8601'})
     department_id = Column(Integer, nullable=False)
     job_id = Column(Integer, nullable=False)
+    # Fecha de contratacion tipada, derivada de `datetime` en cada escritura
+    hired_at = Column(DateTime(timezone=True), nullable=True, info={
+        'derive': lambda row: parse_iso_datetime(row.get('datetime'))})
+
+    @validates('datetime')
+    def _set_hired_at(self, key, value):
+        self.hired_at = parse_iso_datetime(value)
+        return value
 
 class Departments(Base):
     __tablename__ = 'Departments'
     id = Column(Integer, primary_key=True, nullable=False)
-    department = Column(String, nullable=False)
\ No newline at end of file
+    department = Column(String, nullable=False)
+
+class HiresSummary(Base):
+    """
+    Contrataciones agregadas por departamento, trabajo, año y cuarto. Se mantiene de
+    forma incremental en cada escritura sobre `Employees` (ver `src.extras.reporting`).
+    """
+    __tablename__ = 'HiresSummary'
+    department_id = Column(Integer, primary_key=True, nullable=False)
+    job_id = Column(Integer, primary_key=True, nullable=False)
+    year = Column(Integer, primary_key=True, nullable=False)
+    quarter = Column(Integer, primary_key=True, nullable=False)
+    hired = Column(Integer, nullable=False, default=0)
+
+class TableVersions(Base):
+    """
+    Version y momento del ultimo cambio de cada tabla, compartidos entre workers. Los
+    incrementa el bus de invalidacion (`src.extras.bus`) despues de cada commit y de
+    ellos se derivan los `ETag` y `Last-Modified` de los endpoints de lectura.
+    """
+    __tablename__ = 'TableVersions'
+    name = Column(String, primary_key=True, nullable=False)
+    version = Column(BigInteger, nullable=False, default=0)
+    modified_at = Column(Float, nullable=False)
+
+class QueuedJobs(Base):
+    """
+    Trabajos de la cola en segundo plano (ver `src.extras.job_queue`). Se guardan para
+    consultar su estado desde cualquier worker y para retomarlos despues de un reinicio.
+    """
+    __tablename__ = 'JobsQueue'
+    __table_args__ = (
+        Index('ix_JobsQueue_status_heartbeat', 'status', 'heartbeat'),
+    )
+    id = Column(String(32), primary_key=True, nullable=False)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    priority = Column(Integer, nullable=False, default=0)
+    params = Column(JSON, nullable=False)
+    progress = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Worker que ejecuta el trabajo y ultimo latido (marca de tiempo Unix)
+    owner = Column(String, nullable=True)
+    heartbeat = Column(Float, nullable=True)
+    created_at = Column(Float, nullable=False)
+    started_at = Column(Float, nullable=True)
+    finished_at = Column(Float, nullable=True)
+
+
+def column_values(model: Type, row: Mapping) -> Dict:
+    """
+    Construye los valores de todas las columnas del modelo a partir de una fila, calculando
+    las columnas derivadas (`info['derive']`) que la fila no trae.
+
+    Args:
+        model (Type): Modelo SQLAlchemy.
+        row (Mapping): Fila con los valores de entrada.
+
+    Returns:
+        Dict: Valor de cada columna del modelo.
+    """
+    values = {}
+    for column in model.__table__.columns:
+        value = row.get(column.name)
+        derive = column.info.get('derive')
+        if value is None and derive is not None:
+            value = derive(row)
+        values[column.name] = value
+    return values
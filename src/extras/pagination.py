@@ -0,0 +1,162 @@
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Type, Union
+import orjson
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from src.extras.database import local_session
+from src.extras.constants import MAX_PAGE_SIZE, STREAM_BATCH_SIZE
+from src.extras.columnar import FORMATS, columnar_response
+from src.extras.responses import json_rows
+
+
+def keyset_page(
+        db: Session,
+        model: Type,
+        after_id: Optional[int],
+        limit: int
+) -> Tuple[List[Dict], Optional[int]]:
+    """
+    Obtiene una pagina de la tabla ordenada por `id`, empezando despues de `after_id`.
+    A diferencia de `OFFSET`, el costo no crece con la profundidad de la pagina. Las
+    filas se leen como tuplas, sin construir objetos ORM.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        model (Type): Modelo SQLAlchemy de la tabla.
+        after_id (int, opcional): Ultimo ID de la pagina anterior.
+        limit (int): Numero maximo de filas de la pagina.
+
+    Returns:
+        Tuple[List[Dict], Optional[int]]: Filas de la pagina y el cursor de la siguiente
+        (`None` si no hay mas filas).
+    """
+    query = db.query(*model.__table__.columns).order_by(model.id)
+    if after_id is not None:
+        query = query.filter(model.id > after_id)
+    names = model.__table__.columns.keys()
+    rows = [dict(zip(names, row)) for row in query.limit(limit)]
+    next_cursor = rows[-1]['id'] if len(rows) == limit else None
+    return rows, next_cursor
+
+
+def all_rows(db: Session, model: Type) -> List[Dict]:
+    """
+    Lee la tabla completa ordenada por `id` como diccionarios planos, sin construir
+    objetos ORM.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        model (Type): Modelo SQLAlchemy de la tabla.
+
+    Returns:
+        List[Dict]: Columnas de cada fila.
+    """
+    names = model.__table__.columns.keys()
+    return [dict(zip(names, row)) for row in
+            db.query(*model.__table__.columns).order_by(model.id)]
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[int]) -> None:
+    """
+    Agrega a la respuesta el cursor de la siguiente pagina en el header `X-Next-After-Id`.
+
+    Args:
+        response (Response): Respuesta de FastAPI.
+        next_cursor (int, opcional): Cursor de la siguiente pagina.
+    """
+    if next_cursor is not None:
+        response.headers['X-Next-After-Id'] = str(next_cursor)
+
+
+def iter_ndjson(
+        model: Type,
+        after_id: Optional[int] = None,
+        batch_size: int = STREAM_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    Lee la tabla con un cursor del lado del servidor y serializa cada fila como una
+    linea JSON a medida que llega. Usa su propia sesion, ya que la de `get_db` se
+    cierra antes de que termine de enviarse la respuesta.
+
+    Args:
+        model (Type): Modelo SQLAlchemy de la tabla.
+        after_id (int, opcional): Exportar solo las filas con `id` mayor a este valor.
+        batch_size (int, opcional): Filas que se traen por viaje al servidor.
+
+    Yields:
+        bytes: Una fila serializada terminada en salto de linea.
+    """
+    columns = list(model.__table__.columns)
+    names = [column.name for column in columns]
+    db = local_session()
+    try:
+        query = db.query(*columns).order_by(model.id)
+        if after_id is not None:
+            query = query.filter(model.id > after_id)
+        rows = query.execution_options(
+            stream_results=True).yield_per(batch_size)
+        for row in rows:
+            # Mismo formato de fechas que las respuestas con orjson; las fechas sin zona se asumen UTC
+            yield orjson.dumps(dict(zip(names, row)), default=str,
+                               option=orjson.OPT_NAIVE_UTC | orjson.OPT_APPEND_NEWLINE)
+    finally:
+        db.close()
+
+
+def ndjson_response(model: Type, after_id: Optional[int] = None) -> StreamingResponse:
+    """
+    Crea una respuesta NDJSON en streaming con todas las filas de la tabla.
+
+    Args:
+        model (Type): Modelo SQLAlchemy de la tabla.
+        after_id (int, opcional): Exportar solo las filas con `id` mayor a este valor.
+
+    Returns:
+        StreamingResponse: Respuesta `application/x-ndjson`.
+    """
+    return StreamingResponse(iter_ndjson(model, after_id=after_id), media_type='application/x-ndjson')
+
+
+def list_table(
+        db: Session,
+        model: Type,
+        schema: Type[BaseModel],
+        response: Response,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        format: str = 'json',
+        full_table: Optional[Callable[[Session], List[Dict]]] = None
+) -> Union[Response, List[Dict]]:
+    """
+    Resuelve los listados `GET /` de una tabla; lo usan los routers sincronos y, con
+    `run_sync`, los asincronos. 'ndjson', 'arrow' y 'parquet' exportan la tabla en
+    streaming; 'json' devuelve una pagina si se entrega `after_id` o `limit` y, si no,
+    la tabla completa.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        model (Type): Modelo SQLAlchemy de la tabla.
+        schema (Type[BaseModel]): Schema de cada fila en la respuesta JSON.
+        response (Response): Respuesta donde se agrega el cursor de la siguiente pagina.
+        after_id (int, opcional): Cursor de paginacion.
+        limit (int, opcional): Tamaño de pagina.
+        format (str, opcional): 'json', 'ndjson', 'arrow' o 'parquet'.
+        full_table (Callable[[Session], List[Dict]], opcional): Lectura de la tabla completa,
+            por ejemplo desde una cache; por defecto `all_rows`.
+
+    Returns:
+        Response | List[Dict]: Respuesta en streaming o filas en JSON.
+    """
+    if format == 'ndjson':
+        return ndjson_response(model, after_id=after_id)
+    if format in FORMATS:
+        return columnar_response(model, format, after_id=after_id)
+
+    if after_id is None and limit is None:
+        return json_rows(full_table(db) if full_table is not None else all_rows(db, model), schema)
+
+    rows, next_cursor = keyset_page(db, model, after_id, limit or MAX_PAGE_SIZE)
+    set_next_cursor(response, next_cursor)
+    return json_rows(rows, schema, next_cursor=next_cursor)
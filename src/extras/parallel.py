@@ -0,0 +1,111 @@
+import csv
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple, Type
+
+from src.extras.constants import CSV_WORKERS, CSV_PARALLEL_CHUNK_BYTES
+from src.extras.validation import ValidationReport, get_validator
+
+
+def split_byte_ranges(path: str, chunk_bytes: int = CSV_PARALLEL_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """
+    Divide un archivo en rangos de bytes de aproximadamente `chunk_bytes` alineados a
+    saltos de linea, de modo que ninguna fila quede partida entre dos rangos.
+
+    Nota: asume que los campos no contienen saltos de linea dentro de comillas.
+
+    Args:
+        path (str): Ruta al archivo.
+        chunk_bytes (int, opcional): Tamaño objetivo de cada rango.
+
+    Returns:
+        List[Tuple[int, int]]: Lista ordenada de rangos `(inicio, fin)`.
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    start = 0
+    with open(path, 'rb') as file:
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                file.seek(end)
+                file.readline()
+                end = file.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_range(
+        path: str,
+        start: int,
+        end: int,
+        schema: List[str],
+        model: Type
+) -> Tuple[int, List[Dict], ValidationReport]:
+    """
+    Parsea y valida un rango de bytes de un CSV. Se ejecuta dentro de un proceso worker.
+
+    Args:
+        path (str): Ruta al archivo CSV.
+        start (int): Byte inicial del rango.
+        end (int): Byte final del rango (exclusivo).
+        schema (List[str]): Nombres de las columnas del CSV.
+        model (Type): Modelo SQLAlchemy con el que se validan las filas.
+
+    Returns:
+        Tuple[int, List[Dict], ValidationReport]: Filas leidas, filas validas y reporte
+        de validacion del rango.
+    """
+    with open(path, 'rb') as file:
+        file.seek(start)
+        raw = file.read(end - start)
+
+    encoding = 'utf-8-sig' if start == 0 else 'utf-8'
+    reader = csv.reader(io.StringIO(raw.decode(encoding), newline=''))
+    rows = [dict(zip(schema, row)) for row in reader]
+
+    mask, report = get_validator(model).validate(rows)
+    return len(rows), [row for row, valid in zip(rows, mask) if valid], report
+
+
+def iter_parallel_chunks(
+        path: str,
+        schema: List[str],
+        model: Type,
+        workers: int = CSV_WORKERS,
+        chunk_bytes: int = CSV_PARALLEL_CHUNK_BYTES
+) -> Iterator[Tuple[int, List[Dict], ValidationReport]]:
+    """
+    Parsea y valida un CSV en paralelo con un `ProcessPoolExecutor`, entregando los
+    resultados en el orden del archivo. Solo se mantienen en vuelo `2 * workers` rangos
+    para que la memoria no crezca si la insercion es mas lenta que el parseo.
+
+    Args:
+        path (str): Ruta al archivo CSV.
+        schema (List[str]): Nombres de las columnas del CSV.
+        model (Type): Modelo SQLAlchemy con el que se validan las filas.
+        workers (int, opcional): Numero de procesos.
+        chunk_bytes (int, opcional): Tamaño de cada rango de bytes.
+
+    Yields:
+        Tuple[int, List[Dict], ValidationReport]: Filas leidas, filas validas y reporte
+        de cada rango. Los ejemplos del reporte usan la posicion de la fila en el archivo.
+    """
+    ranges = deque(split_byte_ranges(path, chunk_bytes))
+    offset = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        while ranges or pending:
+            while ranges and len(pending) < 2 * workers:
+                start, end = ranges.popleft()
+                pending.append(executor.submit(
+                    parse_range, path, start, end, schema, model))
+
+            read, valid_rows, report = pending.popleft().result()
+            for sample in report.samples:
+                sample['row'] += offset
+            offset += read
+            yield read, valid_rows, report
@@ -0,0 +1,79 @@
+import threading
+import time
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, List
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Limites superiores (en segundos) de los buckets del histograma de espera
+WAIT_BUCKETS: List[float] = [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0]
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    `QueuePool` que mide cuanto espera cada checkout por una conexion libre, para
+    distinguir si una peticion lenta esta esperando al pool o a PostgreSQL.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._wait_counts = [0] * (len(WAIT_BUCKETS) + 1)
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._checkouts = 0
+        self._timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            self._record_wait(time.perf_counter() - start)
+
+    def _record_wait(self, seconds: float) -> None:
+        with self._stats_lock:
+            self._wait_counts[bisect_left(WAIT_BUCKETS, seconds)] += 1
+            self._wait_total += seconds
+            self._wait_max = max(self._wait_max, seconds)
+            self._checkouts += 1
+
+    def stats(self) -> Dict:
+        """
+        Devuelve el estado actual del pool y el histograma de tiempos de espera.
+
+        Returns:
+            Dict: Tamaño configurado, conexiones en uso, libres y en overflow, numero de
+            checkouts y timeouts, y el histograma acumulado de espera (checkouts que
+            esperaron como maximo cada limite).
+        """
+        with self._stats_lock:
+            histogram = {
+                f"le_{bucket}": count
+                for bucket, count in zip(WAIT_BUCKETS + ['inf'], accumulate(self._wait_counts))
+            }
+            return {
+                'size': self.size(),
+                'checked_out': self.checkedout(),
+                'checked_in': self.checkedin(),
+                'overflow': self.overflow(),
+                'max_overflow': self._max_overflow,
+                'timeout': self._timeout,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'wait_seconds_total': round(self._wait_total, 6),
+                'wait_seconds_max': round(self._wait_max, 6),
+                'wait_histogram': histogram,
+            }
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """
+    Version de `InstrumentedQueuePool` para el `AsyncEngine`: usa la cola compatible
+    con asyncio y expone las mismas estadisticas.
+    """
@@ -0,0 +1,116 @@
+"""
+Cache de lectura para las tablas de referencia `Jobs` y `Departments`, que son pequeñas
+y casi nunca cambian. Un acierto no consulta la base de datos ni toma una conexion del pool.
+"""
+from typing import Any, Dict, List, Optional, Set, Type
+from sqlalchemy.orm import Session
+
+from src.extras import models
+from src.extras.cache import TTLCache
+from src.extras.events import subscribe, table_version
+from src.extras.constants import REFERENCE_CACHE_SIZE, REFERENCE_CACHE_TTL
+
+
+class ReferenceCache:
+    """
+    Cache read-through de las filas de un modelo, por `id` y de la tabla completa. Las
+    llaves incluyen la version de la tabla (`src.extras.events`), de modo que cualquier
+    escritura confirmada, venga de donde venga, deja de servir las entradas anteriores.
+    Los handlers ademas las eliminan explicitamente para liberar memoria al instante.
+    """
+
+    def __init__(self, model: Type, maxsize: int = REFERENCE_CACHE_SIZE, ttl: Optional[float] = REFERENCE_CACHE_TTL):
+        self.model = model
+        self.cache = TTLCache(maxsize, ttl)
+        self._columns = [column.name for column in model.__table__.columns]
+
+    def _as_dict(self, instance) -> Optional[Dict[str, Any]]:
+        if instance is None:
+            return None
+        return {column: getattr(instance, column) for column in self._columns}
+
+    def _key(self, *key) -> tuple:
+        return (table_version(self.model.__tablename__), *key)
+
+    def get(self, db: Session, id: int) -> Optional[Dict[str, Any]]:
+        """
+        Devuelve la fila con el `id` indicado, consultando la base de datos solo si no esta en cache.
+        Los `id` inexistentes tambien se guardan (como `None`) hasta la siguiente escritura.
+
+        Args:
+            db (Session): Sesión de la base de datos, usada solo ante un fallo de cache.
+            id (int): ID de la fila.
+
+        Returns:
+            Dict, opcional: Columnas de la fila, o `None` si no existe.
+        """
+        return self.cache.get_or_set(
+            self._key('id', id),
+            lambda: self._as_dict(db.get(self.model, id)))
+
+    def all(self, db: Session) -> List[Dict[str, Any]]:
+        """
+        Devuelve todas las filas de la tabla ordenadas por `id`.
+
+        Args:
+            db (Session): Sesión de la base de datos, usada solo ante un fallo de cache.
+
+        Returns:
+            List[Dict]: Columnas de cada fila.
+        """
+        return self.cache.get_or_set(
+            self._key('all'),
+            lambda: [self._as_dict(row) for row in db.query(self.model).order_by(self.model.id)])
+
+    def invalidate(self, *ids: int) -> int:
+        """
+        Elimina la tabla completa y las filas indicadas de todas las versiones en cache.
+        Sin `ids` se vacia la cache del modelo.
+
+        Args:
+            *ids (int): IDs de las filas creadas, modificadas o eliminadas.
+
+        Returns:
+            int: Numero de entradas eliminadas.
+        """
+        if not ids:
+            return self.cache.invalidate()
+        keys = {('all',), *(('id', id) for id in ids)}
+        return self.cache.invalidate(lambda key: key[1:] in keys)
+
+    def evict_stale(self, tables: Set[str]) -> None:
+        """
+        Expulsa las entradas de versiones anteriores cuando se modifica la tabla, ya sea en
+        este worker o en otro (`src.extras.bus`).
+        """
+        name = self.model.__tablename__
+        if name in tables:
+            version = table_version(name)
+            self.cache.invalidate(lambda key: key[0] != version)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+jobs_cache = ReferenceCache(models.Jobs)
+departments_cache = ReferenceCache(models.Departments)
+
+REFERENCE_CACHES = {
+    models.Jobs: jobs_cache,
+    models.Departments: departments_cache,
+}
+for _cache in REFERENCE_CACHES.values():
+    subscribe(_cache.evict_stale)
+
+
+def invalidate_reference(model: Type, *ids: int) -> None:
+    """
+    Invalida la cache de referencia del modelo, si tiene una.
+
+    Args:
+        model (Type): Modelo SQLAlchemy modificado.
+        *ids (int): IDs de las filas modificadas.
+    """
+    cache = REFERENCE_CACHES.get(model)
+    if cache is not None:
+        cache.invalidate(*ids)
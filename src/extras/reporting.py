@@ -0,0 +1,408 @@
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from fastapi import Depends
+from sqlalchemy import case, extract, func, text
+from sqlalchemy.orm import Session
+
+from src.extras import models
+from src.extras.bulk import dialect_insert
+from src.extras.cache import TTLCache
+from src.extras.database import get_db
+from src.extras.dates import parse_iso_datetime
+from src.extras.events import subscribe, table_versions
+from src.extras.constants import (HIRES_SUMMARY_LOCK_ID, REPORT_CACHE_SIZE, REPORT_CACHE_TTL,
+                                  STREAM_BATCH_SIZE)
+
+HiresKey = Tuple[int, int, int, int]
+# Maximo de parametros por consulta `IN (...)`
+_IN_BATCH_SIZE = 500
+
+GRANULARITIES = ('month', 'quarter', 'year')
+GROUP_BY_DIMENSIONS = ('department', 'job')
+# Modelos que consulta cada reporte, usados para su ETag
+QUARTERS_TABLES = (models.HiresSummary, models.Departments, models.Jobs)
+AVG_HIRED_TABLES = (models.HiresSummary, models.Departments)
+HIRES_TABLES = (models.Employees, models.HiresSummary, models.Departments, models.Jobs)
+# Tablas de las que dependen los reportes; una escritura en ellas invalida la cache
+_REPORT_TABLES = tuple(model.__tablename__ for model in HIRES_TABLES)
+
+report_cache = TTLCache(REPORT_CACHE_SIZE, REPORT_CACHE_TTL)
+subscribe(lambda tables: report_cache.invalidate() if tables.intersection(_REPORT_TABLES) else None)
+
+
+def hire_period(value) -> Optional[Tuple[int, int]]:
+    """
+    Obtiene el año y el cuarto de una fecha ISO-8601 (`2021-11-07T02:48:42Z`) en UTC,
+    igual que la reconstruccion desde `hired_at`. Las fechas sin zona se asumen en UTC.
+
+    Args:
+        value: Fecha como texto o `datetime`.
+
+    Returns:
+        Tuple[int, int], opcional: `(año, cuarto)`, o `None` si la fecha no es valida.
+    """
+    moment = parse_iso_datetime(value)
+    if moment is None:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.year, (moment.month - 1) // 3 + 1
+
+
+def count_hires(rows: Iterable[Dict]) -> Counter:
+    """
+    Cuenta contrataciones por (departamento, trabajo, año, cuarto).
+
+    Args:
+        rows (Iterable[Dict]): Filas de empleados con `datetime`, `department_id` y `job_id`.
+
+    Returns:
+        Counter: Conteo por llave `(department_id, job_id, year, quarter)`.
+    """
+    counts = Counter()
+    for row in rows:
+        period = hire_period(row.get('datetime'))
+        if period is not None:
+            counts[(int(row['department_id']), int(row['job_id']), *period)] += 1
+    return counts
+
+
+def lock_hires_summary(db: Session, shared: bool = True) -> None:
+    """
+    Toma el advisory lock de `HiresSummary` hasta el final de la transaccion (solo en
+    PostgreSQL). Las escrituras incrementales lo toman compartido y la reconstruccion
+    exclusivo, de modo que una reconstruccion no se cruza con otra ni con las
+    contrataciones que se confirman mientras recalcula los conteos.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        shared (bool, opcional): Modo compartido (escrituras) o exclusivo (reconstruccion).
+    """
+    if db.get_bind().dialect.name == 'postgresql':
+        function = 'pg_advisory_xact_lock_shared' if shared else 'pg_advisory_xact_lock'
+        db.execute(text(f"SELECT {function}(:key)"), {'key': HIRES_SUMMARY_LOCK_ID})
+
+
+def apply_hires(db: Session, counts: Counter, overwrite: bool = False) -> None:
+    """
+    Suma (o resta, con conteos negativos) los conteos a `HiresSummary` con un upsert.
+    Debe ejecutarse en la misma transaccion que la escritura sobre `Employees`.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        counts (Counter): Variacion por llave `(department_id, job_id, year, quarter)`.
+        overwrite (bool, opcional): Reemplaza los conteos en lugar de sumarlos (reconstruccion).
+    """
+    params = [
+        {'department_id': key[0], 'job_id': key[1], 'year': key[2],
+         'quarter': key[3], 'hired': count}
+        for key, count in counts.items() if count
+    ]
+    if not params:
+        return
+    if not overwrite:
+        lock_hires_summary(db, shared=True)
+
+    table = models.HiresSummary.__table__
+    statement = dialect_insert(db, table)
+    hired = statement.excluded.hired if overwrite else table.c.hired + statement.excluded.hired
+    statement = statement.on_conflict_do_update(
+        index_elements=[column.name for column in table.primary_key],
+        set_={'hired': hired}
+    )
+    db.execute(statement, params)
+
+
+def record_hires(db: Session, rows: Iterable[Dict]) -> None:
+    """
+    Registra en el resumen las contrataciones de empleados nuevos.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        rows (Iterable[Dict]): Empleados insertados.
+    """
+    apply_hires(db, count_hires(rows))
+
+
+def remove_hires(db: Session, rows: Iterable[Dict]) -> None:
+    """
+    Descuenta del resumen las contrataciones de empleados eliminados o modificados.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        rows (Iterable[Dict]): Valores anteriores de los empleados.
+    """
+    apply_hires(db, Counter({key: -count for key, count in count_hires(rows).items()}))
+
+
+# Columnas de `Employees` que intervienen en el resumen de contrataciones
+HIRES_COLUMNS = ('id', 'datetime', 'department_id', 'job_id')
+
+
+def existing_employees(db: Session, ids: List[int]) -> Dict[int, Dict]:
+    """
+    Lee los valores actuales de las columnas del resumen para los empleados indicados.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        ids (List[int]): IDs a consultar.
+
+    Returns:
+        Dict[int, Dict]: Filas `HIRES_COLUMNS` de los empleados que existen, por `id`.
+    """
+    employees = {}
+    columns = HIRES_COLUMNS
+    for start in range(0, len(ids), _IN_BATCH_SIZE):
+        batch = ids[start:start + _IN_BATCH_SIZE]
+        query = db.query(*(getattr(models.Employees, column) for column in columns)) \
+            .filter(models.Employees.id.in_(batch))
+        employees.update({row[0]: dict(zip(columns, row)) for row in query})
+    return employees
+
+
+def track_employee_load(db: Session, rows: List[Dict], on_conflict: Optional[str] = None) -> None:
+    """
+    Actualiza el resumen para una carga masiva de empleados. Se llama antes de insertar
+    las filas y dentro de la misma transaccion. Con `on_conflict` se consultan los
+    empleados existentes para descontar sus valores anteriores ('update') o ignorar
+    las filas que no se insertaran ('nothing').
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        rows (List[Dict]): Filas que se van a cargar.
+        on_conflict (str, opcional): Modo de conflicto usado en la carga.
+    """
+    if on_conflict is None:
+        record_hires(db, rows)
+        return
+
+    existing = existing_employees(db, [int(row['id']) for row in rows])
+    if on_conflict == 'nothing':
+        record_hires(db, (row for row in rows if int(row['id']) not in existing))
+    else:
+        remove_hires(db, existing.values())
+        record_hires(db, rows)
+
+
+def _utc(db: Session, column):
+    # En PostgreSQL `extract` sobre timestamptz usa la zona horaria de la sesion
+    if db.get_bind().dialect.name == 'postgresql':
+        return func.timezone('UTC', column)
+    return column
+
+
+def rebuild_hires_summary(db: Session = Depends(get_db)) -> None:
+    """
+    Reconstruye `HiresSummary` desde `Employees`. Las filas con `hired_at` se agregan en
+    el servidor; las que aun no tienen la columna completada se leen en streaming y se
+    cuentan a partir de `datetime`. Los conteos se escriben reemplazando los existentes,
+    por lo que dos reconstrucciones seguidas dejan el mismo resultado.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+    """
+    employees = models.Employees
+    lock_hires_summary(db, shared=False)
+    # En SQLite el DELETE toma el lock de escritura antes de leer los conteos
+    db.query(models.HiresSummary).delete(synchronize_session=False)
+
+    hired_at = _utc(db, employees.hired_at)
+    year = extract('year', hired_at)
+    quarter = extract('quarter', hired_at) \
+        if db.get_bind().dialect.name == 'postgresql' \
+        else (extract('month', hired_at) + 2) / 3
+    grouped = db.query(employees.department_id, employees.job_id, year, quarter, func.count()) \
+        .filter(employees.hired_at.isnot(None)) \
+        .group_by(employees.department_id, employees.job_id, year, quarter)
+    counts = Counter({
+        (department_id, job_id, int(year), int(quarter)): count
+        for department_id, job_id, year, quarter, count in grouped
+    })
+
+    columns = ('datetime', 'department_id', 'job_id')
+    rows = db.query(*(getattr(employees, column) for column in columns)) \
+        .filter(employees.hired_at.is_(None)) \
+        .execution_options(stream_results=True).yield_per(STREAM_BATCH_SIZE)
+    counts.update(count_hires(dict(zip(columns, row)) for row in rows))
+    apply_hires(db, counts, overwrite=True)
+    db.commit()
+
+
+def ensure_hires_summary(db: Session = Depends(get_db)) -> bool:
+    """
+    Construye el resumen si esta vacio y `Employees` tiene datos, por ejemplo la primera
+    vez que se migra una base existente. La comprobacion se hace bajo el lock exclusivo
+    del resumen para que dos procesos no lo construyan a la vez.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+
+    Returns:
+        bool: Si se reconstruyo el resumen.
+    """
+    lock_hires_summary(db, shared=False)
+    if db.query(models.HiresSummary).first() is None \
+            and db.query(models.Employees.id).first() is not None:
+        rebuild_hires_summary(db)
+        return True
+    db.rollback()
+    return False
+
+
+def quarters_report(db: Session = Depends(get_db), year: int = 2021) -> List[Dict]:
+    """
+    Contrataciones por departamento y trabajo en cada cuarto del año, leidas del resumen.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        year (int, opcional): Año del reporte.
+
+    Returns:
+        List[Dict]: Filas con `department`, `job` y `Q1`..`Q4`, ordenadas por departamento y trabajo.
+    """
+    summary = models.HiresSummary
+    quarters = [
+        func.coalesce(func.sum(case([(summary.quarter == quarter, summary.hired)], else_=0)), 0)
+        for quarter in (1, 2, 3, 4)
+    ]
+    rows = db.query(models.Departments.department, models.Jobs.job, *quarters) \
+        .join(models.Departments, models.Departments.id == summary.department_id) \
+        .join(models.Jobs, models.Jobs.id == summary.job_id) \
+        .filter(summary.year == year) \
+        .group_by(models.Departments.department, models.Jobs.job) \
+        .having(func.sum(summary.hired) > 0) \
+        .order_by(models.Departments.department, models.Jobs.job) \
+        .all()
+    return [
+        {'department': row[0], 'job': row[1],
+         'Q1': row[2], 'Q2': row[3], 'Q3': row[4], 'Q4': row[5]}
+        for row in rows
+    ]
+
+
+def above_average_report(db: Session = Depends(get_db), year: int = 2021) -> List[Dict]:
+    """
+    Departamentos que contrataron mas empleados que el promedio por departamento en el año.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        year (int, opcional): Año del reporte.
+
+    Returns:
+        List[Dict]: Filas con `id`, `department` y `hired_count`.
+    """
+    summary = models.HiresSummary
+    counts = dict(
+        db.query(summary.department_id, func.sum(summary.hired))
+        .filter(summary.year == year)
+        .group_by(summary.department_id)
+        .having(func.sum(summary.hired) > 0)
+        .all()
+    )
+    if not counts:
+        return []
+
+    average = sum(counts.values()) / len(counts)
+    departments = db.query(models.Departments.id, models.Departments.department) \
+        .filter(models.Departments.id.in_([id for id, count in counts.items() if count > average])) \
+        .order_by(models.Departments.id) \
+        .all()
+    return [
+        {'id': row[0], 'department': row[1], 'hired_count': counts[row[0]]}
+        for row in departments
+    ]
+
+
+def normalize_hires_params(start_year: int, end_year: Optional[int] = None,
+                           granularity: str = 'quarter', group_by: Sequence[str] = ()) -> Tuple:
+    """
+    Valida y normaliza los parametros del reporte de contrataciones, de modo que peticiones
+    equivalentes compartan la misma entrada de cache.
+
+    Args:
+        start_year (int): Primer año del reporte.
+        end_year (int, opcional): Ultimo año del reporte (incluido). Por defecto `start_year`.
+        granularity (str, opcional): 'month', 'quarter' o 'year'.
+        group_by (Sequence[str], opcional): Dimensiones 'department' y/o 'job'.
+
+    Returns:
+        Tuple: `(start_year, end_year, granularity, group_by)` con `group_by` ordenado y sin repetidos.
+    """
+    end_year = start_year if end_year is None else end_year
+    if end_year < start_year:
+        raise ValueError(f"El año final {end_year} es anterior al año inicial {start_year}")
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularidad desconocida: {granularity}")
+    unknown = set(group_by).difference(GROUP_BY_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Dimensiones desconocidas: {', '.join(sorted(unknown))}")
+    dimensions = tuple(dimension for dimension in GROUP_BY_DIMENSIONS if dimension in group_by)
+    return start_year, end_year, granularity, dimensions
+
+
+def _hires_rows(db: Session, start_year: int, end_year: int,
+                granularity: str, group_by: Tuple[str, ...]) -> List[Dict]:
+    if granularity == 'month':
+        # El resumen solo guarda cuartos: por mes se agrega `Employees` usando el indice de hired_at
+        source = models.Employees
+        hired_at = _utc(db, source.hired_at)
+        periods = [('year', extract('year', hired_at)), ('month', extract('month', hired_at))]
+        hired = func.count()
+        condition = (source.hired_at >= datetime(start_year, 1, 1, tzinfo=timezone.utc)) \
+            & (source.hired_at < datetime(end_year + 1, 1, 1, tzinfo=timezone.utc))
+    else:
+        source = models.HiresSummary
+        periods = [('year', source.year)]
+        if granularity == 'quarter':
+            periods.append(('quarter', source.quarter))
+        hired = func.sum(source.hired)
+        condition = source.year.between(start_year, end_year)
+
+    dimensions = []
+    if 'department' in group_by:
+        dimensions += [('department_id', source.department_id),
+                       ('department', models.Departments.department)]
+    if 'job' in group_by:
+        dimensions += [('job_id', source.job_id), ('job', models.Jobs.job)]
+
+    labels = [label for label, _ in periods + dimensions] + ['hired']
+    expressions = [expression for _, expression in periods + dimensions]
+    query = db.query(*expressions, hired).select_from(source)
+    if 'department' in group_by:
+        query = query.join(models.Departments, models.Departments.id == source.department_id)
+    if 'job' in group_by:
+        query = query.join(models.Jobs, models.Jobs.id == source.job_id)
+    rows = query.filter(condition) \
+        .group_by(*expressions) \
+        .having(hired > 0) \
+        .order_by(*expressions) \
+        .all()
+    return [
+        {label: int(value) if label not in ('department', 'job') else value
+         for label, value in zip(labels, row)}
+        for row in rows
+    ]
+
+
+def hires_report(db: Session = Depends(get_db), start_year: int = 2021, end_year: Optional[int] = None,
+                 granularity: str = 'quarter', group_by: Sequence[str] = ()) -> List[Dict]:
+    """
+    Contrataciones por periodo entre dos años, opcionalmente por departamento y/o trabajo.
+    El resultado se guarda en `report_cache` con llave en los parametros normalizados y la
+    version de las tablas involucradas, por lo que se invalida al escribir en `Employees`.
+
+    Args:
+        db (Session): Sesión activa de la base de datos.
+        start_year (int, opcional): Primer año del reporte.
+        end_year (int, opcional): Ultimo año del reporte (incluido). Por defecto `start_year`.
+        granularity (str, opcional): 'month', 'quarter' o 'year'.
+        group_by (Sequence[str], opcional): Dimensiones 'department' y/o 'job'.
+
+    Returns:
+        List[Dict]: Filas con `year`, `month` o `quarter` segun la granularidad, las columnas
+        de las dimensiones pedidas y `hired`, ordenadas por periodo y dimension.
+    """
+    params = normalize_hires_params(start_year, end_year, granularity, group_by)
+    key = (params, table_versions(_REPORT_TABLES))
+    return report_cache.get_or_set(key, lambda: _hires_rows(db, *params))
@@ -0,0 +1,43 @@
+"""
+Respuestas JSON de alto rendimiento para listados y reportes. Las filas llegan como
+diccionarios planos (tuplas de la base de datos o entradas de cache) y se serializan
+directo a bytes con orjson, sin validar cada fila contra el `response_model` ni pasar
+por `jsonable_encoder`. Cada fila se reduce a los campos del schema de respuesta, de
+modo que la forma de la respuesta es la misma.
+"""
+from typing import Dict, List, Optional, Type, Union
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from src.extras.constants import FAST_JSON_RESPONSES
+
+
+def json_rows(rows: List[Dict], schema: Type[BaseModel], exclude_none: bool = False,
+              next_cursor: Optional[int] = None) -> Union[ORJSONResponse, List[Dict]]:
+    """
+    Crea una respuesta JSON pre-serializada con las filas, reducidas a los campos de
+    `schema` como lo haria el `response_model`. Con `FAST_JSON_RESPONSES` desactivado
+    devuelve las filas tal cual para que FastAPI las valide y serialice.
+
+    Args:
+        rows (List[Dict]): Filas de la respuesta.
+        schema (Type[BaseModel]): Schema de cada fila; las llaves que no declara se omiten
+            y las que faltan se envian como `None`.
+        exclude_none (bool, opcional): Omite las llaves con valor `None`, como
+            `response_model_exclude_none`.
+        next_cursor (int, opcional): Cursor de la siguiente pagina para el header
+            `X-Next-After-Id`; solo se usa en la respuesta pre-serializada, en el otro
+            caso el header lo agrega el endpoint.
+
+    Returns:
+        ORJSONResponse | List[Dict]: Respuesta lista para enviar, o las filas.
+    """
+    if not FAST_JSON_RESPONSES:
+        return rows
+    fields = tuple(schema.model_fields)
+    if exclude_none:
+        rows = [{name: row[name] for name in fields if row.get(name) is not None} for row in rows]
+    else:
+        rows = [{name: row.get(name) for name in fields} for row in rows]
+    headers = None if next_cursor is None else {'X-Next-After-Id': str(next_cursor)}
+    return ORJSONResponse(rows, headers=headers)
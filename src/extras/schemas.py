@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+from src.extras.constants import BATCH_MAX_ITEMS
 
 
 class BaseJobs(BaseModel):
@@ -52,3 +55,28 @@ class AvgResponse(BaseModel):
     id: int
     department: str
     hired_count: int
+
+
+class HiresResponse(BaseModel):
+    year: int
+    quarter: Optional[int] = None
+    month: Optional[int] = None
+    department_id: Optional[int] = None
+    department: Optional[str] = None
+    job_id: Optional[int] = None
+    job: Optional[str] = None
+    hired: int
+
+
+class BatchDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+
+class BatchItemResult(BaseModel):
+    id: int
+    status: str
+
+
+class BatchResponse(BaseModel):
+    summary: Dict[str, int]
+    results: List[BatchItemResult]
@@ -0,0 +1,320 @@
+"""
+Respaldos incrementales. Cada snapshot es una carpeta en `BACKUP_SNAPSHOTS_DIR` con un
+`manifest.json` y, por tabla, tres archivos:
+
+- `<tabla>.avro`: filas nuevas o modificadas desde el snapshot anterior (todas en un
+  snapshot completo).
+- `<tabla>.state`: `id` y hash del contenido de cada fila, ordenados por `id`. El siguiente
+  snapshot lo recorre junto con la tabla (merge-join por `id`) para detectar los cambios
+  sin cargar ninguno de los dos en memoria.
+- `<tabla>.tombstones`: IDs eliminados desde el snapshot anterior.
+- `<tabla>.parquet` (opcional): las mismas filas que el archivo Avro, para analitica.
+
+El manifiesto registra por tabla el conteo de filas, el rango de IDs y el SHA-256 de cada
+bloque Avro y del archivo completo. El archivo `LATEST` apunta al ultimo snapshot; la
+restauracion reproduce la cadena desde el snapshot completo hasta el ultimo incremental.
+"""
+import hashlib
+import json
+import os
+import shutil
+import struct
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+from sqlalchemy.orm import Session
+
+from src.extras.backup import table_rows, write_avro_rows
+from src.extras.constants import (BACKUP_CODEC, BACKUP_FULL_EVERY, BACKUP_PARQUET,
+                                  BACKUP_SNAPSHOTS_DIR, BACKUP_SYNC_INTERVAL, STREAM_BATCH_SIZE)
+
+FULL = 'full'
+INCREMENTAL = 'incremental'
+
+MANIFEST = 'manifest.json'
+LATEST = 'LATEST'
+
+# Registro de `.state`: id (int64) y los primeros 8 bytes de BLAKE2b del contenido
+_STATE = struct.Struct('<q8s')
+_TOMBSTONE = struct.Struct('<q')
+_READ_RECORDS = 4096
+
+
+def row_digest(row: tuple) -> bytes:
+    """
+    Calcula el hash del contenido de una fila.
+
+    Args:
+        row (tuple): Valores de la fila en el orden de las columnas del modelo.
+
+    Returns:
+        bytes: 8 bytes de BLAKE2b.
+    """
+    text = '\x1f'.join('\x00' if value is None else str(value) for value in row)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+
+def _read_records(path: Optional[str], record: struct.Struct) -> Iterator[tuple]:
+    if path is None or not os.path.exists(path):
+        return
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(record.size * _READ_RECORDS)
+            if not chunk:
+                return
+            yield from record.iter_unpack(chunk)
+
+
+def read_tombstones(path: str) -> Iterator[int]:
+    """
+    Lee los IDs eliminados de un archivo `.tombstones`.
+
+    Args:
+        path (str): Ruta del archivo.
+
+    Returns:
+        Iterator[int]: IDs en orden ascendente.
+    """
+    return (id for id, in _read_records(path, _TOMBSTONE))
+
+
+class _TableDiff:
+    """
+    Compara las filas de la tabla (ordenadas por `id`) con el `.state` del snapshot
+    anterior. Al iterarla entrega solo las filas nuevas o modificadas y, como efecto,
+    escribe el `.state` nuevo y los `.tombstones`.
+    """
+
+    def __init__(self, rows: Iterable[tuple], previous_state: Optional[str],
+                 state_file: str, tombstones_file: str):
+        self.rows = rows
+        self.previous_state = previous_state
+        self.state_file = state_file
+        self.tombstones_file = tombstones_file
+        self.total = 0
+        self.deleted = 0
+        self.min_id: Optional[int] = None
+        self.max_id: Optional[int] = None
+
+    def __iter__(self) -> Iterator[tuple]:
+        previous = _read_records(self.previous_state, _STATE)
+        current = next(previous, None)
+        with open(self.state_file, 'wb') as state, open(self.tombstones_file, 'wb') as tombstones:
+            for row in self.rows:
+                id, digest = row[0], row_digest(row)
+                state.write(_STATE.pack(id, digest))
+                self.total += 1
+                if self.min_id is None:
+                    self.min_id = id
+                self.max_id = id
+
+                while current is not None and current[0] < id:
+                    tombstones.write(_TOMBSTONE.pack(current[0]))
+                    self.deleted += 1
+                    current = next(previous, None)
+                if current is not None and current[0] == id:
+                    unchanged = current[1] == digest
+                    current = next(previous, None)
+                    if unchanged:
+                        continue
+                yield row
+
+            while current is not None:
+                tombstones.write(_TOMBSTONE.pack(current[0]))
+                self.deleted += 1
+                current = next(previous, None)
+
+
+def _sha256(file, offset: int, size: int) -> str:
+    digest = hashlib.sha256()
+    file.seek(offset)
+    while size > 0:
+        chunk = file.read(min(size, 1 << 20))
+        if not chunk:
+            break
+        digest.update(chunk)
+        size -= len(chunk)
+    return digest.hexdigest()
+
+
+def _checksums(path: str, blocks: List[Dict]) -> Tuple[List[Dict], str]:
+    with open(path, 'rb') as file:
+        blocks = [{**block, 'sha256': _sha256(file, block['offset'], block['bytes'])}
+                  for block in blocks]
+        return blocks, _sha256(file, 0, os.path.getsize(path))
+
+
+def snapshot_table(db: Session, model: Type, snapshot_dir: str, parent_dir: Optional[str] = None,
+                   codec: str = BACKUP_CODEC, sync_interval: int = BACKUP_SYNC_INTERVAL,
+                   batch_size: int = STREAM_BATCH_SIZE,
+                   progress: Optional[Callable[[int, int], None]] = None,
+                   parquet: bool = BACKUP_PARQUET) -> Dict:
+    """
+    Escribe el snapshot de una tabla. Sin `parent_dir` el snapshot es completo; con el,
+    solo se escriben las filas cuyo `id` es nuevo o cuyo contenido cambio, y los IDs
+    eliminados.
+
+    Args:
+        db (Session): Sesión de la base de datos.
+        model (Type): Modelo SQLAlchemy de la tabla.
+        snapshot_dir (str): Carpeta del snapshot.
+        parent_dir (str, opcional): Carpeta del snapshot anterior de la cadena.
+        codec (str, opcional): Codec de compresion de los bloques Avro.
+        sync_interval (int, opcional): Bytes sin comprimir por bloque.
+        batch_size (int, opcional): Filas que se traen del cursor en cada viaje.
+        progress (Callable[[int, int], None], opcional): Se llama con las filas escritas y
+            los bytes del archivo Avro.
+        parquet (bool, opcional): Escribe tambien `<tabla>.parquet` con las mismas filas.
+
+    Returns:
+        Dict: Entrada de la tabla en el manifiesto.
+    """
+    name = model.__tablename__
+    previous_state = os.path.join(parent_dir, f'{name}.state') if parent_dir else None
+    diff = _TableDiff(table_rows(db, model, batch_size), previous_state,
+                      os.path.join(snapshot_dir, f'{name}.state'),
+                      os.path.join(snapshot_dir, f'{name}.tombstones'))
+
+    avro_file = os.path.join(snapshot_dir, f'{name}.avro')
+    parquet_file = os.path.join(snapshot_dir, f'{name}.parquet') if parquet else None
+    written = write_avro_rows(model, avro_file, diff, codec, sync_interval, progress,
+                              batch_size, parquet_file)
+    blocks, sha256 = _checksums(avro_file, written['blocks'])
+    table = {
+        'file': f'{name}.avro',
+        'rows': diff.total,
+        'changed': written['rows'],
+        'deleted': diff.deleted,
+        'min_id': diff.min_id,
+        'max_id': diff.max_id,
+        'codec': codec,
+        'bytes': written['bytes'],
+        'sha256': sha256,
+        'blocks': blocks,
+    }
+    if parquet_file is not None:
+        table['parquet'] = {
+            'file': f'{name}.parquet',
+            'bytes': written['parquet_bytes'],
+            'sha256': _checksums(parquet_file, [])[1],
+        }
+    return table
+
+
+def verify_table_file(snapshot_dir: str, table: Dict) -> str:
+    """
+    Comprueba el SHA-256 de cada bloque del archivo Avro de una tabla contra el manifiesto.
+
+    Args:
+        snapshot_dir (str): Carpeta del snapshot.
+        table (Dict): Entrada de la tabla en el manifiesto.
+
+    Returns:
+        str: Ruta del archivo verificado.
+    """
+    path = os.path.join(snapshot_dir, table['file'])
+    if not os.path.exists(path):
+        raise ValueError(f"El archivo del snapshot no existe: {path}")
+    with open(path, 'rb') as file:
+        for index, block in enumerate(table['blocks']):
+            if _sha256(file, block['offset'], block['bytes']) != block['sha256']:
+                raise ValueError(f"Checksum invalido en el bloque {index} de {path}")
+        if _sha256(file, 0, os.path.getsize(path)) != table['sha256']:
+            raise ValueError(f"Checksum invalido en {path}")
+    return path
+
+
+def read_manifest(snapshot_dir: str) -> Dict:
+    with open(os.path.join(snapshot_dir, MANIFEST), encoding='utf-8') as file:
+        return json.load(file)
+
+
+def _write_atomic(path: str, content: str) -> None:
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp, path)
+
+
+def latest_snapshot(root: str = BACKUP_SNAPSHOTS_DIR) -> Optional[str]:
+    """
+    Devuelve el ID del ultimo snapshot completado, o `None` si no hay ninguno.
+    """
+    try:
+        with open(os.path.join(root, LATEST), encoding='utf-8') as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def snapshot_chain(root: str = BACKUP_SNAPSHOTS_DIR) -> List[Tuple[str, Dict]]:
+    """
+    Obtiene la cadena de snapshots a reproducir: el completo mas reciente seguido de sus
+    incrementales hasta `LATEST`.
+
+    Args:
+        root (str, opcional): Directorio de los snapshots.
+
+    Returns:
+        List[Tuple[str, Dict]]: Carpeta y manifiesto de cada snapshot, del completo al ultimo.
+    """
+    chain = []
+    id = latest_snapshot(root)
+    while id is not None:
+        snapshot_dir = os.path.join(root, id)
+        manifest = read_manifest(snapshot_dir)
+        chain.append((snapshot_dir, manifest))
+        id = None if manifest['type'] == FULL else manifest['parent']
+    return chain[::-1]
+
+
+class Snapshot:
+    """
+    Snapshot en construccion. Las tablas se escriben (en paralelo) con `table` y el
+    snapshot solo pasa a ser `LATEST` al llamar a `commit`; `abort` borra la carpeta.
+    """
+
+    def __init__(self, root: str = BACKUP_SNAPSHOTS_DIR, full: bool = False,
+                 parquet: bool = BACKUP_PARQUET):
+        self.root = root
+        self.parquet = parquet
+        chain = snapshot_chain(root)
+        self.type = FULL if full or not chain or len(chain) >= BACKUP_FULL_EVERY else INCREMENTAL
+        self.parent = chain[-1][1]['id'] if chain else None
+        self.base = chain[0][1]['id'] if self.type == INCREMENTAL else None
+        created_at = datetime.now(timezone.utc)
+        self.id = f"{created_at:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.created_at = created_at.isoformat()
+        self.dir = os.path.join(root, self.id)
+        self.tables: Dict[str, Dict] = {}
+        os.makedirs(self.dir)
+
+    def table(self, db: Session, model: Type,
+              progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """
+        Escribe el snapshot de una tabla y devuelve su resumen.
+        """
+        parent_dir = os.path.join(self.root, self.parent) \
+            if self.type == INCREMENTAL else None
+        table = snapshot_table(db, model, self.dir, parent_dir, progress=progress,
+                               parquet=self.parquet)
+        self.tables[model.__tablename__] = table
+        return {key: table[key] for key in ('rows', 'changed', 'deleted', 'bytes')}
+
+    def commit(self) -> Dict:
+        manifest = {
+            'id': self.id,
+            'type': self.type,
+            'parent': self.parent,
+            'base': self.base,
+            'created_at': self.created_at,
+            'tables': self.tables,
+        }
+        _write_atomic(os.path.join(self.dir, MANIFEST), json.dumps(manifest, indent=2))
+        _write_atomic(os.path.join(self.root, LATEST), self.id)
+        return manifest
+
+    def abort(self) -> None:
+        shutil.rmtree(self.dir, ignore_errors=True)
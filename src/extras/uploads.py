@@ -0,0 +1,227 @@
+"""
+Carga de CSV desde el cuerpo de una peticion. El cuerpo se lee del socket en el event
+loop y se entrega por una cola acotada (`CSV_UPLOAD_BUFFER_CHUNKS` fragmentos) al hilo
+que parsea, valida e inserta: la red y las inserciones avanzan en paralelo, y cuando la
+base de datos va mas lento que el cliente la cola se llena y se deja de leer del socket.
+
+Las subidas `multipart/form-data` se decodifican con un parser incremental, por lo que
+el archivo nunca se escribe a disco ni se acumula completo en memoria.
+"""
+import io
+from typing import AsyncIterator, Dict, List, Optional, Type, Union
+import anyio
+import anyio.from_thread
+import anyio.to_thread
+from anyio.streams.memory import MemoryObjectReceiveStream
+from fastapi import Request
+from sqlalchemy.orm import Session
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from src.extras.constants import CSV_CHUNK_SIZE, CSV_UPLOAD_BUFFER_CHUNKS
+from src.extras.ingest import ingest_csv_stream
+
+
+class UploadError(ValueError):
+    """
+    El cuerpo de la peticion no contiene un CSV que se pueda cargar.
+    """
+
+
+class UploadAborted(Exception):
+    """
+    La carga se interrumpio: el cuerpo no se pudo leer completo (por ejemplo, el cliente
+    se desconecto), no era un CSV valido o fallo la base de datos. El bloque en curso se
+    descarta; los bloques confirmados antes del error quedan en `summary`.
+    """
+
+    def __init__(self, error: BaseException, summary: Dict):
+        super().__init__(str(error))
+        self.error = error
+        self.summary = summary
+
+
+class _BodyReader(io.RawIOBase):
+    """
+    Archivo binario de solo lectura sobre la cola de fragmentos del cuerpo. Se lee desde
+    el hilo de la carga; cada lectura que vacia el fragmento actual espera el siguiente
+    en el event loop.
+    """
+
+    def __init__(self, receive: MemoryObjectReceiveStream):
+        self.receive = receive
+        self.pending = memoryview(b'')
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self.pending:
+            try:
+                item = anyio.from_thread.run(self.receive.receive)
+            except anyio.EndOfStream:
+                return 0
+            if isinstance(item, BaseException):
+                # Error al leer el cuerpo: se propaga en lugar de terminar el archivo
+                raise item
+            self.pending = memoryview(item)
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+async def _iter_multipart_file(request: Request, boundary: bytes) -> AsyncIterator[bytes]:
+    # Se toma la primera parte con nombre de archivo o con el campo `file`
+    state: Dict = {'headers': {}, 'field': b'', 'value': b'', 'selected': None, 'current': False}
+    data: List[bytes] = []
+
+    def on_part_begin() -> None:
+        state['headers'] = {}
+
+    def on_header_field(buffer: bytes, start: int, end: int) -> None:
+        state['field'] += buffer[start:end]
+
+    def on_header_value(buffer: bytes, start: int, end: int) -> None:
+        state['value'] += buffer[start:end]
+
+    def on_header_end() -> None:
+        state['headers'][state['field'].lower()] = state['value']
+        state['field'], state['value'] = b'', b''
+
+    def on_headers_finished() -> None:
+        if state['selected'] is None:
+            _, options = parse_options_header(state['headers'].get(b'content-disposition', b''))
+            if b'filename' in options or options.get(b'name') == b'file':
+                state['selected'] = True
+                state['current'] = True
+                return
+        state['current'] = False
+
+    def on_part_data(buffer: bytes, start: int, end: int) -> None:
+        if state['current']:
+            data.append(bytes(buffer[start:end]))
+
+    def on_part_end() -> None:
+        if state['current']:
+            state['selected'] = False
+            state['current'] = False
+
+    parser = MultipartParser(boundary, {
+        'on_part_begin': on_part_begin,
+        'on_header_field': on_header_field,
+        'on_header_value': on_header_value,
+        'on_header_end': on_header_end,
+        'on_headers_finished': on_headers_finished,
+        'on_part_data': on_part_data,
+        'on_part_end': on_part_end,
+    })
+    async for chunk in request.stream():
+        parser.write(chunk)
+        if data:
+            yield b''.join(data)
+            data.clear()
+        if state['selected'] is False:
+            # El archivo ya termino: el resto del formulario no se lee
+            return
+    parser.finalize()
+    if state['selected'] is None:
+        raise UploadError("El formulario no contiene un archivo CSV")
+
+
+def iter_upload(request: Request) -> AsyncIterator[bytes]:
+    """
+    Entrega los bytes del CSV a medida que llegan: el cuerpo completo, o el archivo si
+    la peticion es `multipart/form-data`.
+
+    Args:
+        request (Request): Peticion con el CSV en el cuerpo.
+
+    Returns:
+        AsyncIterator[bytes]: Fragmentos del CSV.
+    """
+    content_type, options = parse_options_header(request.headers.get('content-type', ''))
+    if content_type == b'multipart/form-data':
+        boundary = options.get(b'boundary')
+        if not boundary:
+            raise UploadError("Falta el boundary del formulario multipart")
+        return _iter_multipart_file(request, boundary)
+    return request.stream()
+
+
+async def _read_body(request: Request) -> AsyncIterator[Union[bytes, Exception]]:
+    # Entrega el error de lectura como ultimo elemento, para que el lector no lo confunda con el fin del cuerpo
+    try:
+        async for data in iter_upload(request):
+            if data:
+                yield data
+    except Exception as e:
+        yield e
+
+
+async def ingest_upload(
+        request: Request,
+        model: Type,
+        db: Session,
+        chunk_size: int = CSV_CHUNK_SIZE,
+        quota: Optional[int] = None,
+        on_conflict: Optional[str] = None,
+        buffer_chunks: int = CSV_UPLOAD_BUFFER_CHUNKS
+) -> dict:
+    """
+    Carga el CSV del cuerpo de la peticion en la tabla del modelo mientras se recibe.
+    La carga corre en un hilo con `ingest_csv_stream`; si termina antes que el cuerpo
+    (por ejemplo al alcanzar `quota`), el resto no se lee. Si falla la lectura del cuerpo
+    o la carga, se lanza `UploadAborted` sin confirmar el bloque en curso.
+
+    Args:
+        request (Request): Peticion con el CSV en el cuerpo.
+        model (Type): Modelo SQLAlchemy de la tabla destino.
+        db (Session): Sesión de la base de datos.
+        chunk_size (int, opcional): Numero de filas por bloque.
+        quota (int, opcional): Maximo de filas a insertar. `None` indica que no hay limite.
+        on_conflict (str, opcional): 'nothing' o 'update' para resolver los IDs existentes.
+        buffer_chunks (int, opcional): Fragmentos del cuerpo que se reciben por adelantado.
+
+    Returns:
+        dict: Resumen de la carga, igual que `ingest_csv`.
+    """
+    send, receive = anyio.create_memory_object_stream(buffer_chunks)
+    errors: List[BaseException] = []
+    summary: Dict = {}
+    partial: Dict = {}
+
+    async def pump() -> None:
+        try:
+            async with send:
+                async for item in _read_body(request):
+                    await send.send(item)
+        except anyio.BrokenResourceError:
+            # La carga termino y cerro la cola: no hace falta el resto del cuerpo
+            pass
+
+    def load() -> None:
+        file = io.TextIOWrapper(io.BufferedReader(_BodyReader(receive)),
+                                encoding='utf-8-sig', newline='')
+        try:
+            summary.update(ingest_csv_stream(
+                file, model, db=db, chunk_size=chunk_size, quota=quota,
+                on_conflict=on_conflict, source=f'{request.method} {request.url.path}',
+                progress=partial.update))
+        except Exception as e:
+            db.rollback()
+            errors.append(e)
+
+    async with anyio.create_task_group() as group:
+        group.start_soon(pump)
+        try:
+            await anyio.to_thread.run_sync(load)
+        finally:
+            receive.close()
+
+    if errors:
+        raise UploadAborted(errors[0], partial)
+    return summary
@@ -1,17 +1,44 @@
 import csv
+from itertools import compress, islice
 from pathlib import Path
 from . import schemas
 from fastapi import Depends
-from typing import List, Type, Dict
+from typing import Iterator, List, Optional, TextIO, Type, Dict
 from src.extras.database import get_db
 from sqlalchemy.orm import Session
 from src.extras import models
-from sqlalchemy import Integer, String
+from src.extras.constants import CSV_CHUNK_SIZE, CSV_READER
+from src.extras.mmap_reader import iter_mmap_rows
+from src.extras.dedup import IdIndex
+from src.extras.validation import ValidationReport, get_validator
 from .logger import custom_logger
 
 logger = custom_logger()
 
 
+# Columnas de los archivos CSV de cada tabla, en el orden en que aparecen
+CSV_SCHEMAS = {
+    models.Departments: schemas.BaseDepartments,
+    models.Jobs: schemas.BaseJobs,
+    models.Employees: schemas.BaseEmployees,
+}
+
+
+def schema_for(model: Type) -> List:
+    """
+    Devuelve las columnas del CSV de la tabla del modelo.
+
+    Args:
+        model (Type): Modelo SQLAlchemy de la tabla destino.
+
+    Returns:
+        List: Lista de nombres de campos correspondientes al esquema.
+    """
+    if model not in CSV_SCHEMAS:
+        raise ValueError(f"No hay un esquema CSV para la tabla {model.__tablename__}")
+    return list(CSV_SCHEMAS[model].__annotations__.keys())
+
+
 def get_schema(path: str) -> List:
     """
     Devuelve el esquema correspondiente basado en el archivo proporcionado.
@@ -33,15 +60,22 @@ def get_schema(path: str) -> List:
     return schema
 
 
-def parse_csv(path: str) -> dict:
+def iter_csv(
+        path: str,
+        chunk_size: int = CSV_CHUNK_SIZE,
+        reader: str = CSV_READER
+) -> Iterator[List[Dict]]:
     """
-    Parsea un archivo CSV en una lista de diccionarios con base en un esquema definido.
+    Parsea un archivo CSV de forma perezosa, entregando bloques de filas mapeadas al esquema.
 
     Args:
         path (str): Ruta al archivo CSV que se desea parsear.
+        chunk_size (int, opcional): Numero maximo de filas por bloque. Por defecto es `CSV_CHUNK_SIZE`.
+        reader (str, opcional): 'csv' construye un diccionario por fila; 'mmap' mapea el archivo
+            en memoria y entrega filas `LazyRow` que decodifican cada campo al accederlo.
 
-    Returns:
-        dict: Lista de diccionarios, donde cada diccionario representa una fila del CSV mapeada al esquema.
+    Yields:
+        List[Dict]: Bloque de hasta `chunk_size` filas del CSV.
     """
     file_path = Path(path)
 
@@ -49,116 +83,138 @@ def parse_csv(path: str) -> dict:
         raise FileNotFoundError(
             'El archivo entregado no exite en la ruta proporcionada')
 
-    with file_path.open(mode='r', encoding='utf-8-sig') as file:
-        reader = csv.reader(file)
-        data_list = [row for row in reader]
-
     schema = get_schema(path)
-    data = [{key: row[index]
-             for index, key in enumerate(schema)} for row in data_list]
+    if reader == 'mmap':
+        rows = iter_mmap_rows(path, schema)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            yield chunk
+        return
+
+    with file_path.open(mode='r', encoding='utf-8-sig', newline='') as file:
+        yield from iter_csv_file(file, schema, chunk_size)
+
+
+def iter_csv_file(
+        file: TextIO,
+        schema: List[str],
+        chunk_size: int = CSV_CHUNK_SIZE
+) -> Iterator[List[Dict]]:
+    """
+    Parsea un archivo CSV ya abierto (o cualquier flujo de texto, como el cuerpo de una
+    peticion) entregando bloques de filas mapeadas al esquema a medida que se leen.
 
-    return data
+    Args:
+        file (TextIO): Flujo de texto abierto con `newline=''`.
+        schema (List[str]): Nombres de las columnas, en orden.
+        chunk_size (int, opcional): Numero maximo de filas por bloque.
+
+    Yields:
+        List[Dict]: Bloque de hasta `chunk_size` filas del CSV.
+    """
+    reader = csv.reader(file)
+    while True:
+        chunk = [dict(zip(schema, row))
+                 for row in islice(reader, chunk_size)]
+        if not chunk:
+            break
+        yield chunk
+
+
+def parse_csv(path: str) -> list[dict]:
+    """
+    Parsea un archivo CSV en una lista de diccionarios con base en un esquema definido.
+
+    Args:
+        path (str): Ruta al archivo CSV que se desea parsear.
+
+    Returns:
+        list[dict]: Lista de diccionarios, donde cada diccionario representa una fila del CSV mapeada al esquema.
+    """
+    return [row for chunk in iter_csv(path) for row in chunk]
 
 
 def get_existing_ids(
         data: List[Dict],
         model: Type,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db),
+        index: Optional[IdIndex] = None
 ) -> list[dict]:
     """
-    Filtra los registros que ya existen en la base de datos según sus IDs.
+    Filtra los registros que ya existen en la base de datos según sus IDs. Si un ID
+    se repite dentro de `data` solo se conserva su primera aparicion.
 
     Args:
         data (List[Dict]): Lista de diccionarios que representan los registros a validar.
         model (Type): Modelo SQLAlchemy correspondiente a la tabla de la base de datos.
         db (Session): Sesión activa de la base de datos.
+        index (IdIndex, opcional): Indice de IDs existentes; si no se entrega se consultan
+            en el servidor solo los IDs de `data`.
 
     Returns:
         list[dict]: Lista de diccionarios con los registros que no tienen ID en la base de datos.
     """
-    existing_ids: List[int] = [
-        int(table.id)
-        for table in db.query(model.id).all()
-    ]
+    if index is None:
+        index = IdIndex(model, db, preload=False)
 
-    new_data = [
-        fields for fields in data
-        if int(fields['id']) not in existing_ids
-    ]
+    missing = index.missing(int(fields['id']) for fields in data)
+    new_data = []
+    for fields in data:
+        id = int(fields['id'])
+        if id in missing:
+            missing.discard(id)
+            new_data.append(fields)
 
     return new_data
 
 
-def validate_rows(data: List[Dict], model: Type) -> list[dict]:
+def validate_rows(
+        data: List[Dict],
+        model: Type,
+        report: Optional[ValidationReport] = None
+) -> list[dict]:
     """
-    Valida los registros según las restricciones definidas en el modelo SQLAlchemy.
+    Valida los registros según las restricciones definidas en el modelo SQLAlchemy,
+    usando el validador compilado y cacheado del modelo.
 
     Args:
         data (List[Dict]): Lista de registros a validar, donde cada registro es un diccionario.
         model (Type): Modelo SQLAlchemy que define la estructura y restricciones de la tabla.
+        report (ValidationReport, opcional): Reporte donde acumular los errores. Si no se
+            entrega, los errores del bloque se registran en el log en un solo mensaje.
 
     Returns:
         list[dict]: Lista de registros válidos que cumplen con las restricciones del modelo.
     """
-    valid_rows = []
-    for row in data:
-        try:
-            # Validar tipos y valores
-            for column in model.__table__.columns:
-                col_name = column.name
-                col_type = column.type
-                value = row.get(col_name)
-
-                if value is None or value == "":
-                    # Registra si el campo es nulo y no debe serlo
-                    if not column.nullable:
-                        logger.error(
-                            f"El campo '{col_name}' no puede ser nulo o vacio.")
-                        raise ValueError(
-                            f"El campo '{col_name}' no puede ser nulo o vacio.")
-                elif isinstance(col_type, Integer):
-                    # Valida que los enteros sean validos
-                    if not str(value).isdigit():
-                        logger.error(
-                            f"El campo '{col_name}' debe ser un entero valido.")
-                        raise ValueError(
-                            f"El campo '{col_name}' debe ser un entero valido.")
-                elif isinstance(col_type, String):
-                    # Valida que las cadenas sean valdas
-                    if not isinstance(value, str):
-                        logger.error(
-                            f"El campo '{col_name}' debe ser una cadena de texto.")
-                        raise ValueError(
-                            f"El campo '{col_name}' debe ser una cadena de texto.")
-
-            valid_rows.append(row)
-
-        except (ValueError, TypeError, KeyError) as e:
-            logger.error(f"Fila inválida: {row}. Error: {e}")
-
-    return valid_rows
-
-
-def validate_row_limit(data: List[Dict], limit: int = 999) -> list[dict]:
-    """
-    Valida que el número de filas en la lista no exceda el límite permitido.
+    offset = 0 if report is None else report.total
+    mask, chunk_report = get_validator(model).validate(data, offset=offset)
+
+    if report is not None:
+        report.merge(chunk_report)
+    elif chunk_report.invalid:
+        logger.error(
+            f"{chunk_report.invalid} filas invalidas en la tabla {model.__tablename__}. "
+            f"Errores: {chunk_report.errors}. Ejemplos: {chunk_report.samples}")
+
+    return list(compress(data, mask))
+
+
+def apply_row_quota(data: List[Dict], remaining: Optional[int]) -> list[dict]:
+    """
+    Recorta un bloque de registros a la cuota de filas que aun queda disponible.
 
     Args:
-        data (List[Dict]): Lista de registros a validar.
-        limit (int, opcional): Límite máximo permitido de filas. Por defecto es 999.
+        data (List[Dict]): Bloque de registros validos.
+        remaining (int, opcional): Filas que aun se pueden insertar. `None` indica que no hay limite.
 
     Returns:
-        list[dict]: Lista con un máximo de `limit` filas.
-
-    Logs:
-        - Genera una advertencia si la cantidad de filas en `data` excede el límite.
+        list[dict]: Registros del bloque que caben dentro de la cuota.
     """
-    if len(data) > limit:
-        logger.warning(
-            (f"El numero de filas en el archivo CSV({len(data)}) excede el limite permitido de {limit}."
-             f" Solo se cargaran las primeras {limit} filas.")
-        )
-    return data[:limit]
+    if remaining is None or len(data) <= remaining:
+        return data
+    return data[:max(remaining, 0)]
 
 
 if __name__ == '__main__':
@@ -0,0 +1,238 @@
+import re
+from functools import lru_cache
+from itertools import compress, repeat
+from operator import not_
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Type
+from sqlalchemy import DateTime, Integer, String
+
+from src.extras.constants import VALIDATION_MAX_SAMPLES
+from src.extras.dates import parse_iso_datetime
+
+
+def _is_integer(value) -> bool:
+    return str(value).isdecimal()
+
+
+def _all_integers(values: List) -> bool:
+    # Los valores no son vacios, asi que la columna unida es decimal solo si cada valor lo es
+    return ''.join(map(str, values)).isdecimal()
+
+
+def _is_string(value) -> bool:
+    return isinstance(value, str)
+
+
+def _all_strings(values: List) -> bool:
+    return set(map(type, values)) <= {str}
+
+
+_TWO = r'(?:[01][0-9]|2[0-3])'
+_SIXTY = r'[0-5][0-9]'
+# Fecha ISO-8601 que `parse_iso_datetime` siempre acepta; el 29 de febrero y los formatos
+# menos comunes no coinciden y se revisan valor por valor
+_ISO8601 = re.compile(
+    r'(?!0000)[0-9]{4}-'
+    r'(?:(?:0[1-9]|1[0-2])-(?:0[1-9]|1[0-9]|2[0-8])|(?:0[13-9]|1[0-2])-(?:29|30)|(?:0[13578]|1[02])-31)'
+    rf'(?:[T ]{_TWO}:{_SIXTY}:{_SIXTY}(?:\.[0-9]{{3}}|\.[0-9]{{6}})?(?:Z|[+-]{_TWO}:{_SIXTY})?)?'
+)
+
+
+def _is_iso8601(value) -> bool:
+    return parse_iso_datetime(value) is not None
+
+
+def _all_iso8601(values: List) -> bool:
+    return all(map(_ISO8601.fullmatch, map(str, values)))
+
+
+# Verificacion de tipo por clase de columna SQLAlchemy: verificacion por valor, verificacion
+# de la columna completa (`None` si no hay) y mensaje de error asociado
+TYPE_CHECKS: List[Tuple[type, Callable, Optional[Callable], str]] = [
+    (Integer, _is_integer, _all_integers, 'debe ser un entero valido'),
+    (String, _is_string, _all_strings, 'debe ser una cadena de texto'),
+    (DateTime, _is_iso8601, _all_iso8601, 'debe ser una fecha ISO-8601'),
+]
+
+# Verificaciones adicionales declaradas en `Column.info['format']`
+FORMAT_CHECKS: Dict[str, Tuple[Callable, Optional[Callable], str]] = {
+    'iso8601': (_is_iso8601, _all_iso8601, 'debe ser una fecha ISO-8601'),
+}
+
+
+class RowMask:
+    """
+    Mapa de bits de las filas de un bloque: un bit por fila marca las invalidas. Al
+    recorrerlo entrega `True` por cada fila valida, por lo que sirve con `compress`.
+    """
+
+    __slots__ = ('size', 'bits')
+
+    def __init__(self, size: int):
+        self.size = size
+        self.bits = 0
+
+    def reject(self, rows: List[int]) -> None:
+        for row in rows:
+            self.bits |= 1 << row
+
+    @property
+    def invalid(self) -> int:
+        return self.bits.bit_count()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[bool]:
+        if not self.bits:
+            return repeat(True, self.size)
+        return map('0'.__eq__, reversed(format(self.bits, f'0{self.size}b')))
+
+    def __getitem__(self, row: int) -> bool:
+        return not self.bits >> row & 1
+
+
+class ValidationReport:
+    """
+    Reporte agregado de una validacion: conteo de errores por columna y tipo de error,
+    mas los primeros `max_samples` ejemplos.
+    """
+
+    def __init__(self, max_samples: int = VALIDATION_MAX_SAMPLES):
+        self.max_samples = max_samples
+        self.total = 0
+        self.invalid = 0
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.samples: List[Dict] = []
+
+    def add_error(self, column: str, error: str, count: int, samples: List[Dict]) -> None:
+        counts = self.errors.setdefault(column, {})
+        counts[error] = counts.get(error, 0) + count
+        free = self.max_samples - len(self.samples)
+        if free > 0:
+            self.samples.extend(samples[:free])
+
+    def merge(self, other: 'ValidationReport') -> 'ValidationReport':
+        """
+        Acumula otro reporte sobre este, por ejemplo el de un bloque siguiente.
+
+        Args:
+            other (ValidationReport): Reporte a acumular.
+
+        Returns:
+            ValidationReport: Este mismo reporte.
+        """
+        self.total += other.total
+        self.invalid += other.invalid
+        for column, counts in other.errors.items():
+            for error, count in counts.items():
+                self.add_error(column, error, count, [])
+        free = self.max_samples - len(self.samples)
+        if free > 0:
+            self.samples.extend(other.samples[:free])
+        return self
+
+    def as_dict(self) -> Dict:
+        return {
+            'total': self.total,
+            'valid': self.total - self.invalid,
+            'invalid': self.invalid,
+            'errors': self.errors,
+            'samples': self.samples,
+        }
+
+
+class CompiledValidator:
+    """
+    Validador de filas compilado una vez por modelo SQLAlchemy. En lugar de recorrer las
+    columnas del modelo fila por fila, extrae cada columna del bloque completo y la
+    verifica de una sola pasada.
+    """
+
+    def __init__(self, model: Type):
+        self.model = model
+        self.columns: List[Tuple[str, bool, List[Tuple[Callable, Optional[Callable], str]]]] = []
+        for column in model.__table__.columns:
+            checks = []
+            for column_type, type_check, column_check, type_message in TYPE_CHECKS:
+                if isinstance(column.type, column_type):
+                    checks.append((type_check, column_check, type_message))
+                    break
+            if column.info.get('format') in FORMAT_CHECKS:
+                checks.append(FORMAT_CHECKS[column.info['format']])
+            self.columns.append((column.name, column.nullable, checks))
+
+    def validate(
+            self,
+            data: List[Dict],
+            offset: int = 0,
+            max_samples: int = VALIDATION_MAX_SAMPLES
+    ) -> Tuple[RowMask, ValidationReport]:
+        """
+        Valida un bloque de filas columna por columna. Cada columna se verifica primero
+        completa (por ejemplo, `isdecimal` sobre los enteros unidos o una expresion regular
+        precompilada sobre las fechas); solo si falla se revisa valor por valor para ubicar
+        las filas invalidas.
+
+        Args:
+            data (List[Dict]): Filas a validar.
+            offset (int, opcional): Posicion de la primera fila del bloque, usada en los ejemplos.
+            max_samples (int, opcional): Numero maximo de ejemplos de error en el reporte.
+
+        Returns:
+            Tuple[RowMask, ValidationReport]: Mapa de bits de las filas invalidas y el
+            reporte agregado de errores.
+        """
+        size = len(data)
+        mask = RowMask(size)
+        report = ValidationReport(max_samples)
+        report.total = size
+
+        for name, nullable, checks in self.columns:
+            values = [row.get(name) for row in data]
+            empty = None
+            present = values
+            if values.count(None) or values.count(''):
+                empty = [value is None or value == "" for value in values]
+                present = list(compress(values, map(not_, empty)))
+                if not nullable:
+                    self._reject(mask, report, name, 'no puede ser nulo o vacio',
+                                 empty, values, offset)
+
+            for check, column_check, message in checks:
+                if not present or column_check is not None and column_check(present):
+                    continue
+                invalid = list(map(not_, map(check, values)))
+                if empty is not None:
+                    invalid = [failed and not is_empty for failed, is_empty in zip(invalid, empty)]
+                self._reject(mask, report, name, message,
+                             invalid, values, offset)
+
+        report.invalid = mask.invalid
+        return mask, report
+
+    @staticmethod
+    def _reject(mask: RowMask, report: ValidationReport, column: str, error: str,
+                failed: List[bool], values: List, offset: int) -> None:
+        rows = list(compress(range(len(failed)), failed))
+        if not rows:
+            return
+        mask.reject(rows)
+        report.add_error(column, error, len(rows), [
+            {'row': offset + row, 'column': column,
+                'error': error, 'value': values[row]}
+            for row in rows[:report.max_samples]
+        ])
+
+
+@lru_cache(maxsize=None)
+def get_validator(model: Type) -> CompiledValidator:
+    """
+    Devuelve el validador compilado del modelo, creandolo la primera vez.
+
+    Args:
+        model (Type): Modelo SQLAlchemy.
+
+    Returns:
+        CompiledValidator: Validador cacheado del modelo.
+    """
+    return CompiledValidator(model)
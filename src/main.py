@@ -1,17 +1,41 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
-from src.extras import models
-from src.extras.database import engine
-from src.api.routers import jobs, employees, departments, files, backups, queries
+from src.extras.database import engine, ASYNC_API
+from src.extras.bus import start_invalidation_bus
+from src.extras.http_cache import CacheHeadersMiddleware
+from src.extras.job_queue import scheduler
+from src.api.routers import (
+    jobs, employees, departments, files, backups, queries, async_api, health, jobs_queue
+)
 
 
-models.Base.metadata.create_all(bind=engine)
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cada worker escucha los cambios de los demas para invalidar sus caches en memoria
+    bus = start_invalidation_bus(engine)
+    # Las cargas, respaldos y restauraciones corren en la cola; al iniciar se retoman los abandonados
+    scheduler.start()
+    try:
+        yield
+    finally:
+        scheduler.stop()
+        bus.stop()
 
 
-app.include_router(jobs.router)
-app.include_router(employees.router)
-app.include_router(departments.router)
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CacheHeadersMiddleware)
+
+
+if ASYNC_API:
+    for router in async_api.routers:
+        app.include_router(router)
+else:
+    app.include_router(jobs.router)
+    app.include_router(employees.router)
+    app.include_router(departments.router)
+    app.include_router(queries.router)
 app.include_router(files.router)
 app.include_router(backups.router)
-app.include_router(queries.router)
+app.include_router(jobs_queue.router)
+app.include_router(health.router)
@@ -1,26 +1,19 @@
+# Version SQL de los reportes /queries/quarters y /queries/avg_hired. Los endpoints leen
+# de HiresSummary (`src.extras.reporting`); estas consultas solo las usa
+# `python -m src.extras.migrations --explain` para comprobar que los indices de
+# "Employees".hired_at se pueden usar al consultar la tabla directamente.
 QUARTERS = """SELECT
 	d.department,
 	j.job,
-    COUNT(CASE
-        WHEN extract(quarter FROM cast(e.datetime AS timestamp)) = 1 THEN 1
-		ELSE NULL
-    END) AS Q1,
-    COUNT(CASE
-        WHEN extract(quarter FROM cast(e.datetime AS timestamp)) = 2 THEN 1
-		ELSE 0
-    END) AS Q2,
-    COUNT(CASE
-        WHEN extract(quarter FROM cast(e.datetime AS timestamp)) = 3 THEN 1
-		ELSE 0
-    END) AS Q3,
-    COUNT(CASE
-        WHEN extract(quarter FROM cast(e.datetime AS timestamp)) = 4 THEN 1
-		ELSE 0
-    END) AS Q4
+    COUNT(*) FILTER (WHERE extract(quarter FROM e.hired_at AT TIME ZONE 'UTC') = 1) AS Q1,
+    COUNT(*) FILTER (WHERE extract(quarter FROM e.hired_at AT TIME ZONE 'UTC') = 2) AS Q2,
+    COUNT(*) FILTER (WHERE extract(quarter FROM e.hired_at AT TIME ZONE 'UTC') = 3) AS Q3,
+    COUNT(*) FILTER (WHERE extract(quarter FROM e.hired_at AT TIME ZONE 'UTC') = 4) AS Q4
 FROM "Employees" e
 	INNER JOIN "Departments" d ON d.id = e.department_id
 	INNER JOIN "Jobs" j ON j.id = e.job_id
-WHERE extract(year FROM cast(e.datetime AS timestamp)) = 2021
+WHERE e.hired_at >= TIMESTAMPTZ '2021-01-01 00:00:00+00'
+    AND e.hired_at < TIMESTAMPTZ '2022-01-01 00:00:00+00'
 GROUP BY d.department, j.job
 ORDER BY d.department, j.job"""
 
@@ -29,7 +22,8 @@ AVG_HIRED = """WITH avg_employees AS (
     FROM (
         SELECT COUNT(*) AS employee_count
         FROM "Employees" e
-        WHERE extract(year FROM cast(e.datetime AS timestamp)) = 2021
+        WHERE e.hired_at >= TIMESTAMPTZ '2021-01-01 00:00:00+00'
+            AND e.hired_at < TIMESTAMPTZ '2022-01-01 00:00:00+00'
         GROUP BY e.department_id
     ) AS department_counts
 )
@@ -39,6 +33,7 @@ SELECT
     COUNT(e.id) AS hired_count
 FROM "Employees" e
 JOIN "Departments" d ON e.department_id = d.id
-WHERE extract(year FROM cast(e.datetime AS timestamp)) = 2021
+WHERE e.hired_at >= TIMESTAMPTZ '2021-01-01 00:00:00+00'
+    AND e.hired_at < TIMESTAMPTZ '2022-01-01 00:00:00+00'
 GROUP BY d.id, d.department
 HAVING COUNT(e.id) > (SELECT avg_count FROM avg_employees)"""
@@ -0,0 +1,41 @@
+"""
+Fixtures comunes de las pruebas: cada prueba usa su propia base SQLite en un directorio
+temporal, con todas las tablas de `models` creadas. No se necesita PostgreSQL.
+"""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.extras import models
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}",
+                           connect_args={'check_same_thread': False})
+
+    # pysqlite no emite BEGIN por su cuenta; sin esto los SAVEPOINT no aislan nada. Con
+    # IMMEDIATE, los hilos que escriben en paralelo esperan el candado en lugar de fallar
+    @event.listens_for(engine, 'connect')
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def _begin(connection):
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+    models.Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
@@ -0,0 +1,138 @@
+from typing import Dict, List
+
+import pytest
+from sqlalchemy.dialects.postgresql.base import PGCompiler
+from sqlalchemy.dialects.sqlite.base import SQLiteCompiler
+
+from src.extras import crud, models
+from src.extras.reporting import count_hires
+
+
+class ReturningSQLiteCompiler(SQLiteCompiler):
+    """
+    Compilador que permite ejecutar en SQLite (>= 3.35) las sentencias de la rama con
+    `RETURNING`: SQLAlchemy 1.4.0 solo las compila para PostgreSQL.
+    """
+
+    returning_clause = PGCompiler.returning_clause
+    update_from_clause = PGCompiler.update_from_clause
+
+    def visit_values(self, element, asfrom=False, **kw):
+        # SQLite no admite `AS batch (id, ...)`; las columnas de VALUES se llaman column1, ...
+        rows = super().visit_values(element, **kw)
+        if not asfrom:
+            return rows
+        columns = ', '.join(f"column{position} AS {self.preparer.quote(column.name)}"
+                            for position, column in enumerate(element.columns, start=1))
+        return f"(SELECT {columns} FROM ({rows})) AS {self.preparer.quote(element.name)}"
+
+
+@pytest.fixture(params=['returning', 'no_returning'])
+def crud_db(request, engine, db):
+    if request.param == 'returning':
+        engine.dialect.statement_compiler = ReturningSQLiteCompiler
+        engine.dialect.full_returning = True
+    assert crud.supports_returning(db) == (request.param == 'returning')
+    return db
+
+
+def employee(id: int, datetime: str = '2021-05-01T10:00:00Z', department_id: int = 1,
+             job_id: int = 1, name: str = None) -> Dict:
+    return {'id': id, 'name': name or f'employee {id}', 'datetime': datetime,
+            'department_id': department_id, 'job_id': job_id}
+
+
+def statuses(result: Dict) -> List[str]:
+    return [item['status'] for item in result['results']]
+
+
+def departments(db) -> Dict[int, str]:
+    db.expire_all()
+    return dict(db.query(models.Departments.id, models.Departments.department))
+
+
+def assert_hires_summary_matches(db) -> None:
+    # El resumen incremental debe coincidir con un conteo completo de `Employees`
+    db.expire_all()
+    rows = [dict(row._mapping) for row in db.query(
+        models.Employees.datetime, models.Employees.department_id, models.Employees.job_id)]
+    summary = {
+        (row.department_id, row.job_id, row.year, row.quarter): row.hired
+        for row in db.query(models.HiresSummary) if row.hired
+    }
+    assert summary == dict(count_hires(rows))
+
+
+def test_batch_create_reports_created_exists_and_duplicate(crud_db):
+    crud_db.add(models.Departments(id=1, department='existing'))
+    crud_db.commit()
+
+    result = crud.batch_create(crud_db, models.Departments, [
+        {'id': 1, 'department': 'ignored'},
+        {'id': 2, 'department': 'first'},
+        {'id': 2, 'department': 'second'},
+        {'id': 3, 'department': 'new'},
+    ])
+
+    assert statuses(result) == [crud.EXISTS, crud.CREATED, crud.DUPLICATE, crud.CREATED]
+    assert result['summary'] == {crud.EXISTS: 1, crud.CREATED: 2, crud.DUPLICATE: 1}
+    assert departments(crud_db) == {1: 'existing', 2: 'first', 3: 'new'}
+
+
+def test_batch_update_reports_updated_not_found_and_duplicate(crud_db):
+    crud_db.add_all([models.Departments(id=id, department=f'department {id}') for id in (1, 2)])
+    crud_db.commit()
+
+    result = crud.batch_update(crud_db, models.Departments, [
+        {'id': 2, 'department': 'renamed'},
+        {'id': 9, 'department': 'missing'},
+        {'id': 2, 'department': 'ignored'},
+    ])
+
+    assert statuses(result) == [crud.UPDATED, crud.NOT_FOUND, crud.DUPLICATE]
+    assert result['summary'] == {crud.UPDATED: 1, crud.NOT_FOUND: 1, crud.DUPLICATE: 1}
+    assert departments(crud_db) == {1: 'department 1', 2: 'renamed'}
+
+
+def test_batch_delete_reports_deleted_not_found_and_duplicate(crud_db):
+    crud_db.add_all([models.Departments(id=id, department=f'department {id}') for id in (1, 2)])
+    crud_db.commit()
+
+    result = crud.batch_delete(crud_db, models.Departments, [1, 9, 1])
+
+    assert statuses(result) == [crud.DELETED, crud.NOT_FOUND, crud.DUPLICATE]
+    assert result['summary'] == {crud.DELETED: 1, crud.NOT_FOUND: 1, crud.DUPLICATE: 1}
+    assert departments(crud_db) == {2: 'department 2'}
+
+
+def test_batch_rejects_empty_batches(crud_db):
+    with pytest.raises(ValueError, match='no tiene elementos'):
+        crud.batch_delete(crud_db, models.Departments, [])
+
+
+def test_employee_batches_keep_hires_summary_in_sync(crud_db):
+    result = crud.batch_create(crud_db, models.Employees, [
+        employee(1),
+        employee(2, datetime='2021-08-15T09:00:00Z'),
+        employee(3, department_id=2),
+        employee(3, department_id=3),
+    ])
+    assert statuses(result) == [crud.CREATED] * 3 + [crud.DUPLICATE]
+    assert_hires_summary_matches(crud_db)
+
+    # Un empleado existente no se vuelve a contar
+    crud.batch_create(crud_db, models.Employees, [employee(1, department_id=4), employee(4)])
+    assert_hires_summary_matches(crud_db)
+
+    result = crud.batch_update(crud_db, models.Employees, [
+        employee(2, datetime='2021-11-30T23:30:00-05:00', job_id=2),
+        employee(3, department_id=5, name='moved'),
+        employee(9),
+    ])
+    assert statuses(result) == [crud.UPDATED, crud.UPDATED, crud.NOT_FOUND]
+    assert_hires_summary_matches(crud_db)
+
+    result = crud.batch_delete(crud_db, models.Employees, [1, 2, 9])
+    assert statuses(result) == [crud.DELETED, crud.DELETED, crud.NOT_FOUND]
+    assert_hires_summary_matches(crud_db)
+    assert [row.id for row in crud_db.query(models.Employees.id).order_by(models.Employees.id)] == [3, 4]
@@ -0,0 +1,22 @@
+import orjson
+
+from src.extras import schemas
+from src.extras.responses import json_rows
+
+
+def test_json_rows_projects_rows_to_the_schema():
+    rows = [{'id': 1, 'name': 'a', 'datetime': '2021-05-01T10:00:00Z', 'department_id': 2,
+             'job_id': 3, 'hired_at': '2021-05-01T10:00:00+00:00'}]
+
+    response = json_rows(rows, schemas.BaseEmployees, next_cursor=1)
+
+    assert orjson.loads(response.body) == [{key: value for key, value in rows[0].items() if key != 'hired_at'}]
+    assert response.headers['X-Next-After-Id'] == '1'
+
+
+def test_json_rows_excludes_none_and_missing_fields():
+    rows = [{'year': 2021, 'month': 5, 'hired': 2, 'total': 7}]
+
+    response = json_rows(rows, schemas.HiresResponse, exclude_none=True)
+
+    assert orjson.loads(response.body) == [{'year': 2021, 'month': 5, 'hired': 2}]
@@ -0,0 +1,207 @@
+from typing import Dict, List
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from src.extras import backup_jobs, models
+from src.extras.backup import _load_isolated
+from src.extras.backup_jobs import BackupJob, DONE, FAILED
+from src.extras.bulk import ExecutemanyLoader
+from src.extras.snapshots import FULL, INCREMENTAL, read_tombstones, snapshot_chain, verify_table_file
+
+MODELS = [models.Departments, models.Employees]
+TABLES = [model.__tablename__ for model in MODELS]
+
+
+@pytest.fixture(autouse=True)
+def job_sessions(monkeypatch, session_factory):
+    # Los trabajos abren sus propias sesiones, una por tabla
+    monkeypatch.setattr(backup_jobs, 'local_session', session_factory)
+
+
+def employee(id: int, department_id: int = 1, datetime: str = '2021-05-01T10:00:00Z') -> models.Employees:
+    return models.Employees(id=id, name=f'employee {id}', datetime=datetime,
+                            department_id=department_id, job_id=1)
+
+
+def seed(db) -> None:
+    db.add_all([models.Departments(id=id, department=f'department {id}') for id in range(1, 6)])
+    db.add_all([employee(id) for id in range(1, 11)])
+    db.commit()
+
+
+def state(db, model) -> Dict[int, tuple]:
+    db.expire_all()
+    columns = [column for column in model.__table__.columns if column.name != 'hired_at']
+    return {row[0]: tuple(row) for row in db.query(*columns).order_by(model.id)}
+
+
+def snapshot_state(db) -> Dict[str, Dict[int, tuple]]:
+    return {model.__tablename__: state(db, model) for model in MODELS}
+
+
+def wipe(db) -> None:
+    for model in (models.Employees, models.Departments, models.HiresSummary):
+        db.query(model).delete()
+    db.commit()
+
+
+def backup(root, full: bool = False) -> Dict:
+    job = BackupJob('backup', TABLES)
+    backup_jobs._backup(job, MODELS, str(root), full, False)
+    assert job.status == DONE, job.as_dict()
+    return snapshot_chain(str(root))[-1][1]
+
+
+def restore(root, overwrite: bool) -> Dict:
+    job = BackupJob('restore', TABLES)
+    backup_jobs._restore(job, MODELS, str(root), overwrite)
+    return job.as_dict()
+
+
+def total_hires(db) -> int:
+    return db.query(func.coalesce(func.sum(models.HiresSummary.hired), 0)).scalar()
+
+
+def change_after_full(db) -> None:
+    db.query(models.Departments).filter_by(id=2).update({'department': 'renamed'})
+    db.query(models.Employees).filter_by(id=4).update({'name': 'moved', 'department_id': 5})
+    db.query(models.Departments).filter_by(id=3).delete()
+    db.query(models.Employees).filter(models.Employees.id.in_([7, 8])).delete(synchronize_session=False)
+    db.add(models.Departments(id=6, department='department 6'))
+    db.add(employee(11, department_id=6))
+    db.commit()
+
+
+def test_incremental_snapshot_stores_only_changes(db, tmp_path):
+    seed(db)
+    full = backup(tmp_path)
+    assert full['type'] == FULL
+    assert full['tables']['Employees']['changed'] == 10
+
+    change_after_full(db)
+    incremental = backup(tmp_path)
+
+    assert incremental['type'] == INCREMENTAL
+    assert incremental['parent'] == full['id']
+    departments, employees = incremental['tables']['Departments'], incremental['tables']['Employees']
+    assert (departments['rows'], departments['changed'], departments['deleted']) == (5, 2, 1)
+    assert (employees['rows'], employees['changed'], employees['deleted']) == (9, 2, 2)
+    chain = snapshot_chain(str(tmp_path))
+    assert [manifest['id'] for _, manifest in chain] == [full['id'], incremental['id']]
+    assert list(read_tombstones(str(tmp_path / incremental['id'] / 'Employees.tombstones'))) == [7, 8]
+
+    unchanged = backup(tmp_path)
+    assert unchanged['tables']['Employees']['changed'] == 0
+    assert unchanged['tables']['Employees']['deleted'] == 0
+
+
+def test_restore_round_trip_into_empty_tables(db, tmp_path):
+    seed(db)
+    backup(tmp_path)
+    change_after_full(db)
+    backup(tmp_path)
+    expected = snapshot_state(db)
+
+    for overwrite in (True, False):
+        wipe(db)
+        result = restore(tmp_path, overwrite)
+        assert result['status'] == DONE, result
+        assert snapshot_state(db) == expected
+        assert total_hires(db) == len(expected['Employees'])
+
+
+def test_insert_only_restore_keeps_live_rows(db, tmp_path):
+    seed(db)
+    backup(tmp_path)
+    change_after_full(db)
+    backup(tmp_path)
+
+    db.query(models.Departments).filter_by(id=2).update({'department': 'live'})
+    db.query(models.Departments).filter_by(id=1).delete()
+    db.add(models.Departments(id=9, department='written after the backup'))
+    db.commit()
+
+    restore(tmp_path, overwrite=False)
+    departments = state(db, models.Departments)
+    assert departments[2][1] == 'live'
+    assert departments[1][1] == 'department 1'
+    assert 3 not in departments
+    assert 9 in departments
+
+
+def test_overwrite_restore_replays_changes_and_deletes(db, tmp_path):
+    seed(db)
+    backup(tmp_path)
+    change_after_full(db)
+    backup(tmp_path)
+
+    db.query(models.Departments).filter_by(id=2).update({'department': 'live'})
+    db.add(models.Departments(id=3, department='recreated'))
+    db.add(models.Departments(id=9, department='written after the backup'))
+    db.commit()
+
+    result = restore(tmp_path, overwrite=True)
+    departments = state(db, models.Departments)
+    assert departments[2][1] == 'renamed'
+    assert 3 not in departments
+    assert 9 in departments
+    assert result['tables']['Departments']['deleted'] >= 1
+
+
+def test_corrupted_block_is_rejected(db, tmp_path):
+    seed(db)
+    manifest = backup(tmp_path)
+    table = manifest['tables']['Employees']
+    path = tmp_path / manifest['id'] / table['file']
+    block = table['blocks'][0]
+    data = bytearray(path.read_bytes())
+    data[block['offset'] + block['bytes'] // 2] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match='Checksum invalido en el bloque 0'):
+        verify_table_file(str(tmp_path / manifest['id']), table)
+
+    wipe(db)
+    result = restore(tmp_path, overwrite=True)
+    assert result['status'] == FAILED
+    assert 'Checksum invalido' in result['tables']['Employees']['error']
+    assert state(db, models.Employees) == {}
+
+
+class RejectingLoader(ExecutemanyLoader):
+    """
+    Carga real que falla, como lo haria la base de datos, si el lote trae un ID rechazado.
+    """
+
+    def __init__(self, db, rejected: List[int], error=IntegrityError):
+        super().__init__(db)
+        self.rejected = set(rejected)
+        self.error = error
+
+    def load(self, model, rows, on_conflict=None) -> int:
+        rows = list(rows)
+        if any(row['id'] in self.rejected for row in rows):
+            raise self.error('INSERT', {}, Exception('rechazada'))
+        return super().load(model, rows, on_conflict=on_conflict)
+
+
+def test_load_isolated_bisects_rejected_rows(db):
+    rows = [{'id': id, 'department': f'department {id}'} for id in range(1, 18)]
+    loader = RejectingLoader(db, rejected=[3, 11, 12])
+
+    loaded, failed = _load_isolated(db, loader, models.Departments, rows, None)
+    db.commit()
+
+    assert loaded == 14
+    assert sorted(row['id'] for row in failed) == [3, 11, 12]
+    assert sorted(state(db, models.Departments)) == [id for id in range(1, 18) if id not in (3, 11, 12)]
+
+
+def test_load_isolated_propagates_operational_errors(db):
+    rows = [{'id': id, 'department': f'department {id}'} for id in range(1, 5)]
+    loader = RejectingLoader(db, rejected=[2], error=OperationalError)
+
+    with pytest.raises(OperationalError):
+        _load_isolated(db, loader, models.Departments, rows, None)